@@ -1,27 +1,44 @@
 # From: backend/app/api/v1/leads.py
 # ----------------------------------------
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy.orm import Session
-from typing import List
+import base64
+import csv
+import hashlib
+import io
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from celery import group
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import AsyncIterator, List, Optional
 
+from app.core.config import settings
 from app.db import models
-from app.db.base import get_db
+from app.db.base import get_async_db, AsyncSessionLocal
 from app.schemas import lead as lead_schema
 from app.schemas import pitch as pitch_schema
-from app.workers.tasks import process_lead_website, generate_pitch_task
+from app.services.generative_ai import ai_service
+from app.services.lead_events import TERMINAL_STATUSES, lead_events
+from app.services.pitch import build_pitch_prompt
+from app.services.rate_limiter import Priority
+from app.workers.celery_app import GENERATE_PITCH_TASK, PROCESS_LEAD_TASK, celery
 
 # Initialize the API Router for this module
 router = APIRouter()
 
 @router.post("/", response_model=lead_schema.LeadRead, status_code=201)
-def create_lead(lead: lead_schema.LeadCreate, db: Session = Depends(get_db)):
+async def create_lead(lead: lead_schema.LeadCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new lead.
     This endpoint accepts a company name and a website URL, creates a new lead
     in the database, and triggers a background task to crawl and analyze the website.
     """
     # Check if a lead with the same URL already exists to avoid duplicates.
-    db_lead = db.query(models.Lead).filter(models.Lead.website_url == str(lead.website_url)).first()
+    db_lead = await db.scalar(select(models.Lead).where(models.Lead.website_url == str(lead.website_url)))
     if db_lead:
         raise HTTPException(status_code=400, detail="Website URL already exists in the database")
     
@@ -29,81 +46,404 @@ def create_lead(lead: lead_schema.LeadCreate, db: Session = Depends(get_db)):
     new_lead = models.Lead(company_name=lead.company_name, website_url=str(lead.website_url))
     
     db.add(new_lead)
-    db.commit()
-    db.refresh(new_lead)
+    await db.commit()
+    await db.refresh(new_lead)
     
     # Dispatch the long-running task to the Celery worker.
-    process_lead_website.delay(lead_id=new_lead.id, url=new_lead.website_url)
+    celery.send_task(PROCESS_LEAD_TASK, kwargs={"lead_id": new_lead.id, "url": new_lead.website_url})
     
     return new_lead
 
-@router.get("/", response_model=List[lead_schema.LeadRead])
-def read_leads(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def _parse_import_rows(body: bytes, content_type: str) -> list:
     """
-    Retrieve a list of all leads from the database.
-    Supports pagination with skip and limit parameters.
+    Decodes a bulk import body into raw rows. Accepts a JSON array,
+    NDJSON (one JSON object per line) or CSV with a header row containing
+    `company_name` and `website_url`.
     """
-    leads = db.query(models.Lead).order_by(models.Lead.created_at.desc()).offset(skip).limit(limit).all()
-    return leads
+    text = body.decode("utf-8-sig")
+    if "csv" in content_type:
+        return list(csv.DictReader(io.StringIO(text)))
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    rows = json.loads(text)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of leads.")
+    return rows
 
-@router.get("/{lead_id}", response_model=lead_schema.LeadRead)
-def read_lead(lead_id: int, db: Session = Depends(get_db)):
+async def _insert_new_leads(db: AsyncSession, leads: list[dict]) -> dict[str, int]:
+    """
+    Bulk-inserts leads in one statement and returns {website_url: id} for the
+    rows actually inserted. Rows that lost a race with a concurrent insert of
+    the same URL are skipped by the database instead of failing the batch.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(models.Lead).on_conflict_do_nothing(index_elements=["website_url"])
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(models.Lead).on_conflict_do_nothing(index_elements=["website_url"])
+    else:
+        stmt = insert(models.Lead)
+    stmt = stmt.values(leads).returning(models.Lead.id, models.Lead.website_url)
+    return {row.website_url: row.id for row in await db.execute(stmt)}
+
+async def _import_leads(rows: list) -> AsyncIterator[str]:
+    """
+    Imports rows chunk by chunk: validate, deduplicate against the batch and
+    the database with one set-based query, bulk-insert, commit, then dispatch
+    the analysis tasks for the chunk as a single Celery group. Yields one
+    NDJSON result line per input row as soon as its chunk is done.
+    """
+    seen_urls: set[str] = set()
+    chunk_size = max(1, settings.BULK_IMPORT_CHUNK_SIZE)
+    async with AsyncSessionLocal() as db:
+        for start in range(0, len(rows), chunk_size):
+            results: dict[int, lead_schema.LeadImportResult] = {}
+            candidates: dict[str, tuple[int, str]] = {}
+
+            for row_number, raw in enumerate(rows[start:start + chunk_size], start=start):
+                try:
+                    lead = lead_schema.LeadCreate.model_validate(raw)
+                except ValidationError as e:
+                    results[row_number] = lead_schema.LeadImportResult(row=row_number, status="invalid", error=str(e.errors()[0]["msg"]))
+                    continue
+                url = str(lead.website_url)
+                if url in seen_urls:
+                    results[row_number] = lead_schema.LeadImportResult(row=row_number, status="duplicate", website_url=url)
+                    continue
+                seen_urls.add(url)
+                candidates[url] = (row_number, lead.company_name)
+
+            if candidates:
+                existing = set(await db.scalars(select(models.Lead.website_url).where(models.Lead.website_url.in_(list(candidates)))))
+                new_leads = [
+                    {"company_name": company_name, "website_url": url}
+                    for url, (_, company_name) in candidates.items() if url not in existing
+                ]
+                inserted = await _insert_new_leads(db, new_leads) if new_leads else {}
+                await db.commit()
+
+                if inserted:
+                    # Publishing a chunk's worth of tasks is blocking broker I/O; keep it off the event loop.
+                    await run_in_threadpool(group(
+                        celery.signature(PROCESS_LEAD_TASK, kwargs={"lead_id": lead_id, "url": url}) for url, lead_id in inserted.items()
+                    ).apply_async)
+
+                for url, (row_number, _) in candidates.items():
+                    if url in inserted:
+                        results[row_number] = lead_schema.LeadImportResult(row=row_number, status="created", website_url=url, lead_id=inserted[url])
+                    else:
+                        results[row_number] = lead_schema.LeadImportResult(row=row_number, status="duplicate", website_url=url)
+
+            for row_number in sorted(results):
+                yield results[row_number].model_dump_json(exclude_none=True) + "\n"
+
+@router.post("/bulk", response_class=StreamingResponse, status_code=200)
+async def import_leads(request: Request):
+    """
+    Import many leads at once.
+    The body may be a JSON array, NDJSON (`application/x-ndjson`) or CSV
+    (`text/csv`) with `company_name` and `website_url` columns. Leads are
+    deduplicated against existing website URLs, bulk-inserted and queued for
+    analysis in chunks. The response streams one NDJSON result per input row.
+    """
+    try:
+        rows = _parse_import_rows(await request.body(), request.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse import body: {e}")
+    if len(rows) > settings.BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Too many rows; the limit is {settings.BULK_IMPORT_MAX_ROWS} per request.")
+
+    return StreamingResponse(_import_leads(rows), media_type="application/x-ndjson")
+
+# Columns the lead list returns when no `fields` projection is given; the
+# analysis itself is only returned by the single-lead endpoint.
+DEFAULT_LIST_FIELDS = tuple(lead_schema.LeadSummary.model_fields)
+# Fields that may be requested with `fields`.
+LIST_FIELDS = tuple(lead_schema.LeadListItem.model_fields)
+
+def _list_field_names(fields: str | None) -> list[str]:
+    names = [name.strip() for name in fields.split(",") if name.strip()] if fields else list(DEFAULT_LIST_FIELDS)
+    unknown = [name for name in names if name not in LIST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+def _encode_cursor(lead_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([lead_id]).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        (lead_id,) = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return int(lead_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+def _etag_response(request: Request, payload, headers: dict | None = None) -> Response:
+    """
+    Returns `payload` as JSON with an ETag of its content. If the client's
+    If-None-Match already holds that ETag, answers 304 with no body, so
+    polling an unchanged resource costs no payload.
+    """
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": "no-cache"}
+    client_etags = {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}
+    if etag in client_etags or "*" in client_etags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/", response_model=List[lead_schema.LeadSummary])
+async def read_leads(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="The `X-Next-Cursor` header of the previous page."),
+    limit: int = Query(100, ge=1, le=500),
+    status: Optional[models.LeadStatus] = None,
+    name: Optional[str] = Query(None, description="Only leads whose company name starts with this text."),
+    min_stability_rating: Optional[int] = Query(None, ge=0, le=10),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return instead of the summary, e.g. `id,summary,bullet_points`."),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Retrieve a list of leads, newest first.
+    Pages are fetched with a keyset cursor on the ID, which increases with
+    insertion, so newest first is descending ID order: pass the
+    `X-Next-Cursor` response header as `cursor` to get the next page, which
+    costs the same however deep it is. Supports filtering by status, company
+    name prefix and minimum stability rating, and a `fields` projection so
+    only the requested columns are loaded. Responses carry an ETag; polls
+    with a matching If-None-Match get 304 Not Modified.
+    """
+    names = _list_field_names(fields)
+    # The cursor column is always loaded, even when not returned.
+    columns = list(dict.fromkeys(names + ["id"]))
+    query = select(*[getattr(models.Lead, column) for column in columns])
+    if status is not None:
+        query = query.where(models.Lead.status == status)
+    if name:
+        query = query.where(models.Lead.company_name.startswith(name, autoescape=True))
+    if min_stability_rating is not None:
+        query = query.where(models.Lead.stability_rating >= min_stability_rating)
+    if cursor:
+        query = query.where(models.Lead.id < _decode_cursor(cursor))
+    query = query.order_by(models.Lead.id.desc()).limit(limit)
+    rows = (await db.execute(query)).mappings().all()
+
+    headers = {}
+    if len(rows) == limit:
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1]["id"])
+    payload = [
+        lead_schema.LeadListItem.model_validate({field: row[field] for field in names}).model_dump(mode="json", exclude_unset=True)
+        for row in rows
+    ]
+    return _etag_response(request, payload, headers)
+
+@router.get("/{lead_id}", response_model=lead_schema.LeadDetail)
+async def read_lead(lead_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieve the details of a single lead by its ID.
+    Supports If-None-Match like the list, for clients polling a lead.
     """
-    db_lead = db.query(models.Lead).filter(models.Lead.id == lead_id).first()
+    db_lead = await db.get(models.Lead, lead_id)
     if db_lead is None:
         raise HTTPException(status_code=404, detail="Lead not found")
-    return db_lead
+    return _etag_response(request, lead_schema.LeadDetail.model_validate(db_lead, from_attributes=True).model_dump(mode="json"))
 
-@router.post("/{lead_id}/generate-pitch", response_model=pitch_schema.PitchRead)
-def generate_pitch_for_lead(lead_id: int, request: pitch_schema.PitchCreateRequest, db: Session = Depends(get_db)):
-    """
-    Generate a new, custom pitch for a specific lead.
-    This is the new, RESTful endpoint for this action.
-    """
-    # First, ensure the lead exists.
-    lead = db.query(models.Lead).filter(models.Lead.id == lead_id).first()
+async def _get_pitchable_lead(db: AsyncSession, lead_id: int) -> models.Lead:
+    """Loads a lead and checks its analysis is complete enough to pitch against."""
+    lead = await db.get(models.Lead, lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
     
     # A pitch can only be generated if the AI analysis is complete.
     if lead.status != models.LeadStatus.COMPLETED:
         raise HTTPException(status_code=400, detail="Lead analysis is not yet complete. Please wait.")
+    return lead
+
+async def _load_pitch_prompt(lead_id: int, user_product: str) -> str:
+    async with AsyncSessionLocal() as db:
+        lead = await _get_pitchable_lead(db, lead_id)
+        return build_pitch_prompt(lead.company_name, lead.summary, lead.bullet_points, user_product)
+
+async def _save_pitch(lead_id: int, content: str) -> models.Pitch:
+    async with AsyncSessionLocal() as db:
+        new_pitch = models.Pitch(lead_id=lead_id, content=content)
+        db.add(new_pitch)
+        await db.commit()
+        await db.refresh(new_pitch)
+        return new_pitch
+
+@router.post("/{lead_id}/generate-pitch", response_model=pitch_schema.PitchRead)
+async def generate_pitch_for_lead(lead_id: int, request: pitch_schema.PitchCreateRequest):
+    """
+    Generate a new, custom pitch for a specific lead.
+    This is the new, RESTful endpoint for this action.
+    The Gemini call and the short database reads and writes are all awaited
+    natively, each with its own short-lived session, so neither a worker
+    thread nor a database connection is held for the AI round-trip.
+    """
+    prompt = await _load_pitch_prompt(lead_id, request.user_product_description)
+    pitch_content = await ai_service.generate_text(prompt, priority=Priority.INTERACTIVE)
+    if not pitch_content or pitch_content.startswith("Error:"):
+        raise HTTPException(status_code=502, detail="Failed to generate pitch due to an AI service error.")
 
-    # Call the synchronous Celery task to get the pitch content.
-    # Note: For very long generations, this could also be a background task.
-    pitch_content = generate_pitch_task(
-        lead_id=lead.id, 
-        user_product=request.user_product_description
-    )
-    
     # Create and save the new pitch to the database.
-    new_pitch = models.Pitch(
-        lead_id=lead.id,
-        content=pitch_content
+    return await _save_pitch(lead_id, pitch_content)
+
+@router.post("/{lead_id}/pitch-jobs", response_model=pitch_schema.PitchJobRead, status_code=202)
+async def create_pitch_job(lead_id: int, request: pitch_schema.PitchCreateRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Queue pitch generation as a background job.
+    The worker saves the finished pitch; poll GET /api/v1/pitches/jobs/{job_id}
+    for its status and the new pitch's ID.
+    """
+    await _get_pitchable_lead(db, lead_id)
+    job = celery.send_task(GENERATE_PITCH_TASK, kwargs={"lead_id": lead_id, "user_product": request.user_product_description})
+    return pitch_schema.PitchJobRead(job_id=job.id, status="PENDING")
+
+def _sse_event(event: str, data: dict, event_id: int | None = None) -> str:
+    id_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{id_line}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/{lead_id}/generate-pitch/stream")
+async def stream_pitch_for_lead(lead_id: int, request: pitch_schema.PitchCreateRequest):
+    """
+    Generate a pitch and stream it as Server-Sent Events.
+    Emits `delta` events with text as the model produces it, then a `done`
+    event with the saved pitch's ID, or an `error` event if generation fails
+    or produces no text (nothing is saved then).
+    """
+    prompt = await _load_pitch_prompt(lead_id, request.user_product_description)
+
+    async def _events():
+        chunks = []
+        try:
+            async for text in ai_service.stream_text(prompt):
+                chunks.append(text)
+                yield _sse_event("delta", {"text": text})
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"Pitch generation failed: {e}"})
+            return
+        pitch_content = "".join(chunks)
+        # E.g. a blocked response; generate-pitch answers 502 for the same case.
+        if not pitch_content.strip():
+            yield _sse_event("error", {"detail": "Pitch generation failed: the AI service returned no text."})
+            return
+        pitch = await _save_pitch(lead_id, pitch_content)
+        yield _sse_event("done", {"pitch_id": pitch.id})
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/{lead_id}/refresh", response_model=lead_schema.LeadRead, status_code=202)
+async def refresh_lead(lead_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Re-crawl a lead and update its analysis incrementally.
+    Only the analysis sections whose input text changed since the last run
+    are sent to the AI again; the rest of the stored analysis is kept.
+    Returns 409 while a run is queued or in progress (PENDING, CRAWLING or
+    ANALYZING).
+    """
+    db_lead = await db.get(models.Lead, lead_id)
+    if db_lead is None:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    previous_status = db_lead.status
+    if previous_status.value not in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail="Lead analysis is already in progress.")
+    # Compare-and-set: of two concurrent refreshes, only the one that moves the lead to PENDING starts a run.
+    claimed = await db.execute(
+        update(models.Lead)
+        .where(models.Lead.id == lead_id, models.Lead.status == previous_status)
+        .values(status=models.LeadStatus.PENDING)
+    )
+    await db.commit()
+    if claimed.rowcount != 1:
+        raise HTTPException(status_code=409, detail="Lead analysis is already in progress.")
+    if lead_events is not None:
+        # The worker clears the replay log only when it picks the run up; until then an
+        # /events subscriber would replay the last run and stop at its terminal status.
+        await run_in_threadpool(lead_events.start_run, lead_id)
+
+    try:
+        celery.send_task(PROCESS_LEAD_TASK, kwargs={
+            "lead_id": db_lead.id, "url": db_lead.website_url, "refresh": True, "previous_status": previous_status.value,
+        })
+    except Exception:
+        # Otherwise the lead would stay PENDING and refuse every later refresh.
+        await db.execute(
+            update(models.Lead)
+            .where(models.Lead.id == lead_id, models.Lead.status == models.LeadStatus.PENDING)
+            .values(status=previous_status)
+        )
+        await db.commit()
+        raise
+    return db_lead
+
+async def _get_lead_status(lead_id: int) -> models.LeadStatus:
+    async with AsyncSessionLocal() as db:
+        lead_status = await db.scalar(select(models.Lead.status).where(models.Lead.id == lead_id))
+    if lead_status is None:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    return lead_status
+
+@router.get("/{lead_id}/events")
+async def stream_lead_events(lead_id: int, request: Request):
+    """
+    Stream a lead's status and progress as Server-Sent Events.
+    Starts with a `status` event for the current status, then replays the
+    recent events of the current run (after `Last-Event-ID`, when
+    reconnecting) and streams new ones live: `status`, `crawl_progress`,
+    `crawl_done`, `analysis_started` and `section_done`. The stream ends
+    after a COMPLETED or FAILED status; if the lead already has one, also
+    when reconnecting, the stream is just that status event.
+    """
+    # The session is closed before streaming, so no connection is held while the stream is open.
+    current_status = await _get_lead_status(lead_id)
+    try:
+        after_seq = int(request.headers.get("last-event-id", 0))
+    except ValueError:
+        after_seq = 0
+
+    async def _events():
+        yield _sse_event("status", {"status": current_status.value})
+        # A finished run publishes nothing more, so a subscription would only ever yield heartbeats.
+        if lead_events is None or current_status.value in TERMINAL_STATUSES:
+            return
+        try:
+            async for event in lead_events.subscribe(lead_id, after_seq, heartbeat=settings.LEAD_EVENTS_HEARTBEAT_SECONDS):
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    if await request.is_disconnected():
+                        return
+                    continue
+                yield _sse_event(event["event"], event["data"], event["seq"])
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"Lead event stream failed: {e}"})
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    db.add(new_pitch)
-    db.commit()
-    db.refresh(new_pitch)
-    
-    return new_pitch
 
 @router.delete("/{lead_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_lead(lead_id: int, db: Session = Depends(get_db)):
+async def delete_lead(lead_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Delete a specific lead by its ID.
     """
     # First, find the lead in the database.
-    db_lead = db.query(models.Lead).filter(models.Lead.id == lead_id).first()
+    # Pitches are loaded up front because the delete cascades to them.
+    db_lead = await db.get(models.Lead, lead_id, options=[selectinload(models.Lead.pitches)])
     
     # If the lead doesn't exist, return a 404 Not Found error.
     if db_lead is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lead not found")
     
     # If found, delete it from the database session.
-    db.delete(db_lead)
-    db.commit()
+    await db.delete(db_lead)
+    await db.commit()
     
     # Return a 204 No Content response, which is standard for successful deletions.
     # The Response object is used here to ensure no body is sent back.
@@ -1,12 +1,13 @@
 # From: backend/app/api/v1/pitches.py
 # ----------------------------------------
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.db import models
-from app.db.base import get_db
+from app.db.base import get_async_db
 from app.schemas import pitch as pitch_schema
+from app.workers.celery_app import celery
 
 # Initialize the API Router for this module
 router = APIRouter()
@@ -20,27 +21,41 @@ router = APIRouter()
 # This file can be used for other pitch-specific actions in the future.
 # For example:
 
+@router.get("/jobs/{job_id}", response_model=pitch_schema.PitchJobRead)
+def read_pitch_job(job_id: str):
+    """
+    Retrieve the status of a background pitch generation job
+    started with POST /api/v1/leads/{lead_id}/pitch-jobs.
+    """
+    result = celery.AsyncResult(job_id)
+    job = pitch_schema.PitchJobRead(job_id=job_id, status=result.state)
+    if result.successful():
+        job.pitch_id = result.result.get("pitch_id")
+    elif result.failed():
+        job.error = str(result.result)
+    return job
+
 @router.get("/{pitch_id}", response_model=pitch_schema.PitchRead)
-def read_pitch(pitch_id: int, db: Session = Depends(get_db)):
+async def read_pitch(pitch_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieve a single pitch by its unique ID.
     (Example of a future endpoint)
     """
-    pitch = db.query(models.Pitch).filter(models.Pitch.id == pitch_id).first()
+    pitch = await db.get(models.Pitch, pitch_id)
     if pitch is None:
         raise HTTPException(status_code=404, detail="Pitch not found")
     return pitch
 
 @router.delete("/{pitch_id}", status_code=204)
-def delete_pitch(pitch_id: int, db: Session = Depends(get_db)):
+async def delete_pitch(pitch_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Delete a specific pitch by its ID.
     (Example of a future endpoint)
     """
-    pitch = db.query(models.Pitch).filter(models.Pitch.id == pitch_id).first()
+    pitch = await db.get(models.Pitch, pitch_id)
     if pitch is None:
         raise HTTPException(status_code=404, detail="Pitch not found")
     
-    db.delete(pitch)
-    db.commit()
+    await db.delete(pitch)
+    await db.commit()
     return {"ok": True} # Response body will not be sent for 204 status code
\ No newline at end of file
@@ -18,17 +18,96 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     GOOGLE_API_KEY: str
 
+    # --- Database Settings ---
+    ASYNC_DATABASE_URL: str = "" # Used by the API; derived from DATABASE_URL (asyncpg/aiosqlite) when empty
+    DB_POOL_SIZE: int = 10 # Per engine, i.e. per API or worker process
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30 # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800 # Reconnect connections older than this many seconds
+    DB_POOL_PRE_PING: bool = True # Check connections on checkout, dropping ones the server closed
+    DB_STARTUP_TIMEOUT_SECONDS: int = 60 # How long API startup retries the schema check while the database is unreachable
+
     # --- Crawler Settings ---
     CRAWLER_MAX_PAGES: int = 20
     CRAWLER_MAX_DEPTH: int = 3
+    CRAWLER_CONCURRENCY: int = 6 # Total number of concurrent fetchers per crawl
+    CRAWLER_PER_HOST_CONCURRENCY: int = 3 # Max simultaneous requests to a single host
+    CRAWLER_PER_HOST_DELAY: float = 0.25 # Min seconds between request starts to the same host
+    CRAWLER_REQUEST_TIMEOUT: float = 15
+    CRAWLER_STRATEGY: str = "best_first" # "best_first" (relevance-scored) or "bfs"
+    CRAWLER_BUCKET_TARGET_PAGES: int = 4 # Stop early once every analysis bucket has this many pages
+    HTML_PARSER_BACKEND: str = "auto" # "auto", "selectolax", "lxml" or "html.parser"
+    HTML_PARSER_POOL_SIZE: int = max(1, (os.cpu_count() or 2) - 1) # 0 parses inline on the event loop
+    HTML_PARSER_POOL_KIND: str = "process" # "process" or "thread"
+
+    # --- Bulk Import Settings ---
+    BULK_IMPORT_CHUNK_SIZE: int = 500 # Rows per dedup query, insert and Celery dispatch batch
+    BULK_IMPORT_MAX_ROWS: int = 50000
+
+    # --- Worker Settings ---
+    # "per_task_loop": each task runs its own event loop (prefork pool, one lead per process).
+    # "shared_loop": a thread pool feeds one long-lived loop per process, so a single
+    # process runs up to WORKER_ASYNC_CONCURRENCY lead pipelines concurrently.
+    WORKER_EXECUTION_MODE: str = "per_task_loop"
+    WORKER_ASYNC_CONCURRENCY: int = 32
+
+    # --- Pipeline Settings ---
+    # "staged": crawl -> extract -> per-section analysis -> persist run as separate tasks on
+    # the lead_crawl, lead_extract, lead_analysis and lead_persist queues.
+    # "single_task": the whole pipeline runs inside process_lead_website.
+    PIPELINE_MODE: str = "staged"
+    PIPELINE_STAGE_MAX_RETRIES: int = 3 # Retries of a failed stage; earlier stages are not re-run
+    PIPELINE_RETRY_BACKOFF_SECONDS: int = 15 # Doubles with each retry of a stage
+    PIPELINE_ARTIFACT_TTL_SECONDS: int = 6 * 3600 # Texts handed between stages, kept in Redis
+
+    # --- Lead Event Settings (status/progress pushed over Redis pub/sub) ---
+    LEAD_EVENTS_ENABLED: bool = True
+    LEAD_EVENTS_REPLAY_SIZE: int = 100 # Events kept per lead for late or reconnecting subscribers
+    LEAD_EVENTS_TTL_SECONDS: int = 24 * 3600
+    LEAD_EVENTS_HEARTBEAT_SECONDS: float = 15.0 # SSE keep-alive interval
+
+    # --- Metrics Settings ---
+    METRICS_EXPORTER: str = "none" # "prometheus" (API /metrics), "otel", "log" or "none"
+    METRICS_NAMESPACE: str = "pitch_perfect"
+
+    # --- HTTP Cache Settings (shared by the crawler and third-party fetches) ---
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_PATH: str = ".cache/http_cache.sqlite3"
+    HTTP_CACHE_MAX_BYTES: int = 512 * 1024 * 1024 # Compressed bodies; LRU eviction beyond this
+    HTTP_CACHE_DEFAULT_TTL_SECONDS: int = 6 * 3600 # Freshness when a server sends no caching headers
 
     # --- Growth Analysis Settings ---
     # STEP 1: Read the problematic variable as a simple, raw string.
     # The field name now EXACTLY matches the variable name in the .env file.
     GROWTH_DATA_SOURCES: str = ""
+    GROWTH_CACHE_BACKEND: str = "redis" # "redis" (shared, single-flight across workers), "memory", "sqlite" or "none"
+    GROWTH_CACHE_TTL_SECONDS: int = 3 * 24 * 3600 # Extracted growth text per company
+    GROWTH_CACHE_MAX_ENTRIES: int = 20000
+    GROWTH_CACHE_SQLITE_PATH: str = ".cache/growth_data.sqlite3"
+    GROWTH_NOT_FOUND_TTL_SECONDS: int = 7 * 24 * 3600 # A source answered 404/410 for the company
+    GROWTH_BLOCKED_TTL_SECONDS: int = 3600 # A source refused the request (401/403/429/999)
+    GROWTH_FAILED_TTL_SECONDS: int = 300 # A source failed otherwise (5xx, timeout, unreadable page)
+    GROWTH_FETCH_LOCK_SECONDS: int = 90 # Lifetime of a worker's claim on fetching one company
+    GROWTH_FETCH_WAIT_SECONDS: float = 45.0 # How long other workers wait for that fetch before fetching themselves
 
     # --- AI Settings ---
-    AI_CONTEXT_BUDGET: int = 100000 # Increased budget
+    AI_CONTEXT_BUDGET: int = 100000 # Characters collected per text bucket while crawling
+    AI_CONTEXT_TOKEN_BUDGET: int = 8000 # Estimated tokens of source text packed into each analysis prompt
+    AI_ANALYSIS_PLAN: str = "merged" # "merged" (one call per shared input) or "per_section"
+    AI_REPAIR_MAX_CHARS: int = 20000 # Invalid output sent back in a section's repair prompt
+    AI_CACHE_BACKEND: str = "memory" # "memory", "redis", "sqlite" or "none"
+    AI_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    AI_CACHE_MAX_ENTRIES: int = 5000
+    AI_CACHE_SQLITE_PATH: str = ".cache/ai_responses.sqlite3"
+    AI_RATE_LIMIT_BACKEND: str = "redis" # "redis" (shared by all workers) or "memory" (per process)
+    AI_RATE_LIMIT_RPM: int = 1000 # Requests per minute across the whole deployment
+    AI_RATE_LIMIT_TPM: int = 1000000 # Estimated prompt tokens per minute
+    AI_RATE_LIMIT_INTERACTIVE_RESERVE: float = 0.2 # Share of both budgets batch calls leave for interactive ones
+    AI_MAX_CONCURRENCY: int = 16 # Upper bound of the adaptive in-flight limit per process
+    AI_MIN_CONCURRENCY: int = 1
+    AI_MAX_RETRIES: int = 4 # Retries for 429/5xx/transport errors
+    AI_RETRY_BASE_DELAY: float = 1.0
+    AI_RETRY_MAX_DELAY: float = 30.0
 
     class Config:
         env_file = ".env"
@@ -1,11 +1,15 @@
 # From: backend/app/db/models.py
 # ----------------------------------------
 import enum
-from sqlalchemy import (Column, Integer, String, Text, DateTime, ForeignKey, Enum)
+from sqlalchemy import (Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON, Index)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .base import Base
 
+# JSONB on PostgreSQL; SQLAlchemy's generic JSON (stored as text) elsewhere, e.g. SQLite.
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
 class LeadStatus(str, enum.Enum):
     PENDING = "PENDING"
     CRAWLING = "CRAWLING"
@@ -15,6 +19,12 @@ class LeadStatus(str, enum.Enum):
 
 class Lead(Base):
     __tablename__ = "leads"
+    __table_args__ = (
+        # Keyset pagination of the lead list filtered by status (unfiltered pages use the primary key).
+        Index("ix_leads_status_id", "status", "id"),
+        # Lets company-name prefix filters (LIKE 'name%') use an index on PostgreSQL.
+        Index("ix_leads_company_name_prefix", "company_name", postgresql_ops={"company_name": "text_pattern_ops"}),
+    )
     id = Column(Integer, primary_key=True, index=True)
     company_name = Column(String, index=True)
     website_url = Column(String, unique=True, index=True)
@@ -24,11 +34,17 @@ class Lead(Base):
     page_title = Column(String, nullable=True)
     page_description = Column(Text, nullable=True)
     summary = Column(Text, nullable=True)
-    bullet_points = Column(Text, nullable=True) # Will store JSON array as string
+    bullet_points = Column(JSONDocument, nullable=True) # JSON array of strings
     
     # --- NEW SCALABLE COLUMN ---
     # This will store the full JSON object with summary, bullets, SWOT, etc.
-    analysis_json = Column(Text, nullable=True)
+    analysis_json = Column(JSONDocument, nullable=True)
+    # Page and section-input fingerprints from the last analysis, used by refreshes.
+    fingerprints_json = Column(JSONDocument, nullable=True)
+
+    # --- FILTERABLE ANALYSIS FIELDS ---
+    # Copied out of analysis_json when it is written, so list queries can filter on them by index.
+    stability_rating = Column(Integer, nullable=True, index=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
@@ -1,12 +1,44 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.base import Base, engine
+from sqlalchemy.exc import DBAPIError
+from app.core.config import settings
+from app.db.base import Base, async_engine
 from app.api.v1 import leads, pitches
+from app.services.metrics import metrics
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="PitchPerfect API")
+async def _create_tables():
+    """
+    Creates missing database tables. Runs at startup rather than on import,
+    and keeps retrying with backoff for DB_STARTUP_TIMEOUT_SECONDS, so a
+    replica starting while the database is briefly unreachable still comes up.
+    """
+    deadline = time.monotonic() + settings.DB_STARTUP_TIMEOUT_SECONDS
+    delay = 0.5
+    while True:
+        try:
+            async with async_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            return
+        except (DBAPIError, OSError) as e:
+            if time.monotonic() + delay > deadline:
+                raise
+            print(f"Database not reachable yet ({e}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 10)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await _create_tables()
+    yield
+    await async_engine.dispose()
+
+
+app = FastAPI(title="PitchPerfect API", lifespan=lifespan)
 
 # CORS Middleware
 app.add_middleware(
@@ -15,8 +47,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],  # Lead list polling and pagination
 )
 
+if metrics.enabled:
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        # Label by route name, not raw path, to keep label cardinality bounded.
+        route = request.scope.get("route")
+        metrics.observe(
+            "api_request_seconds",
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "name", "unmatched"),
+            status=str(response.status_code),
+        )
+        return response
+
+if settings.METRICS_EXPORTER == "prometheus":
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        body, content_type = metrics.exporter.render()
+        return Response(body, media_type=content_type)
+
 app.include_router(leads.router, prefix="/api/v1/leads", tags=["Leads"])
 app.include_router(pitches.router, prefix="/api/v1/pitches", tags=["Pitches"])
 
@@ -0,0 +1,100 @@
+# From: backend/app/schemas/analysis.py
+# ----------------------------------------
+"""
+Pydantic models for the AI analysis sections.
+
+The worker passes the section models to Gemini as response schemas and
+validates each response against them; the API reuses `LeadAnalysis` to
+return the stored analysis as a typed object. Top-level section keys are
+required so an incomplete response is caught and repaired, while nested
+fields default to empty values as the prompts instruct.
+"""
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+
+
+# --- Section Contents ---
+
+class KeyPerson(BaseModel):
+    name: str = ""
+    title: str = ""
+
+class DetailedAnalysis(BaseModel):
+    business_model: str = ""
+    target_audience: str = ""
+    value_proposition: str = ""
+    company_tone: str = ""
+    potential_needs: List[str] = Field(default_factory=list)
+
+class SwotAnalysis(BaseModel):
+    strengths: List[str] = Field(default_factory=list)
+    weaknesses: List[str] = Field(default_factory=list)
+    opportunities: List[str] = Field(default_factory=list)
+    threats: List[str] = Field(default_factory=list)
+
+class TechAndTrends(BaseModel):
+    recurring_themes: List[str] = Field(default_factory=list)
+    market_trends: List[str] = Field(default_factory=list)
+    thought_leadership_position: str = ""
+
+class GrowthAnalysis(BaseModel):
+    funding_summary: str = "N/A"
+    revenue_estimate: str = "N/A"
+    team_growth_indicators: str = ""
+    market_position: str = ""
+    future_outlook: str = ""
+    stability_rating: int = Field(0, ge=0, le=10)
+    report: str = ""
+
+    @field_validator("stability_rating", mode="before")
+    @classmethod
+    def _coerce_rating(cls, value):
+        # Out-of-range or non-numeric ratings mean "no confident assessment".
+        try:
+            rating = int(value)
+        except (TypeError, ValueError):
+            return 0
+        return rating if 0 <= rating <= 10 else 0
+
+
+# --- Per-Call Response Schemas ---
+
+class OverviewSection(BaseModel):
+    summary: str
+    bullet_points: List[str]
+    simple_pitch: str
+
+class DetailedSwotSection(BaseModel):
+    detailed_analysis: DetailedAnalysis
+    swot_analysis: SwotAnalysis
+
+class KeyPersonsSection(BaseModel):
+    key_persons: List[KeyPerson]
+
+class TechTrendsSection(BaseModel):
+    tech_and_trends: TechAndTrends
+
+class GrowthSection(BaseModel):
+    growth_analysis: GrowthAnalysis
+
+class DetailedSwotTechSection(BaseModel):
+    """Response schema of the merged call in the "merged" analysis plan."""
+    detailed_analysis: DetailedAnalysis
+    swot_analysis: SwotAnalysis
+    tech_and_trends: TechAndTrends
+
+
+# --- Stored Analysis ---
+
+class LeadAnalysis(BaseModel):
+    """The full analysis stored for a lead; any section may be missing."""
+    summary: Optional[str] = None
+    bullet_points: Optional[List[str]] = None
+    simple_pitch: Optional[str] = None
+    detailed_analysis: Optional[DetailedAnalysis] = None
+    swot_analysis: Optional[SwotAnalysis] = None
+    key_persons: Optional[List[KeyPerson]] = None
+    tech_and_trends: Optional[TechAndTrends] = None
+    growth_analysis: Optional[GrowthAnalysis] = None
+    # Stored sections that no longer match their model; they are returned as missing.
+    unreadable_sections: List[str] = Field(default_factory=list)
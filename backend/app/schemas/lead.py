@@ -1,9 +1,13 @@
 # From: backend/app/schemas/lead.py
 # ----------------------------------------
-from pydantic import BaseModel, HttpUrl
-from typing import Optional
+import logging
+from pydantic import BaseModel, Field, HttpUrl, ValidationError, ValidationInfo, field_validator
+from typing import List, Literal, Optional
 from datetime import datetime
 from app.db.models import LeadStatus
+from app.schemas.analysis import LeadAnalysis
+
+logger = logging.getLogger(__name__)
 
 class LeadBase(BaseModel):
     company_name: str
@@ -17,9 +21,70 @@ class LeadRead(LeadBase):
     status: LeadStatus
     page_title: Optional[str] = None
     summary: Optional[str] = None
-    bullet_points: Optional[str] = None
-    analysis_json: Optional[str] = None # <-- ADD THIS LINE
+    bullet_points: Optional[List[str]] = None
+    stability_rating: Optional[int] = None
     created_at: datetime
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class LeadDetail(LeadRead):
+    """A single lead with its stored analysis returned as a typed object."""
+    analysis: Optional[LeadAnalysis] = Field(None, validation_alias="analysis_json")
+
+    @field_validator("analysis", mode="wrap")
+    @classmethod
+    def _drop_unreadable_sections(cls, value, handler, info: ValidationInfo):
+        """
+        Validates the stored analysis section by section when it does not
+        validate as a whole, e.g. after a section model changed: readable
+        sections are kept, the others are left out and listed in
+        `unreadable_sections`.
+        """
+        try:
+            return handler(value)
+        except ValidationError as e:
+            if not isinstance(value, dict):
+                logger.warning(f"Stored analysis of lead {info.data.get('id')} is unreadable: {e}")
+                return None
+        readable, unreadable = {}, []
+        for name, section in value.items():
+            if name not in LeadAnalysis.model_fields or name == "unreadable_sections":
+                continue
+            try:
+                LeadAnalysis.model_validate({name: section})
+            except ValidationError as e:
+                logger.warning(f"Section '{name}' of lead {info.data.get('id')} is unreadable: {e}")
+                unreadable.append(name)
+                continue
+            readable[name] = section
+        return LeadAnalysis.model_validate({**readable, "unreadable_sections": unreadable})
+
+class LeadSummary(BaseModel):
+    """The slim row returned by the lead list by default."""
+    id: int
+    company_name: str
+    website_url: str
+    status: LeadStatus
+    stability_rating: Optional[int] = None
+    created_at: datetime
+
+class LeadListItem(BaseModel):
+    """A row of the lead list with a `fields` projection; only the requested columns are present."""
+    id: Optional[int] = None
+    company_name: Optional[str] = None
+    website_url: Optional[str] = None
+    status: Optional[LeadStatus] = None
+    page_title: Optional[str] = None
+    summary: Optional[str] = None
+    bullet_points: Optional[List[str]] = None
+    stability_rating: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class LeadImportResult(BaseModel):
+    """One line of the NDJSON stream returned by the bulk import endpoint."""
+    row: int
+    status: Literal["created", "duplicate", "invalid"]
+    website_url: Optional[str] = None
+    lead_id: Optional[int] = None
+    error: Optional[str] = None
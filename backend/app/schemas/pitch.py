@@ -2,6 +2,7 @@
 # ----------------------------------------
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 class PitchBase(BaseModel):
     content: str
@@ -21,4 +22,11 @@ class PitchRead(PitchBase):
     created_at: datetime
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class PitchJobRead(BaseModel):
+    """Status of a background pitch generation job."""
+    job_id: str
+    status: str # Celery state: PENDING, STARTED, SUCCESS or FAILURE
+    pitch_id: Optional[int] = None
+    error: Optional[str] = None
@@ -0,0 +1,142 @@
+# From: backend/app/services/context_packing.py
+# ----------------------------------------
+"""
+Token-aware context packing for the analysis prompts.
+
+Instead of slicing the collected text at a character count (which cuts
+sentences in half and ignores what each analysis needs), the text is split
+into sentences, each sentence is scored by TF-IDF weight of the focus
+keywords of the analysis it is packed for plus its overall
+informativeness, and the best sentences are packed into the prompt's
+estimated token budget. Selected sentences keep their original order, and
+repeated sentences are packed once.
+"""
+import math
+import re
+from collections import Counter
+from app.core.config import settings
+from app.services.rate_limiter import estimate_tokens
+
+# Sentences longer than this are split on whitespace so they can still be packed.
+MAX_SENTENCE_CHARS = 600
+# Scores of matched focus keywords count this much more than general informativeness.
+FOCUS_WEIGHT = 3.0
+# Small preference for earlier sentences; pages are collected in priority order.
+POSITION_WEIGHT = 0.25
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD = re.compile(r"[a-z0-9][a-z0-9+&'-]*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the their this to was we were "
+    "will with you your they them he she his her not but all can more about which who what when how also".split()
+)
+
+# Keywords each analysis looks for; matched against sentence words and bigrams.
+SECTION_FOCUS_KEYWORDS = {
+    "overview": [
+        "company", "platform", "product", "products", "service", "services", "solution", "solutions",
+        "customers", "clients", "help", "helps", "mission", "offer", "provide", "leading",
+    ],
+    "detailed_swot": [
+        "customers", "clients", "pricing", "market", "industry", "business", "partners", "partnership",
+        "competitors", "value", "enterprise", "growth", "challenge", "risk", "award", "trusted", "revenue",
+        "founded", "global", "team", "expertise", "integrations",
+    ],
+    "key_persons": [
+        "ceo", "cto", "cfo", "coo", "cmo", "cio", "cpo", "founder", "co-founder", "president", "chief",
+        "officer", "director", "head", "vp", "vice", "chairman", "partner", "leadership", "board", "executive",
+    ],
+    "tech_trends": [
+        "ai", "technology", "data", "cloud", "platform", "trend", "trends", "innovation", "future", "automation",
+        "digital", "machine learning", "research", "insights", "launch", "announce", "announces", "security",
+    ],
+    "growth": [
+        "funding", "raised", "series", "investors", "investment", "valuation", "revenue", "employees",
+        "headcount", "growth", "acquired", "acquisition", "ipo", "profit", "million", "billion", "hiring",
+    ],
+}
+# The merged plan's combined Detailed/SWOT + Tech/Trends call looks for both.
+SECTION_FOCUS_KEYWORDS["detailed_swot_tech"] = SECTION_FOCUS_KEYWORDS["detailed_swot"] + SECTION_FOCUS_KEYWORDS["tech_trends"]
+
+
+def split_sentences(text: str) -> list[str]:
+    """Splits text into sentences, breaking overlong ones on word boundaries."""
+    sentences = []
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        while len(sentence) > MAX_SENTENCE_CHARS:
+            cut = sentence.rfind(" ", 0, MAX_SENTENCE_CHARS)
+            if cut <= 0:
+                cut = MAX_SENTENCE_CHARS
+            sentences.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def _terms(sentence: str) -> list[str]:
+    words = [word for word in WORD.findall(sentence.lower()) if word not in STOPWORDS]
+    # Bigrams let multi-word focus keywords ("machine learning") match.
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def rank_sentences(sentences: list[str], focus_keywords: list[str]) -> list[float]:
+    """
+    Scores each sentence: summed TF-IDF of the focus keywords it contains,
+    plus its mean term IDF (specific sentences beat generic ones), plus a
+    small bonus for appearing early.
+    """
+    term_counts = [Counter(_terms(sentence)) for sentence in sentences]
+    document_frequency = Counter()
+    for counts in term_counts:
+        document_frequency.update(counts.keys())
+    total = len(sentences)
+    idf = {term: math.log((total + 1) / (frequency + 1)) + 1 for term, frequency in document_frequency.items()}
+    focus = set(focus_keywords)
+
+    scores = []
+    for position, counts in enumerate(term_counts):
+        if not counts:
+            scores.append(0.0)
+            continue
+        focus_score = sum((1 + math.log(count)) * idf[term] for term, count in counts.items() if term in focus)
+        informativeness = sum(idf[term] for term in counts) / len(counts)
+        scores.append(
+            FOCUS_WEIGHT * focus_score / math.sqrt(len(counts))
+            + informativeness
+            + POSITION_WEIGHT * (1 - position / total)
+        )
+    return scores
+
+
+def pack_context(text: str, section: str, token_budget: int | None = None) -> str:
+    """
+    Returns the sentences of `text` most relevant to `section` (a key of
+    SECTION_FOCUS_KEYWORDS) that fit in `token_budget` estimated tokens,
+    in their original order. Text that already fits is returned unchanged.
+    """
+    if token_budget is None:
+        token_budget = settings.AI_CONTEXT_TOKEN_BUDGET
+    if not text or estimate_tokens(text) <= token_budget:
+        return text
+
+    sentences = []
+    seen = set()
+    for sentence in split_sentences(text):
+        key = sentence.lower()
+        if key not in seen:
+            seen.add(key)
+            sentences.append(sentence)
+
+    scores = rank_sentences(sentences, SECTION_FOCUS_KEYWORDS[section])
+    selected = []
+    used = 0
+    for index in sorted(range(len(sentences)), key=scores.__getitem__, reverse=True):
+        cost = estimate_tokens(sentences[index]) + 1
+        if used + cost > token_budget:
+            continue
+        selected.append(index)
+        used += cost
+    return " ".join(sentences[index] for index in sorted(selected))
@@ -1,53 +1,257 @@
 # From: backend/app/services/crawler.py
 # ----------------------------------------
 import asyncio
-from urllib.parse import urljoin, urlparse
+import hashlib
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Callable
+from urllib.parse import urlparse, urldefrag
 import httpx
-from bs4 import BeautifulSoup
 from app.core.config import settings
+from app.services.html_processing import process_page_async
+from app.services.http_cache import cached_get
+from app.services.metrics import metrics
 
 # --- Configuration ---
 MAX_PAGES_TO_CRAWL = 25 # Increased slightly to improve chances of finding blogs
+# Keywords used both to score links before fetching and to bucket pages for analysis.
+HIGH_PRIORITY_KEYWORDS = ["team", "leadership", "management", "board", "executive"]
+GENERAL_ABOUT_KEYWORDS = ["about", "company", "who-we-are"]
 TEAM_PAGE_KEYWORDS = ["about", "team", "leadership", "management", "who-we-are", "board", "executive"]
 BLOG_NEWS_KEYWORDS = ["blog", "news", "insights", "resources", "press", "article", "publication"]
+# Pages that rarely help the analysis; they are fetched last in best-first mode.
+LOW_VALUE_KEYWORDS = ["privacy", "terms", "legal", "cookie", "login", "signin", "signup", "cart", "checkout", "cdn-cgi"]
 
-async def crawl_website(initial_url: str) -> tuple[list[dict], list[str]]:
+
+def normalize_url(url: str) -> str:
+    """Strips the fragment so '/about' and '/about#team' are treated as one page."""
+    return urldefrag(url)[0]
+
+
+def classify_page_url(url: str) -> set[str]:
     """
-    Performs a breadth-first crawl of a website up to configured limits.
+    Returns the analysis buckets ('team', 'about', 'blog_news') a URL belongs to.
+    A page can be in the blog/news bucket and one of the team/about buckets.
+    """
+    parsed = urlparse(url)
+    url = f"{parsed.path}?{parsed.query}".lower()
+    buckets = set()
+    if any(keyword in url for keyword in HIGH_PRIORITY_KEYWORDS):
+        buckets.add("team")
+    elif any(keyword in url for keyword in GENERAL_ABOUT_KEYWORDS):
+        buckets.add("about")
+    if any(keyword in url for keyword in BLOG_NEWS_KEYWORDS):
+        buckets.add("blog_news")
+    return buckets
+
+
+def score_link(url: str, anchor_text: str, depth: int) -> float:
+    """
+    Scores a candidate link for best-first crawling; lower scores are fetched first.
+    Team/about and blog/news keywords in the URL or anchor text pull a link
+    forward, while deep paths and legal/account pages push it back.
+    """
+    path = urlparse(url).path.lower()
+    anchor_text = anchor_text.lower()
+    score = float(depth) + 0.5 * len([segment for segment in path.split("/") if segment])
+
+    if any(keyword in path for keyword in HIGH_PRIORITY_KEYWORDS):
+        score -= 10
+    elif any(keyword in path for keyword in TEAM_PAGE_KEYWORDS + GENERAL_ABOUT_KEYWORDS):
+        score -= 7
+    if any(keyword in path for keyword in BLOG_NEWS_KEYWORDS):
+        score -= 6
+
+    anchor_words = anchor_text.replace("-", " ")
+    if any(keyword.replace("-", " ") in anchor_words for keyword in TEAM_PAGE_KEYWORDS):
+        score -= 3
+    if any(keyword in anchor_words for keyword in BLOG_NEWS_KEYWORDS):
+        score -= 2
+
+    if any(keyword in path for keyword in LOW_VALUE_KEYWORDS):
+        score += 20
+    return score
+
+
+class CrawlFrontier:
+    """
+    A deduplicating priority queue of URLs waiting to be fetched.
+    URLs are deduplicated when they are enqueued, not when they are popped,
+    so each page is queued at most once. Entries with a lower priority value
+    are popped first; ties are broken in insertion order (breadth-first).
+    """
+    def __init__(self, max_depth: int):
+        self.max_depth = max_depth
+        self._heap: list[tuple[float, int, str, int]] = []
+        self._seen: set[str] = set()
+        self._counter = itertools.count()
+
+    def push(self, url: str, depth: int, priority: float | None = None) -> bool:
+        url = normalize_url(url)
+        if depth > self.max_depth or url in self._seen:
+            return False
+        self._seen.add(url)
+        if priority is None:
+            priority = depth
+        heapq.heappush(self._heap, (priority, next(self._counter), url, depth))
+        return True
+
+    def pop(self) -> tuple[str, int] | None:
+        if not self._heap:
+            return None
+        _, _, url, depth = heapq.heappop(self._heap)
+        return url, depth
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class HostRateLimiter:
+    """
+    Limits how hard the crawler hits any single host: at most `max_concurrent`
+    requests in flight, and request starts spaced at least `min_interval` apart.
+    """
+    def __init__(self, max_concurrent: int, min_interval: float):
+        self.max_concurrent = max(1, max_concurrent)
+        self.min_interval = max(0.0, min_interval)
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._next_start: dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_concurrent))
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with semaphore:
+            async with lock:
+                wait = self._next_start.get(host, 0.0) - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start[host] = time.monotonic() + self.min_interval
+            yield
+
+
+async def crawl_website(
+    initial_url: str,
+    on_page: Callable[[dict], bool] | None = None,
+) -> tuple[list[dict], list[str]]:
+    """
+    Crawls a website up to configured limits using a pool of concurrent fetchers.
+    With CRAWLER_STRATEGY="best_first" candidate links are scored before they
+    are fetched, so team/about and blog/news pages are crawled first; "bfs"
+    keeps plain breadth-first order. Per-host concurrency and rate limits keep
+    the crawl polite. Fetches go through the shared HTTP cache, so unchanged
+    pages are served locally or revalidated with a conditional request.
+    Each page is parsed once, in the shared parser pool, as soon as it is
+    fetched; only the extracted text is kept, not the raw HTML. When
+    `on_page` is given, each page is streamed to it instead of being kept
+    (the returned records then only carry the "url"), and the crawl ends
+    early once it returns True. `on_page` is called outside the crawl's
+    lock; an exception it raises stops the crawl and is re-raised here,
+    rather than counted as a page that failed to crawl.
     Returns a tuple containing:
-    - A list of dictionaries, each with the URL and HTML of a crawled page.
+    - A list of dictionaries, each with the "url", "intro_text",
+      "content_segments" (see html_processing.process_page) and the
+      "fingerprint" (SHA-256 of the body) of a crawled page.
     - A list of all successfully crawled URLs for logging purposes.
     """
     headers = {"User-Agent": "PitchPerfectBot/1.0"}
-    async with httpx.AsyncClient(timeout=15, headers=headers, follow_redirects=True) as client:
-        queue = [(initial_url, 0)]
-        visited_urls = set()
-        crawled_pages = []
-        successfully_crawled_urls = []
-        base_domain = urlparse(initial_url).netloc
-
-        while queue and len(crawled_pages) < settings.CRAWLER_MAX_PAGES:
-            url, depth = queue.pop(0)
-            if url in visited_urls or depth > settings.CRAWLER_MAX_DEPTH:
-                continue
+    max_pages = settings.CRAWLER_MAX_PAGES
+    best_first = settings.CRAWLER_STRATEGY == "best_first"
+    base_domain = urlparse(initial_url).netloc
+    frontier = CrawlFrontier(max_depth=settings.CRAWLER_MAX_DEPTH)
+    frontier.push(initial_url, 0)
+    host_limiter = HostRateLimiter(settings.CRAWLER_PER_HOST_CONCURRENCY, settings.CRAWLER_PER_HOST_DELAY)
 
-            print(f"Crawling (Depth: {depth}): {url}")
-            visited_urls.add(url)
+    crawled_pages = []
+    successfully_crawled_urls = []
+    in_flight = 0
+    stopped_early = False
+    callback_error = None
+    state_changed = asyncio.Condition()
+
+    async def _next_url() -> tuple[str, int] | None:
+        """Waits until a URL is available, or returns None when the crawl is over."""
+        nonlocal in_flight
+        async with state_changed:
+            while True:
+                if stopped_early or len(crawled_pages) >= max_pages:
+                    return None
+                # Only start a fetch if it could still fit in the page budget;
+                # in-flight fetches that fail will free their slot again.
+                if len(crawled_pages) + in_flight < max_pages:
+                    entry = frontier.pop()
+                    if entry:
+                        in_flight += 1
+                        return entry
+                if in_flight == 0:
+                    return None
+                await state_changed.wait()
+
+    def _stream_page(page: dict):
+        """Hands a page to `on_page`; a failing callback ends the crawl with its error."""
+        nonlocal stopped_early, callback_error
+        try:
+            satisfied = on_page(page)
+        except Exception as e:
+            print(f"on_page callback failed for {page['url']}: {e}")
+            callback_error = callback_error or e
+            stopped_early = True
+            return
+        if satisfied and not stopped_early:
+            print(f"Stopping crawl of {base_domain} early: all analysis buckets have enough content.")
+            stopped_early = True
 
+    async def _fetch_worker(client: httpx.AsyncClient):
+        nonlocal in_flight
+        while True:
+            entry = await _next_url()
+            if entry is None:
+                return
+            url, depth = entry
+            print(f"Crawling (Depth: {depth}): {url}")
+            accepted = False
             try:
-                response = await client.get(url)
+                with metrics.span("crawler_fetch"):
+                    response = await cached_get(client, url, network_slot=host_limiter.slot(urlparse(url).netloc))
+                metrics.count("http_cache_requests", cache=response.extensions.get("http_cache", "DISABLED"))
                 response.raise_for_status()
-                crawled_pages.append({"url": url, "html": response.text})
-                successfully_crawled_urls.append(url)
-
-                if depth < settings.CRAWLER_MAX_DEPTH:
-                    soup = BeautifulSoup(response.text, "html.parser")
-                    for a_tag in soup.find_all("a", href=True):
-                        link = urljoin(url, a_tag['href'])
-                        if urlparse(link).netloc == base_domain and link not in visited_urls:
-                            queue.append((link, depth + 1))
-            
+                metrics.count("crawler_bytes_fetched", len(response.content))
+
+                follow_links = depth < settings.CRAWLER_MAX_DEPTH
+                with metrics.span("html_parse"):
+                    page = await process_page_async(url, response.text, base_domain if follow_links else None)
+                links = page.pop("links")
+                metrics.count("pages_parsed")
+                metrics.observe("html_parse_cpu_seconds", page.pop("parse_cpu_seconds"))
+                # Lets a refresh tell which pages changed since the last analysis.
+                page["fingerprint"] = hashlib.sha256(response.content).hexdigest()
+
+                async with state_changed:
+                    accepted = len(crawled_pages) < max_pages and not stopped_early
+                    if accepted:
+                        successfully_crawled_urls.append(url)
+                        for link, anchor_text in links:
+                            priority = score_link(link, anchor_text, depth + 1) if best_first else None
+                            frontier.push(link, depth + 1, priority)
+                        # Pages streamed to `on_page` are not kept here as well.
+                        crawled_pages.append(page if on_page is None else {"url": url})
             except Exception as e:
                 print(f"Failed to crawl {url}: {e}")
+            finally:
+                # Outside the lock; waiting workers are woken below, after the callback may have stopped the crawl.
+                if accepted and on_page is not None:
+                    _stream_page(page)
+                async with state_changed:
+                    in_flight -= 1
+                    state_changed.notify_all()
+
+    async with httpx.AsyncClient(timeout=settings.CRAWLER_REQUEST_TIMEOUT, headers=headers, follow_redirects=True) as client:
+        workers = [_fetch_worker(client) for _ in range(max(1, settings.CRAWLER_CONCURRENCY))]
+        await asyncio.gather(*workers)
 
-        return crawled_pages, successfully_crawled_urls
\ No newline at end of file
+    if callback_error is not None:
+        raise callback_error
+    return crawled_pages, successfully_crawled_urls
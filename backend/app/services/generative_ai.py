@@ -1,35 +1,177 @@
 # From: backend/app/services/generative_ai.py
 # ----------------------------------------
-from google import genai
+import asyncio
+import functools
+import hashlib
+import json
+from typing import AsyncIterator
+import httpx
+from pydantic import BaseModel
 from app.core.config import settings
+from app.services.llm_cache import ResponseCache, build_response_cache
+from app.services.metrics import metrics
+from app.services.rate_limiter import AIRateLimiter, Priority, build_rate_limiter, is_retryable_status, retry_delay
+
+
+@functools.cache
+def _default_client():
+    """
+    The shared Gen AI client, created on first use: importing the SDK and
+    building the client take most of this module's import time, which API
+    replicas and workers should not pay before their first AI call.
+    """
+    try:
+        from google import genai
+        # The new library uses a Client object
+        return genai.Client(api_key=settings.GOOGLE_API_KEY)
+    except Exception as e:
+        print(f"Error configuring Google Gen AI Client: {e}")
+        return None
+
+@functools.cache
+def _schema_fingerprint(response_schema: type[BaseModel]) -> str:
+    """Identifies a response schema by its JSON Schema, so changing a model's fields changes it."""
+    schema = json.dumps(response_schema.model_json_schema(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()
 
-# Configure the SDK using the new library's method
-try:
-    # The new library uses a Client object
-    client = genai.Client(api_key=settings.GOOGLE_API_KEY)
-except Exception as e:
-    print(f"Error configuring Google Gen AI Client: {e}")
-    client = None
 
 class GenerativeAIService:
-    def __init__(self, model_name: str = "gemini-1.5-flash"):
-        # The client is already initialized, we just reference the model by name
+    def __init__(
+        self,
+        model_name: str = "gemini-1.5-flash",
+        cache: ResponseCache | None = None,
+        rate_limiter: AIRateLimiter | None = None,
+    ):
+        # The client is created on first use, we just reference the model by name
         self.model_name = model_name
-        self.client = client
+        self._client = None
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = _default_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def preload(self) -> None:
+        """Loads the SDK and creates the client ahead of the first call (e.g. at worker startup)."""
+        from google.genai import types  # noqa: F401
+        self.client
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        return is_retryable_status(getattr(error, "code", None)) or isinstance(error, httpx.TransportError)
 
-    async def generate_text(self, prompt: str) -> str:
+    async def _call_with_retries(self, call, prompt: str, priority: Priority):
+        """
+        Runs an API call under the shared rate limiter, retrying 429s, 5xx
+        responses and transport errors with exponential backoff.
+        """
+        attempt = 0
+        while True:
+            try:
+                if self.rate_limiter:
+                    async with self.rate_limiter.slot(prompt, priority):
+                        result = await call()
+                    self.rate_limiter.record_success()
+                else:
+                    result = await call()
+                return result
+            except Exception as e:
+                if getattr(e, "code", None) == 429:
+                    metrics.count("ai_throttled")
+                    if self.rate_limiter:
+                        self.rate_limiter.record_throttled()
+                attempt += 1
+                if not self._is_retryable(e) or attempt > settings.AI_MAX_RETRIES:
+                    raise
+                metrics.count("ai_retries")
+                delay = retry_delay(attempt)
+                print(f"Retryable AI error ({e}); retry {attempt}/{settings.AI_MAX_RETRIES} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _cache_input(prompt: str, response_schema: type[BaseModel] | None) -> str:
+        # The same prompt with a different response schema, or a changed one, is a different request.
+        if response_schema is None:
+            return prompt
+        return f"{prompt}\0schema:{_schema_fingerprint(response_schema)}"
+
+    async def generate_text(
+        self,
+        prompt: str,
+        use_cache: bool = False,
+        priority: Priority = Priority.BATCH,
+        response_schema: type[BaseModel] | None = None,
+    ) -> str:
+        """
+        Generates text for a prompt. With `use_cache=True` an identical earlier
+        prompt to the same model is answered from the response cache; only
+        successful responses are cached, never error strings. Calls are
+        admitted by the shared rate limiter in `priority` order. Passing a
+        Pydantic `response_schema` asks Gemini for JSON constrained to it.
+        """
         if not self.client:
             return "Error: Generative AI service not configured."
+        cache_input = self._cache_input(prompt, response_schema)
+        schema_name = response_schema.__name__ if response_schema is not None else "text"
+        if use_cache and self.cache:
+            cached = await self.cache.get(self.model_name, cache_input)
+            metrics.count("ai_cache_lookups", result="hit" if cached is not None else "miss")
+            if cached is not None:
+                return cached
+        config = None
+        if response_schema is not None:
+            from google.genai import types
+            config = types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=response_schema,
+            )
         try:
+            metrics.observe("ai_prompt_chars", len(prompt), schema=schema_name)
             # The new library uses client.models.generate_content
-            response = await self.client.aio.models.generate_content(
-                model=self.model_name,
-                contents=prompt
-            )
+            with metrics.span("ai_call", schema=schema_name):
+                response = await self._call_with_retries(
+                    lambda: self.client.aio.models.generate_content(model=self.model_name, contents=prompt, config=config),
+                    prompt,
+                    priority,
+                )
+            metrics.observe("ai_response_chars", len(response.text or ""), schema=schema_name)
+            if use_cache and self.cache and response.text:
+                await self.cache.set(self.model_name, cache_input, response.text)
             return response.text
         except Exception as e:
+            metrics.count("ai_errors", schema=schema_name)
             print(f"Error during text generation: {e}")
             return f"Error: Could not generate content. Details: {e}"
 
+    async def stream_text(self, prompt: str, priority: Priority = Priority.INTERACTIVE) -> AsyncIterator[str]:
+        """
+        Yields the response text chunk by chunk as the model produces it.
+        Unlike generate_text, failures are raised so a streaming caller can
+        tell its client that the stream ended early. Only opening the stream
+        is retried; a stream that fails midway is not restarted.
+        """
+        if not self.client:
+            raise RuntimeError("Generative AI service not configured.")
+        stream = await self._call_with_retries(
+            lambda: self.client.aio.models.generate_content_stream(model=self.model_name, contents=prompt),
+            prompt,
+            priority,
+        )
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+
+    async def invalidate_cached(self, prompt: str, response_schema: type[BaseModel] | None = None) -> None:
+        """Removes a cached response, so an unusable answer is not served again."""
+        if self.cache:
+            await self.cache.invalidate(self.model_name, self._cache_input(prompt, response_schema))
+
 # Singleton instance for use across the application
-ai_service = GenerativeAIService()
\ No newline at end of file
+ai_service = GenerativeAIService(cache=build_response_cache(), rate_limiter=build_rate_limiter())
\ No newline at end of file
@@ -0,0 +1,212 @@
+# From: backend/app/services/growth_cache.py
+# ----------------------------------------
+"""
+Company-level cache for third-party growth data.
+
+The growth text extracted for a company is cached under its normalized
+slug for GROWTH_CACHE_TTL_SECONDS, so leads for the same company (e.g.
+submitted under several URLs) share one set of source fetches. Concurrent
+misses for a slug are collapsed into a single fetch: within a process by
+sharing the in-flight task, and across workers by a Redis lock that the
+fetching worker holds while the others wait for its result.
+
+Each source also gets a negative-cache entry whenever it gives no text:
+for a 404 (GROWTH_NOT_FOUND_TTL_SECONDS), when it blocks the request
+(GROWTH_BLOCKED_TTL_SECONDS) or for any other failure
+(GROWTH_FAILED_TTL_SECONDS), so it is skipped for that company until the
+entry expires. The entries are written while the fetch still holds the
+lock, so when the fetching worker found nothing, the workers that waited
+for it skip every source instead of fetching them all again. Cache and
+lock errors are logged and never fail a lead.
+"""
+import asyncio
+import re
+import secrets
+import time
+import weakref
+from typing import Awaitable, Callable
+from app.core.config import settings
+from app.services.llm_cache import MemoryCacheBackend, RedisCacheBackend, SQLiteCacheBackend
+from app.services.metrics import metrics
+
+KEY_PREFIX = "growth-cache:v1:"
+NOT_FOUND = "not_found"
+BLOCKED = "blocked"
+FAILED = "failed"
+# How often a waiting worker checks for the fetching worker's result.
+LOCK_POLL_SECONDS = 0.5
+
+# Deletes the lock only if this worker still holds it.
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def company_slug(company_name: str) -> str:
+    """The normalized company name used in source URLs and cache keys."""
+    return re.sub(r"\s+", "-", company_name.strip().lower()).replace(".", "")
+
+
+def negative_status(status_code: int) -> str:
+    """The negative-cache status for a source's HTTP error."""
+    if status_code in (404, 410):
+        return NOT_FOUND
+    if status_code in (401, 403, 429, 999):
+        return BLOCKED
+    return FAILED
+
+
+class GrowthDataCache:
+    def __init__(self, backend, ttl: int, not_found_ttl: int, blocked_ttl: int, failed_ttl: int, redis_url: str | None = None):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttls = {NOT_FOUND: not_found_ttl, BLOCKED: blocked_ttl, FAILED: failed_ttl}
+        # Cross-worker single-flight is only possible when the cache itself is shared.
+        self.redis_url = redis_url
+        self._clients = weakref.WeakKeyDictionary()
+        self._in_flight = weakref.WeakKeyDictionary()
+
+    def _redis(self):
+        from redis import asyncio as redis_asyncio
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            client = redis_asyncio.Redis.from_url(self.redis_url)
+            self._clients[loop] = (client, client.register_script(_RELEASE_SCRIPT))
+        return self._clients[loop]
+
+    async def _get(self, key: str) -> str | None:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            print(f"Growth data cache lookup failed: {e}")
+            return None
+
+    async def _set(self, key: str, value: str, ttl: int) -> None:
+        try:
+            await self.backend.set(key, value, ttl)
+        except Exception as e:
+            print(f"Growth data cache write failed: {e}")
+
+    async def get(self, slug: str) -> str | None:
+        return await self._get(f"{KEY_PREFIX}company:{slug}")
+
+    async def set(self, slug: str, text: str) -> None:
+        await self._set(f"{KEY_PREFIX}company:{slug}", text, self.ttl)
+
+    async def source_status(self, source: str, slug: str) -> str | None:
+        """NOT_FOUND, BLOCKED or FAILED while a source's negative entry for the company is live."""
+        return await self._get(f"{KEY_PREFIX}source:{source}:{slug}")
+
+    async def mark_source(self, source: str, slug: str, status: str) -> None:
+        await self._set(f"{KEY_PREFIX}source:{source}:{slug}", status, self.negative_ttls[status])
+
+    async def _acquire_lock(self, slug: str) -> tuple[bool, str | None]:
+        """
+        Claims the cross-worker fetch of a company. Returns (acquired, token);
+        without Redis, or when Redis fails, the fetch goes ahead unlocked.
+        """
+        if not self.redis_url:
+            return True, None
+        token = secrets.token_hex(8)
+        try:
+            client, _ = self._redis()
+            acquired = await client.set(f"{KEY_PREFIX}lock:{slug}", token, nx=True, ex=settings.GROWTH_FETCH_LOCK_SECONDS)
+        except Exception as e:
+            print(f"Growth data fetch lock unavailable, fetching without it: {e}")
+            return True, None
+        return bool(acquired), token
+
+    async def _release_lock(self, slug: str, token: str) -> None:
+        try:
+            _, release = self._redis()
+            await release(keys=[f"{KEY_PREFIX}lock:{slug}"], args=[token])
+        except Exception as e:
+            print(f"Growth data fetch lock release failed: {e}")
+
+    async def _wait_for_other_worker(self, slug: str) -> str | None:
+        """Waits for the lock holder's result; None if it released without one or took too long."""
+        deadline = time.monotonic() + settings.GROWTH_FETCH_WAIT_SECONDS
+        client, _ = self._redis()
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+            cached = await self.get(slug)
+            if cached is not None:
+                return cached
+            try:
+                if not await client.exists(f"{KEY_PREFIX}lock:{slug}"):
+                    return None
+            except Exception:
+                return None
+        return None
+
+    async def _fetch_once(self, slug: str, fetch: Callable[[], Awaitable[str]]) -> str:
+        acquired, token = await self._acquire_lock(slug)
+        if not acquired:
+            cached = await self._wait_for_other_worker(slug)
+            if cached is not None:
+                metrics.count("growth_cache_lookups", result="waited")
+                return cached
+            # The other worker found nothing or stalled; the sources it marked as giving no text are skipped below.
+        metrics.count("growth_cache_lookups", result="miss")
+        try:
+            text = await fetch()
+            if text:
+                await self.set(slug, text)
+            return text
+        finally:
+            if acquired and token:
+                await self._release_lock(slug, token)
+
+    async def single_flight(self, slug: str, fetch: Callable[[], Awaitable[str]]) -> str:
+        """
+        Returns the cached growth text for `slug`, or runs `fetch` to produce
+        it. Only non-empty results are cached. Concurrent callers for the
+        same slug share one call to `fetch`.
+        """
+        cached = await self.get(slug)
+        if cached is not None:
+            metrics.count("growth_cache_lookups", result="hit")
+            return cached
+
+        in_flight = self._in_flight.setdefault(asyncio.get_running_loop(), {})
+        task = in_flight.get(slug)
+        if task is not None:
+            metrics.count("growth_cache_lookups", result="shared")
+        else:
+            task = asyncio.ensure_future(self._fetch_once(slug, fetch))
+            in_flight[slug] = task
+            task.add_done_callback(lambda _: in_flight.pop(slug, None))
+        # Shielded so one caller being cancelled doesn't cancel the fetch for the others.
+        return await asyncio.shield(task)
+
+
+def build_growth_cache() -> GrowthDataCache | None:
+    """Creates the cache configured by GROWTH_CACHE_BACKEND, or None when caching is off."""
+    backend_name = settings.GROWTH_CACHE_BACKEND
+    max_entries = settings.GROWTH_CACHE_MAX_ENTRIES
+    redis_url = None
+    if backend_name == "memory":
+        backend = MemoryCacheBackend(max_entries)
+    elif backend_name == "redis":
+        backend = RedisCacheBackend(settings.REDIS_URL, max_entries, key_prefix=KEY_PREFIX)
+        redis_url = settings.REDIS_URL
+    elif backend_name == "sqlite":
+        backend = SQLiteCacheBackend(settings.GROWTH_CACHE_SQLITE_PATH, max_entries)
+    elif backend_name == "none":
+        return None
+    else:
+        raise ValueError(f"Unknown GROWTH_CACHE_BACKEND: {backend_name!r}")
+    return GrowthDataCache(
+        backend,
+        ttl=settings.GROWTH_CACHE_TTL_SECONDS,
+        not_found_ttl=settings.GROWTH_NOT_FOUND_TTL_SECONDS,
+        blocked_ttl=settings.GROWTH_BLOCKED_TTL_SECONDS,
+        failed_ttl=settings.GROWTH_FAILED_TTL_SECONDS,
+        redis_url=redis_url,
+    )
+
+
+growth_cache = build_growth_cache()
@@ -0,0 +1,221 @@
+# From: backend/app/services/html_processing.py
+# ----------------------------------------
+"""
+Single-pass HTML processing.
+
+Each crawled document is parsed exactly once, and only the compact result
+(links and cleaned text segments) is kept; the raw HTML is dropped.
+The parser backend is chosen by HTML_PARSER_BACKEND: selectolax is the
+fastest, then BeautifulSoup with lxml, then BeautifulSoup's built-in
+html.parser, which is always available. Backends are imported on first
+use, so a worker doesn't load them until it parses its first page.
+
+Parsing is CPU-bound, so the async entry points (`process_page_async`,
+`extract_visible_text_async`) hand it to a bounded worker pool sized by
+HTML_PARSER_POOL_SIZE. The event loop keeps driving fetches and AI calls
+while pages are being parsed.
+"""
+import asyncio
+import atexit
+import functools
+import importlib.util
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urljoin, urlparse
+from app.core.config import settings
+
+# --- Extraction Rules ---
+CONTENT_TAGS = ["p", "h1", "h2", "h3", "h4", "li", "span", "td"]
+BOILERPLATE_TAGS = ["script", "style", "nav", "footer", "header"]
+INTRO_PARAGRAPH_LIMIT = 30
+SKIPPED_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".zip", ".mp4", ".mp3", ".css", ".js", ".xml")
+
+
+@functools.cache
+def _selectolax_parser():
+    """selectolax's fastest parser class, or None when it is not installed."""
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborHTMLParser
+    except ImportError:
+        try:
+            from selectolax.parser import HTMLParser
+            return HTMLParser
+        except ImportError:
+            return None
+
+
+@functools.cache
+def _lxml_available() -> bool:
+    # Only needed as a BeautifulSoup tree builder, so finding it is enough.
+    return importlib.util.find_spec("lxml") is not None
+
+
+def resolve_parser_backend() -> str:
+    """Returns the backend that will actually be used, honouring what is installed."""
+    requested = settings.HTML_PARSER_BACKEND
+    if requested in ("auto", "selectolax") and _selectolax_parser() is not None:
+        return "selectolax"
+    if requested in ("auto", "selectolax", "lxml") and _lxml_available():
+        return "lxml"
+    return "html.parser"
+
+
+def load_parser_backend() -> str:
+    """Imports the parser backend ahead of the first page (e.g. at worker startup) and returns its name."""
+    backend = resolve_parser_backend()
+    if backend != "selectolax":
+        import bs4  # noqa: F401
+    return backend
+
+
+def _same_domain_link(page_url: str, href: str, base_domain: str) -> str | None:
+    link = urljoin(page_url, href)
+    parsed = urlparse(link)
+    if parsed.netloc != base_domain or parsed.path.lower().endswith(SKIPPED_EXTENSIONS):
+        return None
+    return link
+
+
+def _process_with_selectolax(url: str, html: str, base_domain: str | None) -> dict:
+    tree = _selectolax_parser()(html)
+
+    links = []
+    if base_domain is not None:
+        for a_tag in tree.css("a[href]"):
+            link = _same_domain_link(url, a_tag.attributes.get("href") or "", base_domain)
+            if link:
+                links.append((link, a_tag.text(separator=" ", strip=True)))
+
+    paragraphs = tree.css("p")[:INTRO_PARAGRAPH_LIMIT]
+    intro_text = " ".join(p.text(strip=True) for p in paragraphs)
+
+    content_area = tree.css_first("main") or tree.css_first("article") or tree.body
+    content_segments = []
+    if content_area is not None:
+        content_segments = [tag.text(strip=True) for tag in content_area.css(", ".join(CONTENT_TAGS))]
+
+    return {"url": url, "links": links, "intro_text": intro_text, "content_segments": content_segments}
+
+
+def _process_with_soup(url: str, html: str, base_domain: str | None, parser: str) -> dict:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, parser)
+
+    links = []
+    if base_domain is not None:
+        for a_tag in soup.find_all("a", href=True):
+            link = _same_domain_link(url, a_tag["href"], base_domain)
+            if link:
+                links.append((link, a_tag.get_text(" ", strip=True)))
+
+    intro_text = " ".join(p.get_text(strip=True) for p in soup.find_all("p", limit=INTRO_PARAGRAPH_LIMIT))
+
+    content_area = soup.find("main") or soup.find("article") or soup.body
+    content_segments = []
+    if content_area is not None:
+        content_segments = [tag.get_text(strip=True) for tag in content_area.find_all(CONTENT_TAGS)]
+
+    return {"url": url, "links": links, "intro_text": intro_text, "content_segments": content_segments}
+
+
+def process_page(url: str, html: str, base_domain: str | None = None) -> dict:
+    """
+    Parses a crawled page once and returns its compact extracted form:
+    - "links": (url, anchor text) pairs for same-domain links, only when
+      `base_domain` is given.
+    - "intro_text": the first paragraphs of the page (used for the homepage overview).
+    - "content_segments": the text of each content tag in the main/article
+      area, or the body as a fallback, kept separate so repeated boilerplate
+      can be recognised across pages.
+    - "parse_cpu_seconds": CPU time spent parsing, for instrumentation.
+    """
+    started = time.thread_time()
+    backend = resolve_parser_backend()
+    if backend == "selectolax":
+        page = _process_with_selectolax(url, html, base_domain)
+    else:
+        page = _process_with_soup(url, html, base_domain, backend)
+    page["parse_cpu_seconds"] = time.thread_time() - started
+    return page
+
+
+def extract_visible_text(html: str) -> str:
+    """Returns the page text with scripts, styles and navigation chrome removed."""
+    backend = resolve_parser_backend()
+    if backend == "selectolax":
+        tree = _selectolax_parser()(html)
+        tree.strip_tags(BOILERPLATE_TAGS)
+        return tree.root.text(separator=" ", strip=True) if tree.root else ""
+
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, backend)
+    for element in soup(BOILERPLATE_TAGS):
+        element.decompose()
+    return soup.get_text(separator=' ', strip=True)
+
+
+# --- Parser Pool ---
+_parser_pool: Executor | None = None
+_parser_pool_slots: asyncio.Semaphore | None = None
+_parser_pool_slots_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_parser_pool() -> Executor | None:
+    """
+    Lazily creates the shared parser pool. Returns None when pooling is
+    disabled (HTML_PARSER_POOL_SIZE=0), in which case parsing runs inline.
+    Celery's prefork children are daemonic and cannot start processes of
+    their own, so a thread pool is used there instead of a process pool.
+    """
+    global _parser_pool
+    if settings.HTML_PARSER_POOL_SIZE <= 0:
+        return None
+    if _parser_pool is None:
+        use_processes = settings.HTML_PARSER_POOL_KIND == "process" and not multiprocessing.current_process().daemon
+        if use_processes:
+            _parser_pool = ProcessPoolExecutor(max_workers=settings.HTML_PARSER_POOL_SIZE)
+        else:
+            _parser_pool = ThreadPoolExecutor(max_workers=settings.HTML_PARSER_POOL_SIZE, thread_name_prefix="html-parser")
+        atexit.register(shutdown_parser_pool)
+    return _parser_pool
+
+
+def _get_pool_slots() -> asyncio.Semaphore:
+    """
+    Bounds how many documents can be queued for the pool at once, so a fast
+    crawl cannot pile up raw HTML in memory faster than it is parsed.
+    """
+    global _parser_pool_slots, _parser_pool_slots_loop
+    loop = asyncio.get_running_loop()
+    if _parser_pool_slots is None or _parser_pool_slots_loop is not loop:
+        _parser_pool_slots = asyncio.Semaphore(settings.HTML_PARSER_POOL_SIZE * 2)
+        _parser_pool_slots_loop = loop
+    return _parser_pool_slots
+
+
+async def _run_in_parser_pool(func, *args):
+    pool = _get_parser_pool()
+    if pool is None:
+        return func(*args)
+    async with _get_pool_slots():
+        return await asyncio.get_running_loop().run_in_executor(pool, partial(func, *args))
+
+
+async def process_page_async(url: str, html: str, base_domain: str | None = None) -> dict:
+    """Runs `process_page` in the parser pool."""
+    return await _run_in_parser_pool(process_page, url, html, base_domain)
+
+
+async def extract_visible_text_async(html: str) -> str:
+    """Runs `extract_visible_text` in the parser pool."""
+    return await _run_in_parser_pool(extract_visible_text, html)
+
+
+def shutdown_parser_pool():
+    global _parser_pool
+    if _parser_pool is not None:
+        _parser_pool.shutdown(wait=False, cancel_futures=True)
+        _parser_pool = None
@@ -0,0 +1,210 @@
+# From: backend/app/services/http_cache.py
+# ----------------------------------------
+"""
+Persistent HTTP cache shared by the crawler and the third-party fetcher.
+
+Successful responses are stored in a local SQLite file with zlib-compressed
+bodies and their ETag/Last-Modified validators. A fresh entry (per
+Cache-Control max-age or Expires, or HTTP_CACHE_DEFAULT_TTL_SECONDS when
+the server gives no hint) is served without touching the network; a stale
+one is revalidated with If-None-Match/If-Modified-Since, so an unchanged
+page costs a 304 instead of a full download. The file is capped at
+HTTP_CACHE_MAX_BYTES of compressed bodies, evicting least recently used
+entries first. The total size is kept in a one-row table that triggers
+update in the same transaction as each write, so checking it is O(1) and
+stays right when several worker processes share the file.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import AbstractAsyncContextManager, nullcontext
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+import httpx
+from app.core.config import settings
+
+# Response headers kept with a cached body so the rebuilt response behaves like the original.
+STORED_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "expires")
+# Entries deleted per query while evicting.
+EVICTION_BATCH = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY, headers TEXT NOT NULL, body BLOB NOT NULL, size INTEGER NOT NULL,
+    fresh_until REAL NOT NULL, accessed_at REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL);
+CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses
+    BEGIN UPDATE cache_size SET total = total + NEW.size WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses
+    BEGIN UPDATE cache_size SET total = total + NEW.size - OLD.size WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses
+    BEGIN UPDATE cache_size SET total = total - OLD.size WHERE id = 0; END;
+-- Counts what a cache file from before the counter already holds; a no-op afterwards.
+INSERT OR IGNORE INTO cache_size (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM responses;
+"""
+
+
+def _freshness_lifetime(headers: httpx.Headers, default_ttl: int) -> float | None:
+    """Seconds a response may be served without revalidation, or None if it must not be stored."""
+    cache_control = {
+        directive.strip().split("=", 1)[0].lower(): directive.strip().split("=", 1)[-1]
+        for directive in headers.get("cache-control", "").split(",") if directive.strip()
+    }
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    for directive in ("s-maxage", "max-age"):
+        if directive in cache_control:
+            try:
+                return max(0, int(cache_control[directive].strip('"')))
+            except ValueError:
+                pass
+    if "expires" in headers:
+        try:
+            return max(0.0, parsedate_to_datetime(headers["expires"]).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0
+    return default_ttl
+
+
+class HTTPCache:
+    """An on-disk, size-capped, LRU HTTP cache keyed by request URL."""
+    def __init__(self, path: str, max_bytes: int, default_ttl: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # The schema and the size counter are created in one transaction.
+            self._conn.executescript(f"BEGIN IMMEDIATE;{_SCHEMA}COMMIT;")
+        return self._conn
+
+    def _load(self, url: str) -> tuple[httpx.Headers, bytes, float] | None:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT headers, body, fresh_until FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            conn.commit()
+        raw_headers, body, fresh_until = row
+        headers = httpx.Headers([tuple(line.split(": ", 1)) for line in raw_headers.splitlines() if ": " in line])
+        return headers, zlib.decompress(body), fresh_until
+
+    def _store(self, url: str, headers: httpx.Headers, body: bytes, fresh_until: float):
+        kept = "\n".join(f"{name}: {headers[name]}" for name in STORED_HEADERS if name in headers)
+        compressed = zlib.compress(body, 6)
+        with self._lock:
+            conn = self._connection()
+            # An upsert rather than INSERT OR REPLACE: REPLACE deletes without firing the size trigger.
+            conn.execute(
+                "INSERT INTO responses (url, headers, body, size, fresh_until, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET headers = excluded.headers, "
+                "body = excluded.body, size = excluded.size, fresh_until = excluded.fresh_until, "
+                "accessed_at = excluded.accessed_at",
+                (url, kept, compressed, len(compressed), fresh_until, time.time()),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _touch(self, url: str, fresh_until: float):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("UPDATE responses SET fresh_until = ?, accessed_at = ? WHERE url = ?", (fresh_until, time.time(), url))
+            conn.commit()
+
+    def _total_size(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT total FROM cache_size WHERE id = 0").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = self._total_size(conn)
+        while total > self.max_bytes:
+            oldest = conn.execute(
+                "SELECT url, size FROM responses ORDER BY accessed_at ASC LIMIT ?", (EVICTION_BATCH,)
+            ).fetchall()
+            if not oldest:
+                break
+            for url, size in oldest:
+                conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    @staticmethod
+    def _build_response(url: str, headers: httpx.Headers, body: bytes, cache_status: str) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers=headers,
+            content=body,
+            request=httpx.Request("GET", url),
+            extensions={"http_cache": cache_status},
+        )
+
+    async def get(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        network_slot: AbstractAsyncContextManager | None = None,
+    ) -> httpx.Response:
+        """
+        Fetches `url` through the cache. `network_slot` is entered only around
+        an actual network request, so cache hits skip per-host rate limits.
+        The returned response carries `extensions["http_cache"]`: "HIT"
+        (served locally), "REVALIDATED" (304 from the server, body served
+        locally) or "MISS".
+        """
+        cached = await asyncio.to_thread(self._load, url)
+        request_headers = {}
+        if cached:
+            headers, body, fresh_until = cached
+            if fresh_until > time.time():
+                return self._build_response(url, headers, body, "HIT")
+            if "etag" in headers:
+                request_headers["If-None-Match"] = headers["etag"]
+            if "last-modified" in headers:
+                request_headers["If-Modified-Since"] = headers["last-modified"]
+
+        async with network_slot or nullcontext():
+            response = await client.get(url, headers=request_headers)
+
+        if cached and response.status_code == 304:
+            headers, body, _ = cached
+            lifetime = _freshness_lifetime(response.headers, self.default_ttl) or 0
+            await asyncio.to_thread(self._touch, url, time.time() + lifetime)
+            return self._build_response(url, headers, body, "REVALIDATED")
+
+        if response.status_code == 200:
+            lifetime = _freshness_lifetime(response.headers, self.default_ttl)
+            if lifetime is not None:
+                await asyncio.to_thread(self._store, url, response.headers, response.content, time.time() + lifetime)
+        response.extensions = {**response.extensions, "http_cache": "MISS"}
+        return response
+
+
+http_cache = HTTPCache(
+    settings.HTTP_CACHE_PATH,
+    max_bytes=settings.HTTP_CACHE_MAX_BYTES,
+    default_ttl=settings.HTTP_CACHE_DEFAULT_TTL_SECONDS,
+) if settings.HTTP_CACHE_ENABLED else None
+
+
+async def cached_get(
+    client: httpx.AsyncClient,
+    url: str,
+    network_slot: AbstractAsyncContextManager | None = None,
+) -> httpx.Response:
+    """GETs a URL through the shared HTTP cache, or directly when caching is disabled."""
+    if http_cache is None:
+        async with network_slot or nullcontext():
+            return await client.get(url)
+    return await http_cache.get(client, url, network_slot)
@@ -0,0 +1,188 @@
+# From: backend/app/services/lead_events.py
+# ----------------------------------------
+"""
+Lead status and progress events over Redis pub/sub.
+
+The worker publishes each lead's status transitions and pipeline progress
+(pages crawled, analysis sections finished) to a per-lead channel, and
+appends them to a short per-lead log so a subscriber that connects late,
+or reconnects with Last-Event-ID, can replay what it missed. Every event
+carries a per-lead sequence number that is used as the SSE event ID.
+Publishing is best-effort: a Redis outage is logged and never fails the
+pipeline.
+"""
+import asyncio
+import json
+import time
+import weakref
+from typing import AsyncIterator
+from app.core.config import settings
+
+KEY_PREFIX = "lead-events:v1:"
+# Statuses after which no more events are published for a run.
+TERMINAL_STATUSES = ("COMPLETED", "FAILED")
+
+
+def _channel(lead_id: int) -> str:
+    return f"{KEY_PREFIX}{lead_id}"
+
+def _log_key(lead_id: int) -> str:
+    return f"{KEY_PREFIX}{lead_id}:log"
+
+def _seq_key(lead_id: int) -> str:
+    return f"{KEY_PREFIX}{lead_id}:seq"
+
+
+def is_terminal(event: dict) -> bool:
+    return event["event"] == "status" and event["data"].get("status") in TERMINAL_STATUSES
+
+
+class LeadEventBus:
+    """Publishes lead events and streams them back, with a bounded replay log per lead."""
+    def __init__(self, redis_url: str, replay_size: int, ttl: int):
+        self.redis_url = redis_url
+        self.replay_size = replay_size
+        self.ttl = ttl
+        self._sync_client = None
+        self._clients = weakref.WeakKeyDictionary()
+        self.failures = 0
+
+    def _sync_redis(self):
+        if self._sync_client is None:
+            import redis
+            self._sync_client = redis.Redis.from_url(self.redis_url)
+        return self._sync_client
+
+    def _async_redis(self):
+        from redis import asyncio as redis_asyncio
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            self._clients[loop] = redis_asyncio.Redis.from_url(self.redis_url)
+        return self._clients[loop]
+
+    def _encode(self, lead_id: int, seq: int, event: str, data: dict) -> str:
+        return json.dumps({"seq": seq, "lead_id": lead_id, "event": event, "data": data, "ts": time.time()})
+
+    def _report_failure(self, e: Exception):
+        self.failures += 1
+        if self.failures == 1:
+            print(f"Lead events could not reach Redis; status updates will not be pushed: {e}")
+
+    def publish(self, lead_id: int, event: str, data: dict) -> None:
+        """Publishes from synchronous code, e.g. a Celery task thread."""
+        try:
+            redis = self._sync_redis()
+            seq = redis.incr(_seq_key(lead_id))
+            message = self._encode(lead_id, seq, event, data)
+            with redis.pipeline(transaction=False) as pipe:
+                pipe.rpush(_log_key(lead_id), message)
+                pipe.ltrim(_log_key(lead_id), -self.replay_size, -1)
+                pipe.expire(_log_key(lead_id), self.ttl)
+                pipe.expire(_seq_key(lead_id), self.ttl)
+                pipe.publish(_channel(lead_id), message)
+                pipe.execute()
+        except Exception as e:
+            self._report_failure(e)
+
+    def start_run(self, lead_id: int) -> None:
+        """
+        Clears the replay log when a new pipeline run is queued or starts, so
+        subscribers don't replay the last run's end.
+        """
+        try:
+            self._sync_redis().delete(_log_key(lead_id))
+        except Exception as e:
+            self._report_failure(e)
+
+    async def publish_async(self, lead_id: int, event: str, data: dict) -> None:
+        """Publishes from a coroutine without blocking the event loop."""
+        try:
+            redis = self._async_redis()
+            seq = await redis.incr(_seq_key(lead_id))
+            message = self._encode(lead_id, seq, event, data)
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.rpush(_log_key(lead_id), message)
+                pipe.ltrim(_log_key(lead_id), -self.replay_size, -1)
+                pipe.expire(_log_key(lead_id), self.ttl)
+                pipe.expire(_seq_key(lead_id), self.ttl)
+                pipe.publish(_channel(lead_id), message)
+                await pipe.execute()
+        except Exception as e:
+            self._report_failure(e)
+
+    async def subscribe(self, lead_id: int, after_seq: int = 0, heartbeat: float | None = None) -> AsyncIterator[dict | None]:
+        """
+        Yields the lead's events with a sequence number above `after_seq`:
+        first those still in the replay log, then live ones. Subscribes
+        before reading the log so nothing published in between is lost.
+        Yields None every `heartbeat` seconds without events, and stops
+        after a terminal status event.
+        """
+        redis = self._async_redis()
+        pubsub = redis.pubsub()
+        await pubsub.subscribe(_channel(lead_id))
+        try:
+            last_seq = after_seq
+            for raw in await redis.lrange(_log_key(lead_id), 0, -1):
+                event = json.loads(raw)
+                if event["seq"] > last_seq:
+                    last_seq = event["seq"]
+                    yield event
+                    if is_terminal(event):
+                        return
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+                if message is None:
+                    yield None
+                    continue
+                event = json.loads(message["data"])
+                if event["seq"] <= last_seq:
+                    continue
+                last_seq = event["seq"]
+                yield event
+                if is_terminal(event):
+                    return
+        finally:
+            await pubsub.unsubscribe(_channel(lead_id))
+            await pubsub.aclose()
+
+
+class PipelineEvents:
+    """
+    Ordered, non-blocking event emission for one lead pipeline. `emit` can be
+    called from synchronous callbacks running on the event loop (such as the
+    crawler's `on_page`); a single drain task publishes in emission order.
+    """
+    def __init__(self, bus: LeadEventBus | None, lead_id: int):
+        self.bus = bus
+        self.lead_id = lead_id
+        self._queue: asyncio.Queue | None = None
+        self._drain_task: asyncio.Task | None = None
+
+    def emit(self, event: str, data: dict) -> None:
+        if self.bus is None:
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._drain_task = asyncio.get_running_loop().create_task(self._drain())
+        self._queue.put_nowait((event, data))
+
+    async def _drain(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            await self.bus.publish_async(self.lead_id, *item)
+
+    async def aclose(self) -> None:
+        """Waits until every emitted event has been published."""
+        if self._drain_task is not None:
+            self._queue.put_nowait(None)
+            await self._drain_task
+
+
+lead_events = LeadEventBus(
+    settings.REDIS_URL,
+    replay_size=settings.LEAD_EVENTS_REPLAY_SIZE,
+    ttl=settings.LEAD_EVENTS_TTL_SECONDS,
+) if settings.LEAD_EVENTS_ENABLED else None
@@ -0,0 +1,253 @@
+# From: backend/app/services/llm_cache.py
+# ----------------------------------------
+"""
+Content-addressed cache for Generative AI responses.
+
+Responses are keyed on the model name plus a SHA-256 hash of the prompt, so
+re-analysing a lead whose input text is byte-identical to an earlier run is
+served locally instead of paying for another Gemini round-trip.
+Entries expire after AI_CACHE_TTL_SECONDS and the least recently used
+entries are evicted beyond AI_CACHE_MAX_ENTRIES. The storage backend is
+chosen by AI_CACHE_BACKEND: "memory" (in-process LRU), "redis" (shared by
+all workers), "sqlite" (a local file) or "none".
+"""
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from app.core.config import settings
+
+KEY_PREFIX = "llm-cache:v1:"
+
+
+def make_cache_key(model_name: str, prompt: str) -> str:
+    digest = hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}{model_name}:{digest}"
+
+
+class MemoryCacheBackend:
+    """In-process LRU with per-entry expiry. Not shared between worker processes."""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: str, ttl: int) -> int:
+        """Stores a value and returns how many entries were evicted to make room."""
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisCacheBackend:
+    """
+    Shared cache in Redis. Redis expires entries itself; a sorted set of
+    last-access times is used to evict the least recently used entries
+    once the cache grows beyond `max_entries`. Caches sharing a Redis keep
+    separate indexes by passing their own `key_prefix`.
+    """
+    def __init__(self, redis_url: str, max_entries: int, key_prefix: str = KEY_PREFIX):
+        self.redis_url = redis_url
+        self.max_entries = max_entries
+        self.index_key = f"{key_prefix}index"
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        # redis.asyncio connections belong to the event loop that opened them.
+        from redis import asyncio as redis_asyncio
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            self._clients[loop] = redis_asyncio.Redis.from_url(self.redis_url)
+        return self._clients[loop]
+
+    async def get(self, key: str) -> str | None:
+        redis = self._client()
+        value = await redis.get(key)
+        if value is None:
+            return None
+        await redis.zadd(self.index_key, {key: time.time()})
+        return value.decode("utf-8")
+
+    async def set(self, key: str, value: str, ttl: int) -> int:
+        redis = self._client()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.set(key, value, ex=ttl)
+            pipe.zadd(self.index_key, {key: time.time()})
+            pipe.zcard(self.index_key)
+            results = await pipe.execute()
+        overflow = results[-1] - self.max_entries
+        if overflow <= 0:
+            return 0
+        oldest = await redis.zpopmin(self.index_key, overflow)
+        if oldest:
+            await redis.delete(*[member for member, _ in oldest])
+        return len(oldest)
+
+    async def delete(self, key: str) -> None:
+        redis = self._client()
+        await redis.delete(key)
+        await redis.zrem(self.index_key, key)
+
+
+class SQLiteCacheBackend:
+    """A local, file-backed cache that survives worker restarts."""
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def _get(self, key: str) -> str | None:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if row[1] < now:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return row[0]
+
+    def _set(self, key: str, value: str, ttl: int) -> int:
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            evicted = conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,)).rowcount
+            evicted += conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            conn.commit()
+            return evicted
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            conn.commit()
+
+    async def get(self, key: str) -> str | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, ttl: int) -> int:
+        return await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+
+class ResponseCache:
+    """
+    Wraps a cache backend with hit/miss counters. Backend errors are logged
+    and treated as misses, so a cache outage never fails an AI call.
+    """
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    async def get(self, model_name: str, prompt: str) -> str | None:
+        try:
+            value = await self.backend.get(make_cache_key(model_name, prompt))
+        except Exception as e:
+            self.errors += 1
+            print(f"AI response cache lookup failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, model_name: str, prompt: str, value: str) -> None:
+        try:
+            self.evictions += await self.backend.set(make_cache_key(model_name, prompt), value, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            print(f"AI response cache write failed: {e}")
+
+    async def invalidate(self, model_name: str, prompt: str) -> None:
+        """Drops an entry, e.g. a response that turned out to be unusable."""
+        try:
+            await self.backend.delete(make_cache_key(model_name, prompt))
+        except Exception as e:
+            self.errors += 1
+            print(f"AI response cache invalidation failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+
+def build_response_cache() -> ResponseCache | None:
+    """Creates the cache configured by AI_CACHE_BACKEND, or None when caching is off."""
+    backend_name = settings.AI_CACHE_BACKEND
+    max_entries = settings.AI_CACHE_MAX_ENTRIES
+    if backend_name == "memory":
+        backend = MemoryCacheBackend(max_entries)
+    elif backend_name == "redis":
+        backend = RedisCacheBackend(settings.REDIS_URL, max_entries)
+    elif backend_name == "sqlite":
+        backend = SQLiteCacheBackend(settings.AI_CACHE_SQLITE_PATH, max_entries)
+    elif backend_name == "none":
+        return None
+    else:
+        raise ValueError(f"Unknown AI_CACHE_BACKEND: {backend_name!r}")
+    return ResponseCache(backend, ttl=settings.AI_CACHE_TTL_SECONDS)
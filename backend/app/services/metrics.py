@@ -0,0 +1,163 @@
+# From: backend/app/services/metrics.py
+# ----------------------------------------
+"""
+Instrumentation for the lead pipeline and the API.
+
+Code on the hot path records through the module-level `metrics` object:
+
+    with metrics.span("pipeline_stage", stage="crawl"):
+        ...
+    metrics.count("crawler_bytes_fetched", len(body))
+    metrics.observe("ai_prompt_chars", len(prompt), schema="OverviewSection")
+
+`span` records the block's wall time in a `<name>_seconds` histogram,
+`count` adds to a `<name>_total` counter and `observe` records a value in a
+histogram. METRICS_EXPORTER picks where they go: "prometheus" (served on
+the API's /metrics), "otel" (the OpenTelemetry metrics and tracing API),
+"log" (one structured log line per measurement) or "none". With "none",
+`metrics` is a no-op object whose methods return immediately, so the
+instrumentation costs a method call.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from app.core.config import settings
+
+logger = logging.getLogger("pitch_perfect.metrics")
+
+# Histogram buckets for size measurements (bytes or characters).
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_NULL_SPAN = nullcontext()
+
+
+class LogExporter:
+    """Writes each measurement as a JSON log line, for log-based pipelines."""
+    def increment(self, name: str, value: float, labels: dict):
+        logger.info(json.dumps({"metric": name, "type": "counter", "value": value, **labels}))
+
+    def observe(self, name: str, value: float, labels: dict):
+        logger.info(json.dumps({"metric": name, "type": "histogram", "value": round(value, 6), **labels}))
+
+    def trace(self, name: str, labels: dict):
+        return _NULL_SPAN
+
+
+class PrometheusExporter:
+    """
+    Records into prometheus_client metrics, created on first use. Set
+    PROMETHEUS_MULTIPROC_DIR to aggregate the Celery worker processes into
+    the API's /metrics when they share a host.
+    """
+    def __init__(self, namespace: str):
+        import prometheus_client
+        self.client = prometheus_client
+        self.namespace = namespace
+        self._metrics = {}
+
+    def _metric(self, kind, name: str, labels: dict, **options):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = kind(name, name.replace("_", " "), sorted(labels), namespace=self.namespace, **options)
+            self._metrics[name] = metric
+        return metric.labels(**labels) if labels else metric
+
+    def increment(self, name: str, value: float, labels: dict):
+        self._metric(self.client.Counter, name, labels).inc(value)
+
+    def observe(self, name: str, value: float, labels: dict):
+        options = {} if name.endswith("_seconds") else {"buckets": SIZE_BUCKETS}
+        self._metric(self.client.Histogram, name, labels, **options).observe(value)
+
+    def trace(self, name: str, labels: dict):
+        return _NULL_SPAN
+
+    def render(self) -> tuple[bytes, str]:
+        registry = self.client.REGISTRY
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            from prometheus_client import multiprocess
+            registry = self.client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return self.client.generate_latest(registry), self.client.CONTENT_TYPE_LATEST
+
+
+class OpenTelemetryExporter:
+    """
+    Records through the OpenTelemetry API; spans also become trace spans.
+    Exporting is configured by the OpenTelemetry SDK set up for the process.
+    """
+    def __init__(self, namespace: str):
+        from opentelemetry import metrics as otel_metrics, trace as otel_trace
+        self.meter = otel_metrics.get_meter(namespace)
+        self.tracer = otel_trace.get_tracer(namespace)
+        self._instruments = {}
+
+    def _instrument(self, factory, name: str):
+        instrument = self._instruments.get(name)
+        if instrument is None:
+            instrument = self._instruments[name] = factory(name)
+        return instrument
+
+    def increment(self, name: str, value: float, labels: dict):
+        self._instrument(self.meter.create_counter, name).add(value, labels)
+
+    def observe(self, name: str, value: float, labels: dict):
+        self._instrument(self.meter.create_histogram, name).record(value, labels)
+
+    def trace(self, name: str, labels: dict):
+        return self.tracer.start_as_current_span(name, attributes=labels)
+
+
+class Metrics:
+    """Records spans, counters and histograms through an exporter."""
+    enabled = True
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            with self.exporter.trace(name, labels):
+                yield
+        finally:
+            self.exporter.observe(f"{name}_seconds", time.perf_counter() - started, labels)
+
+    def count(self, name: str, value: float = 1, **labels):
+        self.exporter.increment(f"{name}_total", value, labels)
+
+    def observe(self, name: str, value: float, **labels):
+        self.exporter.observe(name, value, labels)
+
+
+class NoopMetrics:
+    """Used when METRICS_EXPORTER="none"."""
+    enabled = False
+
+    def span(self, name: str, **labels):
+        return _NULL_SPAN
+
+    def count(self, name: str, value: float = 1, **labels):
+        pass
+
+    def observe(self, name: str, value: float, **labels):
+        pass
+
+
+def build_metrics() -> Metrics | NoopMetrics:
+    exporter_name = settings.METRICS_EXPORTER
+    if exporter_name == "none":
+        return NoopMetrics()
+    if exporter_name == "log":
+        return Metrics(LogExporter())
+    if exporter_name == "prometheus":
+        return Metrics(PrometheusExporter(settings.METRICS_NAMESPACE))
+    if exporter_name == "otel":
+        return Metrics(OpenTelemetryExporter(settings.METRICS_NAMESPACE))
+    raise ValueError(f"Unknown METRICS_EXPORTER: {exporter_name!r}")
+
+
+metrics = build_metrics()
@@ -0,0 +1,108 @@
+# From: backend/app/services/pipeline_artifacts.py
+# ----------------------------------------
+"""
+Intermediate artifacts of the staged lead pipeline.
+
+Stage tasks hand each other the collected texts, packed section inputs and
+fingerprints through Redis instead of the Celery message or result
+backend: each artifact is stored once as zlib-compressed JSON with a TTL,
+and only its key travels between stages. A run's artifacts are indexed by
+its run ID so the last stage can delete them together; ones left behind
+by a failed run expire on their own.
+
+The store also tracks a run's outstanding work: each stage records its
+piece as "pending" before handing it on and "done" when it has finished,
+and whichever stage sees every piece done claims the run's last step.
+Stages are retried, so both are safe to repeat: a piece that is done stays
+done, and a piece is only handed on by the first attempt that claims it.
+"""
+import json
+import zlib
+from typing import Any
+from app.core.config import settings
+from app.services.metrics import metrics
+
+KEY_PREFIX = "pipeline-artifact:v1:"
+
+
+class ArtifactMissingError(LookupError):
+    """An artifact expired or was deleted before a later stage read it."""
+
+
+class ArtifactStore:
+    def __init__(self, redis_url: str, ttl: int, compression_level: int = 6):
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.compression_level = compression_level
+        self._client = None
+
+    def _redis(self):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.redis_url)
+        return self._client
+
+    def key(self, run_id: str, name: str) -> str:
+        return f"{KEY_PREFIX}{run_id}:{name}"
+
+    def put(self, run_id: str, name: str, data: Any) -> str:
+        """Stores `data` (JSON-serialisable) for a run and returns its key."""
+        key = self.key(run_id, name)
+        payload = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), self.compression_level)
+        with self._redis().pipeline(transaction=False) as pipe:
+            pipe.set(key, payload, ex=self.ttl)
+            self._index(pipe, run_id, key)
+            pipe.execute()
+        metrics.observe("pipeline_artifact_bytes", len(payload), artifact=name.split(":")[0])
+        return key
+
+    def get(self, key: str) -> Any:
+        payload = self._redis().get(key)
+        if payload is None:
+            raise ArtifactMissingError(f"Pipeline artifact {key} has expired or was never stored.")
+        return json.loads(zlib.decompress(payload))
+
+    def _index(self, pipe, run_id: str, key: str) -> None:
+        index_key = f"{KEY_PREFIX}{run_id}"
+        pipe.expire(key, self.ttl)
+        pipe.sadd(index_key, key)
+        pipe.expire(index_key, self.ttl)
+
+    def track(self, run_id: str, piece: str, state: str) -> dict[str, str]:
+        """
+        Records the state ("pending" or "done") of one piece of a run's work
+        and returns the states of all its pieces, read in the same transaction.
+        "pending" only applies to a piece not tracked yet, so a retried stage
+        cannot turn a finished piece back into an outstanding one.
+        """
+        key = f"{KEY_PREFIX}{run_id}:progress"
+        with self._redis().pipeline() as pipe:
+            if state == "pending":
+                pipe.hsetnx(key, piece, state)
+            else:
+                pipe.hset(key, piece, state)
+            self._index(pipe, run_id, key)
+            pipe.hgetall(key)
+            states = pipe.execute()[-1]
+        return {name.decode(): value.decode() for name, value in states.items()}
+
+    def claim(self, run_id: str, name: str) -> bool:
+        """True for the first caller only, so a run's last step is started once."""
+        key = f"{KEY_PREFIX}{run_id}:claim:{name}"
+        with self._redis().pipeline(transaction=False) as pipe:
+            pipe.set(key, 1, nx=True, ex=self.ttl)
+            self._index(pipe, run_id, key)
+            return bool(pipe.execute()[0])
+
+    def release(self, run_id: str, name: str) -> None:
+        """Gives up a claim, e.g. when the step it guarded failed and is to be retried."""
+        self._redis().delete(f"{KEY_PREFIX}{run_id}:claim:{name}")
+
+    def delete_run(self, run_id: str) -> None:
+        index_key = f"{KEY_PREFIX}{run_id}"
+        redis = self._redis()
+        keys = redis.smembers(index_key)
+        redis.delete(index_key, *keys)
+
+
+pipeline_artifacts = ArtifactStore(settings.REDIS_URL, ttl=settings.PIPELINE_ARTIFACT_TTL_SECONDS)
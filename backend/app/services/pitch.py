@@ -0,0 +1,18 @@
+# From: backend/app/services/pitch.py
+# ----------------------------------------
+import json
+from app.services.prompt_loader import load_prompt
+
+
+def build_pitch_prompt(company_name: str, summary: str, bullet_points: list[str] | None, user_product: str) -> str:
+    """
+    Fills the standard B2B pitch template with a lead's analysis and the
+    user's product description. Shared by the background pitch job and the
+    API's streaming endpoint so both produce the same prompt.
+    """
+    return load_prompt("pitch/standard_b2b.txt").format(
+        user_product=user_product,
+        company_name=company_name,
+        summary=summary,
+        bullet_points=json.dumps(bullet_points) if bullet_points is not None else None,
+    )
@@ -0,0 +1,210 @@
+# From: backend/app/services/rate_limiter.py
+# ----------------------------------------
+"""
+Rate limiting and retry scheduling for Gemini calls.
+
+- `QuotaWindow` enforces requests/minute and tokens/minute. The Redis
+  backend shares one budget across every worker process (an atomic Lua
+  script over per-minute counters); if Redis is unavailable, or
+  AI_RATE_LIMIT_BACKEND="memory", each process keeps its own window.
+- Priority applies at two levels. In the window, batch analysis may only
+  use part of each budget; the rest (AI_RATE_LIMIT_INTERACTIVE_RESERVE) is
+  left for interactive pitch requests, across every process. Within one
+  event loop, `AIRateLimiter` also queues callers by priority, so a waiting
+  pitch request goes ahead of the loop's queued analysis calls; callers in
+  other loops and processes are only ordered by the window.
+- `AIRateLimiter` adapts its concurrency limit: it halves on a 429 and
+  grows by one after a run of successes. Queue delays are recorded in the
+  `ai_queue_delay_seconds` metric, by priority.
+- `retry_delay` gives the capped, jittered exponential backoff used for
+  429 and 5xx responses.
+"""
+import asyncio
+import enum
+import heapq
+import itertools
+import math
+import random
+import time
+import weakref
+from contextlib import asynccontextmanager
+from app.core.config import settings
+from app.services.metrics import metrics
+
+WINDOW_SECONDS = 60
+KEY_PREFIX = "ai-rate-limit:v1:"
+
+# Atomically admits a request if both the request and token counters for the
+# current window have room. A request larger than the whole token budget is
+# still admitted into an empty window, so it cannot wait forever.
+_ADMIT_SCRIPT = """
+local requests = tonumber(redis.call('GET', KEYS[1]) or '0')
+local tokens = tonumber(redis.call('GET', KEYS[2]) or '0')
+local rpm, tpm, cost, ttl = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+if requests + 1 > rpm or (tokens > 0 and tokens + cost > tpm) then
+    return 0
+end
+redis.call('INCRBY', KEYS[1], 1)
+redis.call('EXPIRE', KEYS[1], ttl)
+redis.call('INCRBY', KEYS[2], cost)
+redis.call('EXPIRE', KEYS[2], ttl)
+return 1
+"""
+
+
+class Priority(enum.IntEnum):
+    INTERACTIVE = 0 # A user is waiting on the result (pitch generation)
+    BATCH = 1 # Background lead analysis
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for quota accounting (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (1-based)."""
+    ceiling = min(settings.AI_RETRY_MAX_DELAY, settings.AI_RETRY_BASE_DELAY * (2 ** (attempt - 1)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def is_retryable_status(code: int | None) -> bool:
+    return code is not None and (code == 429 or code >= 500)
+
+
+class QuotaWindow:
+    """
+    Per-minute request and token counters, shared through Redis when
+    possible. Batch calls are admitted only while both counters are below
+    their share of the budget; interactive calls may use all of it.
+    """
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, redis_url: str | None, interactive_reserve: float = 0.0):
+        self.limits = {
+            Priority.INTERACTIVE: (requests_per_minute, tokens_per_minute),
+            Priority.BATCH: (
+                max(1, math.floor(requests_per_minute * (1 - interactive_reserve))),
+                max(1, math.floor(tokens_per_minute * (1 - interactive_reserve))),
+            ),
+        }
+        self.redis_url = redis_url
+        self._redis = None
+        self._local_window = -1
+        self._local_requests = 0
+        self._local_tokens = 0
+        self.redis_failures = 0
+
+    def _admit_script(self):
+        # One synchronous client for the process: event loops come and go
+        # (one per task in the per-task-loop worker mode), the client stays.
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(self.redis_url).register_script(_ADMIT_SCRIPT)
+        return self._redis
+
+    def _admit_locally(self, window: int, cost: int, rpm: int, tpm: int) -> bool:
+        if window != self._local_window:
+            self._local_window, self._local_requests, self._local_tokens = window, 0, 0
+        if self._local_requests + 1 > rpm or (self._local_tokens > 0 and self._local_tokens + cost > tpm):
+            return False
+        self._local_requests += 1
+        self._local_tokens += cost
+        return True
+
+    async def try_admit(self, cost: int, priority: Priority = Priority.BATCH) -> float:
+        """Admits a call costing `cost` tokens. Returns 0, or the seconds to wait before retrying."""
+        now = time.time()
+        window = int(now // WINDOW_SECONDS)
+        rpm, tpm = self.limits[priority]
+        admitted = None
+        if self.redis_url:
+            try:
+                keys = [f"{KEY_PREFIX}requests:{window}", f"{KEY_PREFIX}tokens:{window}"]
+                admitted = bool(await asyncio.to_thread(self._admit_script(), keys=keys, args=[rpm, tpm, cost, WINDOW_SECONDS * 2]))
+            except Exception as e:
+                self.redis_failures += 1
+                metrics.count("ai_rate_limiter_redis_failures")
+                if self.redis_failures == 1:
+                    print(f"AI rate limiter could not reach Redis, falling back to a per-process limit: {e}")
+        if admitted is None:
+            admitted = self._admit_locally(window, cost, rpm, tpm)
+        if admitted:
+            return 0.0
+        return WINDOW_SECONDS - (now % WINDOW_SECONDS) + random.uniform(0, 0.5)
+
+
+class _LoopState:
+    """Waiter queue and in-flight count; asyncio primitives belong to one event loop."""
+    def __init__(self):
+        self.waiters: list[tuple[int, int]] = []
+        self.changed = asyncio.Condition()
+        self.in_flight = 0
+
+
+class AIRateLimiter:
+    """Priority-ordered admission to the AI API under quota and adaptive concurrency limits."""
+    def __init__(self, window: QuotaWindow, max_concurrency: int, min_concurrency: int = 1):
+        self.window = window
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.concurrency_limit = float(self.max_concurrency)
+        self._states = weakref.WeakKeyDictionary()
+        self._tickets = itertools.count()
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        if loop not in self._states:
+            self._states[loop] = _LoopState()
+        return self._states[loop]
+
+    @asynccontextmanager
+    async def slot(self, prompt: str, priority: Priority = Priority.BATCH):
+        """Waits for this caller's turn, quota and a concurrency slot, then holds the slot."""
+        state = self._state()
+        ticket = (int(priority), next(self._tickets))
+        started = time.monotonic()
+        async with state.changed:
+            heapq.heappush(state.waiters, ticket)
+            try:
+                while True:
+                    if state.waiters[0] == ticket and state.in_flight < int(self.concurrency_limit):
+                        wait = await self.window.try_admit(estimate_tokens(prompt), priority)
+                        if wait == 0:
+                            break
+                        # Only the head of the queue sleeps on the quota; others wait their turn.
+                        state.changed.release()
+                        try:
+                            await asyncio.sleep(wait)
+                        finally:
+                            await state.changed.acquire()
+                        continue
+                    await state.changed.wait()
+            finally:
+                state.waiters.remove(ticket)
+                heapq.heapify(state.waiters)
+                state.changed.notify_all()
+            state.in_flight += 1
+
+        metrics.observe("ai_queue_delay_seconds", time.monotonic() - started, priority=priority.name)
+        try:
+            yield
+        finally:
+            async with state.changed:
+                state.in_flight -= 1
+                state.changed.notify_all()
+
+    def record_success(self):
+        """Additive increase: one more concurrent call per `limit` successes."""
+        self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit)
+
+    def record_throttled(self):
+        """Multiplicative decrease after a 429."""
+        self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+
+
+def build_rate_limiter() -> AIRateLimiter:
+    redis_url = settings.REDIS_URL if settings.AI_RATE_LIMIT_BACKEND == "redis" else None
+    window = QuotaWindow(
+        settings.AI_RATE_LIMIT_RPM, settings.AI_RATE_LIMIT_TPM, redis_url,
+        interactive_reserve=settings.AI_RATE_LIMIT_INTERACTIVE_RESERVE,
+    )
+    return AIRateLimiter(window, max_concurrency=settings.AI_MAX_CONCURRENCY, min_concurrency=settings.AI_MIN_CONCURRENCY)
@@ -0,0 +1,124 @@
+# From: backend/app/services/text_budget.py
+# ----------------------------------------
+"""
+Budget-aware text accumulation for the analysis buckets.
+
+Crawled pages are streamed into an `AnalysisTextCollector` as they arrive.
+Each bucket stops taking input once its character budget is full, and
+text segments it has already seen (navigation, footers and other
+boilerplate repeated across pages) are skipped, so no prompt budget is
+spent on duplicates.
+"""
+from app.services.crawler import classify_page_url
+
+
+class TextBudget:
+    """
+    A bounded, deduplicating text buffer for one bucket. `pages` counts the
+    pages that contributed new text; a page made only of segments seen
+    before doesn't count towards the bucket's target.
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.pages = 0
+        self._parts: list[str] = []
+        self._size = 0
+        self._seen: set[int] = set()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def full(self) -> bool:
+        return self._size >= self.limit
+
+    def add_segments(self, segments: list[str]) -> int:
+        """Adds a page's segments until the budget is full. Returns the characters taken."""
+        if self.full:
+            return 0
+        taken = 0
+        for segment in segments:
+            if self.full:
+                break
+            key = hash(segment)
+            if not segment or key in self._seen:
+                continue
+            self._seen.add(key)
+            piece = segment[: self.limit - self._size]
+            self._parts.append(piece)
+            # Count the joining space so text() never exceeds the limit by much.
+            self._size += len(piece) + 1
+            taken += len(piece)
+        if taken:
+            self.pages += 1
+        return taken
+
+    def text(self) -> str:
+        return " ".join(self._parts)
+
+
+class AnalysisTextCollector:
+    """
+    Routes crawled pages into the "general", "team", "about" and
+    "blog_news" buckets and tracks when the crawl has gathered enough.
+    A bucket is satisfied when its budget is full or it has `target_pages`
+    pages; team and about pages are counted together since both feed the
+    key-persons analysis.
+    """
+    def __init__(self, budget: int, target_pages: int | None = None):
+        self.budget = budget
+        self.target_pages = target_pages
+        self.general = TextBudget(budget)
+        self.team = TextBudget(budget)
+        self.about = TextBudget(budget)
+        self.blog_news = TextBudget(budget)
+        self.page_count = 0
+
+    def add_page(self, page: dict) -> bool:
+        """
+        Takes one crawled page (see html_processing.process_page). Returns True
+        once every bucket is satisfied, which tells the crawler it can stop.
+        """
+        if self.page_count == 0:
+            # The first page is the homepage; its intro paragraphs are the general text.
+            self.general.add_segments([page["intro_text"]])
+        self.page_count += 1
+
+        buckets = classify_page_url(page["url"])
+        segments = page["content_segments"]
+        if "team" in buckets:
+            self.team.add_segments(segments)
+        elif "about" in buckets:
+            self.about.add_segments(segments)
+        if "blog_news" in buckets:
+            self.blog_news.add_segments(segments)
+
+        return self.is_satisfied()
+
+    def general_ready(self) -> bool:
+        """The general text comes from the homepage alone, so it is final after the first page."""
+        return self.page_count > 0
+
+    def team_satisfied(self) -> bool:
+        if self.team.full or self.team.size + self.about.size >= self.budget:
+            return True
+        return self.target_pages is not None and self.team.pages + self.about.pages >= self.target_pages
+
+    def blog_news_satisfied(self) -> bool:
+        if self.blog_news.full:
+            return True
+        return self.target_pages is not None and self.blog_news.pages >= self.target_pages
+
+    def is_satisfied(self) -> bool:
+        return self.team_satisfied() and self.blog_news_satisfied()
+
+    def texts(self) -> tuple[str, str, str]:
+        """Returns (general_text, team_text, blog_news_text), each within the budget."""
+        general_text = self.general.text()
+        team_text = " ".join(part for part in (self.team.text(), self.about.text()) if part)[: self.budget]
+        blog_news_text = self.blog_news.text()
+
+        if not team_text: team_text = general_text
+        if not blog_news_text: blog_news_text = general_text
+        return general_text, team_text, blog_news_text
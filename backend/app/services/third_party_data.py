@@ -2,8 +2,11 @@
 # ----------------------------------------
 import asyncio
 import httpx
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse, quote_plus
+from app.services.growth_cache import FAILED, company_slug, growth_cache, negative_status
+from app.services.html_processing import extract_visible_text_async
+from app.services.http_cache import cached_get
+from app.services.metrics import metrics
 
 # --- THIS IS THE NEW, MORE RELIABLE CONFIGURATION ---
 # We will now construct the URLs directly.
@@ -14,31 +17,58 @@ GROWTH_DATA_SOURCES = {
     "yahoo_finance": "https://finance.yahoo.com/quote/{company_name}"
 }
 
-async def _fetch_and_parse_url(url: str, client: httpx.AsyncClient) -> str | None:
-    """Helper function to fetch a single URL and parse its text."""
+async def _fetch_and_parse_url(source: str, url: str, slug: str, client: httpx.AsyncClient) -> str | None:
+    """
+    Helper function to fetch a single URL and parse its text. A source that
+    gives no text is negatively cached for the company (see growth_cache),
+    and skipped while that entry lasts.
+    """
+    if growth_cache:
+        status = await growth_cache.source_status(source, slug)
+        if status:
+            print(f"  -> Skipping {url}: {status} on an earlier fetch")
+            metrics.count("growth_source_skipped", source=source, reason=status)
+            return None
     print(f"  -> Fetching: {url}")
     try:
-        response = await client.get(url)
+        with metrics.span("growth_source_fetch"):
+            response = await cached_get(client, url)
+        metrics.count("http_cache_requests", cache=response.extensions.get("http_cache", "DISABLED"))
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        for element in soup(["script", "style", "nav", "footer", "header"]):
-            element.decompose()
-        
-        page_text = soup.get_text(separator=' ', strip=True)
+        metrics.count("growth_bytes_fetched", len(response.content))
+        page_text = await extract_visible_text_async(response.text)
         return f"--- Data from {urlparse(url).netloc} ---\n{page_text[:2500]}\n\n"
+    except httpx.HTTPStatusError as e:
+        status = negative_status(e.response.status_code)
+        print(f"  -> Failed to fetch {url}: {e}")
     except Exception as e:
+        status = FAILED
         print(f"  -> Failed to fetch {url}: {e}")
-        return None
+    if growth_cache:
+        await growth_cache.mark_source(source, slug, status)
+    return None
 
 async def fetch_growth_data(company_name: str) -> str:
     """
     Performs targeted fetches for financial/growth data by constructing
-    direct URLs to third-party data providers.
+    direct URLs to third-party data providers. The extracted text is
+    cached per company, and concurrent requests for the same company
+    share one fetch (see growth_cache).
     """
-    print(f"Fetching third-party growth data for: {company_name}")
-    
-    url_friendly_name = company_name.lower().replace(' ', '-').replace('.', '')
+    slug = company_slug(company_name)
+    if growth_cache:
+        consolidated_text = await growth_cache.single_flight(slug, lambda: _fetch_all_sources(slug))
+    else:
+        consolidated_text = await _fetch_all_sources(slug)
+
+    if not consolidated_text:
+        return "Could not retrieve any third-party growth data. The target sites may be blocking automated requests or the company may not be listed."
+        
+    return consolidated_text
+
+async def _fetch_all_sources(url_friendly_name: str) -> str:
+    """Fetches every growth data source for a company slug and joins the texts that came back."""
+    print(f"Fetching third-party growth data for: {url_friendly_name}")
 
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -49,12 +79,7 @@ async def fetch_growth_data(company_name: str) -> str:
         tasks = []
         for source, url_template in GROWTH_DATA_SOURCES.items():
             final_url = url_template.format(company_name=url_friendly_name)
-            tasks.append(_fetch_and_parse_url(final_url, client))
+            tasks.append(_fetch_and_parse_url(source, final_url, url_friendly_name, client))
 
         results = await asyncio.gather(*tasks)
-        consolidated_text = "".join([text for text in results if text])
-
-    if not consolidated_text:
-        return "Could not retrieve any third-party growth data. The target sites may be blocking automated requests or the company may not be listed."
-        
-    return consolidated_text
\ No newline at end of file
+        return "".join([text for text in results if text])
\ No newline at end of file
@@ -0,0 +1,33 @@
+# From: backend/app/workers/celery_app.py
+# ----------------------------------------
+"""
+The Celery application, without any task code.
+
+The API imports this module to dispatch tasks by name and read job results,
+so it never loads the worker tasks and their crawl, parsing and AI
+dependencies. Workers import app.workers.tasks, which registers the tasks
+under the names below.
+"""
+from celery import Celery
+from kombu import Queue
+from app.core.config import settings
+
+# Initialize Celery, pointing it to the Redis instance defined in your .env file
+celery = Celery("workers", broker=settings.REDIS_URL, backend=settings.REDIS_URL)
+# Lets the pitch job status endpoint distinguish queued jobs from running ones.
+celery.conf.task_track_started = True
+
+# Names the API dispatches tasks by.
+PROCESS_LEAD_TASK = "app.workers.tasks.process_lead_website"
+GENERATE_PITCH_TASK = "app.workers.tasks.generate_pitch_task"
+
+# Queues of the staged lead pipeline. A worker started without -Q consumes
+# all of them; start workers with e.g. `-Q lead_crawl` to size each stage's
+# pool separately.
+CRAWL_QUEUE = "lead_crawl"
+EXTRACT_QUEUE = "lead_extract"
+ANALYSIS_QUEUE = "lead_analysis"
+PERSIST_QUEUE = "lead_persist"
+celery.conf.task_queues = [
+    Queue(name) for name in (celery.conf.task_default_queue, CRAWL_QUEUE, EXTRACT_QUEUE, ANALYSIS_QUEUE, PERSIST_QUEUE)
+]
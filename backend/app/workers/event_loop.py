@@ -0,0 +1,50 @@
+# From: backend/app/workers/event_loop.py
+# ----------------------------------------
+"""
+A long-lived event loop shared by every task in a worker process.
+
+With WORKER_EXECUTION_MODE="shared_loop" the worker runs Celery's thread
+pool: each task thread submits its coroutine to this loop and waits for the
+result, so one process drives many lead pipelines' network I/O at once
+instead of one. WORKER_ASYNC_CONCURRENCY caps how many pipelines run on
+the loop at the same time.
+"""
+import asyncio
+import os
+import threading
+from typing import Coroutine
+
+
+class PersistentEventLoop:
+    """Runs an event loop in a daemon thread and executes submitted coroutines on it."""
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        # A loop thread does not survive a fork, so prefork children start their own.
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="worker-event-loop", daemon=True)
+                thread.start()
+                self._loop = loop
+                self._thread = thread
+                self._slots = asyncio.Semaphore(self.max_concurrency)
+                self._pid = os.getpid()
+            return self._loop
+
+    async def _run_limited(self, coro: Coroutine):
+        async with self._slots:
+            return await coro
+
+    def run(self, coro: Coroutine):
+        """Blocks the calling thread until `coro` has finished on the shared loop."""
+        loop = self._ensure_started()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("PersistentEventLoop.run() cannot be called from the loop thread itself.")
+        return asyncio.run_coroutine_threadsafe(self._run_limited(coro), loop).result()
@@ -1,39 +1,94 @@
 # From: backend/app/workers/tasks.py
 # ----------------------------------------
 import asyncio
-import json
+import copy
+import hashlib
 import logging
-import re
-from celery import Celery
-from sqlalchemy.orm import Session
-from bs4 import BeautifulSoup
+import threading
+import uuid
+from typing import Callable
+from celery import chain
+from sqlalchemy import update
+from celery.signals import worker_process_init
+from pydantic import BaseModel, ValidationError
 
 from app.core.config import settings
 from app.db.base import SessionLocal
 from app.db.models import Lead, Pitch, LeadStatus
+from app.schemas.analysis import (
+    DetailedSwotSection,
+    DetailedSwotTechSection,
+    GrowthSection,
+    KeyPersonsSection,
+    OverviewSection,
+    TechTrendsSection,
+)
+from app.services.context_packing import pack_context
 from app.services.crawler import crawl_website
+from app.services.html_processing import load_parser_backend
+from app.services.text_budget import AnalysisTextCollector
 from app.services.generative_ai import ai_service
+from app.services.lead_events import PipelineEvents, lead_events
+from app.services.metrics import metrics
+from app.services.pipeline_artifacts import pipeline_artifacts
+from app.services.pitch import build_pitch_prompt
+from app.services.rate_limiter import Priority
 from app.services.third_party_data import fetch_growth_data
+from app.workers.celery_app import (
+    ANALYSIS_QUEUE,
+    CRAWL_QUEUE,
+    EXTRACT_QUEUE,
+    GENERATE_PITCH_TASK,
+    PERSIST_QUEUE,
+    PROCESS_LEAD_TASK,
+    celery,
+)
+from app.workers.event_loop import PersistentEventLoop
 
 # Configure a logger for this module
 logger = logging.getLogger(__name__)
 
-# Initialize Celery, pointing it to the Redis instance defined in your .env file
-celery = Celery("workers", broker=settings.REDIS_URL)
+if settings.WORKER_EXECUTION_MODE == "shared_loop":
+    # Task threads only wait on the shared loop, so many can run per process.
+    celery.conf.worker_pool = "threads"
+    celery.conf.worker_concurrency = settings.WORKER_ASYNC_CONCURRENCY
+    shared_event_loop = PersistentEventLoop(max_concurrency=settings.WORKER_ASYNC_CONCURRENCY)
+else:
+    shared_event_loop = None
 
-# --- Keyword Lists for Intelligent Text Selection ---
-HIGH_PRIORITY_KEYWORDS = ["team", "leadership", "management", "board", "executive"]
-GENERAL_ABOUT_KEYWORDS = ["about", "company", "who-we-are"]
-BLOG_NEWS_KEYWORDS = ["blog", "news", "insights", "resources", "press", "article", "publication"]
+
+def preload_dependencies():
+    """Loads what the pipeline otherwise creates on first use: the AI client and the HTML parser."""
+    ai_service.preload()
+    load_parser_backend()
+
+def _preload_in_background():
+    try:
+        preload_dependencies()
+    except Exception as e:
+        logger.warning(f"Preloading worker dependencies failed; they load on first use instead: {e}")
+
+@worker_process_init.connect
+def _warm_up(**kwargs):
+    """
+    The AI client and HTML parser are created on first use to keep imports
+    fast. Each prefork child, where tasks actually run, loads them in the
+    background as it starts, so it consumes tasks right away and the first
+    lead doesn't wait for them. Other pools load them on first use.
+    """
+    threading.Thread(target=_preload_in_background, name="warm-up", daemon=True).start()
 
 
 # --- Robust Async Runner for Celery ---
 def run_async_in_worker(async_func):
     """
     A safe way to run an async function from a synchronous Celery task.
-    It gets or creates an event loop, runs the task, and avoids the
-    "Event loop is closed" error caused by asyncio.run().
+    In "shared_loop" mode the coroutine is handed to the process-wide
+    persistent loop. Otherwise it gets or creates an event loop, runs the
+    task, and avoids the "Event loop is closed" error caused by asyncio.run().
     """
+    if shared_event_loop is not None:
+        return shared_event_loop.run(async_func)
     try:
         loop = asyncio.get_running_loop()
     except RuntimeError:  # 'get_running_loop' fails if no loop is running
@@ -43,72 +98,116 @@ def run_async_in_worker(async_func):
     return loop.run_until_complete(async_func)
 
 
-# --- Bulletproof, Regex-Powered AI Helper Functions ---
+# --- Schema-Validated AI Helper Functions ---
 
-async def _safe_ai_json_parse(prompt: str, task_name: str, default_value: dict) -> dict:
+class AIUnavailableError(RuntimeError):
+    """The AI service could not answer (outage, quota); unlike an invalid answer, worth retrying later."""
+
+# What a section contributes to the analysis when it could not be produced.
+SECTION_DEFAULTS = {
+    "overview": {"summary": "", "bullet_points": [], "simple_pitch": ""},
+    "detailed_swot": {"detailed_analysis": {}, "swot_analysis": {}},
+    "key_persons": {"key_persons": []},
+    "tech_trends": {"tech_and_trends": {}},
+    "growth": {"growth_analysis": {"funding_summary": "N/A", "revenue_estimate": "N/A", "stability_rating": 0, "report": "Could not retrieve or analyze third-party growth data."}},
+}
+SECTION_DEFAULTS["detailed_swot_tech"] = {**SECTION_DEFAULTS["detailed_swot"], **SECTION_DEFAULTS["tech_trends"]}
+
+def _section_default(section_name: str) -> dict:
+    return copy.deepcopy(SECTION_DEFAULTS[section_name])
+
+def _extract_json_object(raw_result: str) -> str:
     """
-    A truly robust wrapper for making an AI call and extracting/parsing JSON.
-    It uses regular expressions to find the JSON block and is guaranteed to
-    always return a dictionary.
+    Cuts a response down to its outermost {...} block, dropping Markdown code
+    fences or chatter around it. Uses two linear scans instead of a regex.
     """
+    start, end = raw_result.find("{"), raw_result.rfind("}")
+    if start == -1 or end < start:
+        return raw_result
+    return raw_result[start:end + 1]
+
+async def _repair_section(raw_result: str, error: ValidationError, section_model: type[BaseModel], task_name: str) -> BaseModel | None:
+    """
+    Asks the model to fix only this section's invalid output. The prompt
+    contains the broken JSON and the validation errors, not the source
+    content, so a repair costs a fraction of re-running the section.
+    """
+    problems = "; ".join(f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()[:10])
+    prompt = f"""The following JSON output does not match the required schema.
+    Errors: {problems}
+    Output: {raw_result[:settings.AI_REPAIR_MAX_CHARS]}
+    Return the corrected JSON object only, keeping all valid content unchanged."""
+    repaired = await ai_service.generate_text(prompt, response_schema=section_model)
     try:
-        raw_result = await ai_service.generate_text(prompt)
+        return section_model.model_validate_json(_extract_json_object(repaired or ""))
+    except ValidationError as e:
+        logger.error(f"AI task '{task_name}' repair attempt also failed validation: {e}")
+        return None
 
+async def _structured_ai_call(prompt: str, section_model: type[BaseModel], task_name: str) -> BaseModel | None:
+    """
+    Requests schema-constrained JSON for one analysis section and validates it
+    with the section's Pydantic model. An invalid response is repaired once
+    for this section alone; returns None if the section could not be produced.
+    Raises AIUnavailableError when the AI service itself failed, so the
+    caller can retry the section later.
+    """
+    try:
+        raw_result = await ai_service.generate_text(prompt, use_cache=True, response_schema=section_model)
+
+        if raw_result and raw_result.startswith("Error:"):
+            raise AIUnavailableError(raw_result)
         if not raw_result or not raw_result.strip():
-            logger.warning(f"AI task '{task_name}' returned a completely empty response.")
-            return default_value
-
-        match = re.search(r"```json\s*(\{.*?\})\s*```", raw_result, re.DOTALL)
-        json_string = ""
-        if match:
-            json_string = match.group(1)
-        else:
-            match = re.search(r"(\{.*\})", raw_result, re.DOTALL)
-            if match:
-                json_string = match.group(1)
-
-        if not json_string:
-            logger.warning(f"AI task '{task_name}' could not find a valid JSON block in the response. Raw Response: '{raw_result}'")
-            logger.debug(f"Failed Prompt for '{task_name}':\n{prompt}")
-            return default_value
+            logger.warning(f"AI task '{task_name}' returned no usable response: '{raw_result}'")
+            return None
 
         try:
-            return json.loads(json_string)
-        except json.JSONDecodeError as e:
-            logger.error(f"AI task '{task_name}' failed to decode extracted JSON. Error: {e}. Extracted String: {json_string}")
-            return default_value
+            return section_model.model_validate_json(_extract_json_object(raw_result))
+        except ValidationError as e:
+            logger.warning(f"AI task '{task_name}' response failed schema validation, attempting repair: {e}")
+            logger.debug(f"Failed Prompt for '{task_name}':\n{prompt}")
+            await ai_service.invalidate_cached(prompt, section_model)
+            return await _repair_section(raw_result, e, section_model, task_name)
 
+    except AIUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"An unexpected error occurred in AI task '{task_name}': {e}", exc_info=True)
-        return default_value
+        return None
+
+async def _analysis_section(prompt: str, section_model: type[BaseModel], task_name: str, section_name: str) -> dict:
+    section = await _structured_ai_call(prompt, section_model, task_name)
+    if section is None:
+        return _section_default(section_name)
+    return section.model_dump()
 
 async def get_overview_analysis(text: str) -> dict:
     prompt = f"""You are a helpful business analyst. Analyze the following general website content. If the content is empty or irrelevant, you must return a JSON object with empty strings or arrays for the values.
     Content: "{text}"
     Provide a raw JSON object with three keys: "summary", "bullet_points", and "simple_pitch".
     Return ONLY the raw JSON object."""
-    return await _safe_ai_json_parse(prompt, "Overview", {"summary": "", "bullet_points": [], "simple_pitch": ""})
+    return await _analysis_section(prompt, OverviewSection, "Overview", "overview")
 
 async def get_detailed_and_swot_analysis(text: str) -> dict:
     prompt = f"""You are a helpful business analyst. Analyze the following comprehensive company text. If you cannot find information for a field, you must return an empty string or array for that value.
     Content: "{text}"
     Provide a raw JSON object with two keys: "detailed_analysis" and "swot_analysis".
     Return ONLY the raw JSON object."""
-    return await _safe_ai_json_parse(prompt, "Detailed/SWOT", {"detailed_analysis": {}, "swot_analysis": {}})
+    return await _analysis_section(prompt, DetailedSwotSection, "Detailed/SWOT", "detailed_swot")
 
 async def get_key_persons_analysis(text: str) -> dict:
     prompt = f"""You are a helpful research assistant. Analyze the following text from a company's team/leadership pages.
     Content: "{text}"
     Provide a raw JSON object with one key: "key_persons". This should be an array of objects, where each object has a "name" and "title" key. Find C-suite level individuals (CEO, CTO, CMO, etc.). If none are found, you MUST return an empty array [].
     Return ONLY the raw JSON object."""
-    return await _safe_ai_json_parse(prompt, "Key Persons", {"key_persons": []})
+    return await _analysis_section(prompt, KeyPersonsSection, "Key Persons", "key_persons")
 
 async def get_tech_trends_analysis(text: str) -> dict:
     prompt = f"""You are a helpful technology analyst. Analyze the following text from a company's blog/news pages. If you cannot find information for a field, you must return an empty string or array for that value.
     Content: "{text}"
     Provide a raw JSON object with one key: "tech_and_trends". This object should contain three keys: "recurring_themes", "market_trends", and "thought_leadership_position".
     Return ONLY the raw JSON object."""
-    return await _safe_ai_json_parse(prompt, "Tech/Trends", {"tech_and_trends": {}})
+    return await _analysis_section(prompt, TechTrendsSection, "Tech/Trends", "tech_trends")
 
 async def get_growth_analysis(text: str) -> dict:
     prompt = f"""You are a helpful financial analyst. Analyze the following third-party data.
@@ -117,165 +216,599 @@ async def get_growth_analysis(text: str) -> dict:
     CRITICAL INSTRUCTION: The "stability_rating" field MUST be an integer between 0 and 10. It must NEVER be a string. If you cannot find enough data to make a confident assessment, the rating MUST be 0.
     Return ONLY the raw JSON object."""
     
-    default = {"growth_analysis": {"funding_summary": "N/A", "revenue_estimate": "N/A", "stability_rating": 0, "report": "Could not retrieve or analyze third-party growth data."}}
-    
-    parsed_json = await _safe_ai_json_parse(prompt, "Growth Analysis", default)
-    
-    growth_data = parsed_json.get("growth_analysis")
-    if not growth_data:
-        return default
+    section = await _structured_ai_call(prompt, GrowthSection, "Growth Analysis")
+    if section is None:
+        return _section_default("growth")
 
-    rating = growth_data.get("stability_rating")
-    if not isinstance(rating, int) or not 0 <= rating <= 10:
-        rating = 0
-    report_text = growth_data.get("report", "").lower()
-    if "could not" in report_text and rating > 2:
-        rating = 1
-    growth_data["stability_rating"] = rating
-    parsed_json["growth_analysis"] = growth_data
+    # The schema already clamps stability_rating to 0-10; a report admitting
+    # missing data should not come with a confident rating.
+    growth_data = section.growth_analysis
+    if "could not" in growth_data.report.lower() and growth_data.stability_rating > 2:
+        growth_data.stability_rating = 1
 
-    return parsed_json
+    return section.model_dump()
 
-@celery.task
-def process_lead_website(lead_id: int, url: str):
+async def get_detailed_swot_and_tech_trends_analysis(text: str) -> dict:
     """
-    Main Celery task to orchestrate the entire lead analysis pipeline.
+    Merged call for the two sections that analyse the same comprehensive text,
+    so that text is sent (and paid for) once instead of twice. Falls back to
+    the separate per-section calls if the merged response cannot be validated.
     """
-    db: Session = SessionLocal()
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
-    if not lead:
-        db.close()
-        return
+    prompt = f"""You are a helpful business and technology analyst. Analyze the following comprehensive company text. If you cannot find information for a field, you must return an empty string or array for that value.
+    Content: "{text}"
+    Provide a raw JSON object with three keys: "detailed_analysis", "swot_analysis" and "tech_and_trends".
+    "tech_and_trends" must be an object with three keys: "recurring_themes", "market_trends", and "thought_leadership_position".
+    Return ONLY the raw JSON object."""
+    section = await _structured_ai_call(prompt, DetailedSwotTechSection, "Detailed/SWOT + Tech/Trends")
+    if section is not None:
+        return section.model_dump()
+
+    logger.warning("Merged Detailed/SWOT + Tech/Trends response failed validation; falling back to per-section calls.")
+    detailed_and_swot, tech_trends = await asyncio.gather(
+        get_detailed_and_swot_analysis(text),
+        get_tech_trends_analysis(text),
+    )
+    return {**detailed_and_swot, **tech_trends}
+
+SECTION_ANALYSES = {
+    "overview": get_overview_analysis,
+    "key_persons": get_key_persons_analysis,
+    "growth": get_growth_analysis,
+    "detailed_swot": get_detailed_and_swot_analysis,
+    "tech_trends": get_tech_trends_analysis,
+    "detailed_swot_tech": get_detailed_swot_and_tech_trends_analysis,
+}
+
+# The collected inputs the analysis sections read: the homepage text, the
+# growth data, the team pages and the comprehensive text of all buckets.
+ANALYSIS_INPUTS = ("general", "growth", "team", "comprehensive")
+
+def _sections_for_input(input_name: str) -> list[str]:
+    """
+    The sections that analyse one collected input, according to
+    AI_ANALYSIS_PLAN: "per_section" sends one prompt per section; "merged"
+    combines the sections that share the comprehensive text into a single
+    call. SECTION_ANALYSES maps each section name to its analysis function.
+    """
+    if input_name == "comprehensive":
+        return ["detailed_swot_tech"] if settings.AI_ANALYSIS_PLAN == "merged" else ["detailed_swot", "tech_trends"]
+    return [{"general": "overview", "team": "key_persons", "growth": "growth"}[input_name]]
 
-    try:
-        async def _process_lead_async():
-            company_name = lead.company_name
-            
-            website_crawl_task = crawl_website(url)
-            growth_data_task = fetch_growth_data(company_name)
-            results = await asyncio.gather(website_crawl_task, growth_data_task)
-            
-            crawled_pages, crawled_urls = results[0]
-            growth_data_text = results[1]
-            
-            if not crawled_pages:
-                logger.warning(f"Crawling returned no pages for lead {lead_id} ({url}). The site may be blocking crawlers or is a JS-heavy SPA.")
-                return None
-
-            log_message = f"\n{'='*50}\nCRAWL SUMMARY FOR LEAD ID: {lead_id}\nCrawled {len(crawled_urls)} pages.\n{'='*50}\n"
-            logger.info(log_message)
-
-            general_text, team_text, blog_news_text = _select_and_prioritize_text(crawled_pages)
-            comprehensive_text = f"{general_text}\n{team_text}\n{blog_news_text}"
-            budget = settings.AI_CONTEXT_BUDGET
-            
-            ai_tasks = [
-                get_overview_analysis(general_text[:budget]),
-                get_detailed_and_swot_analysis(comprehensive_text[:budget]),
-                get_key_persons_analysis(team_text[:budget]),
-                get_tech_trends_analysis(comprehensive_text[:budget]),
-                get_growth_analysis(growth_data_text[:budget])
-            ]
-            ai_results = await asyncio.gather(*ai_tasks)
-            
-            final_analysis = {}
-            for result in ai_results:
-                if result is not None:
-                    final_analysis.update(result)
-            
-            return final_analysis
+def _section_fingerprint(section_name: str, input_text: str) -> str:
+    """Identifies a section's input; the model name is included so a model change re-runs it."""
+    return hashlib.sha256(f"{ai_service.model_name}\0{section_name}\0{input_text}".encode("utf-8")).hexdigest()
+
+def _publish_status(lead_id: int, status: LeadStatus):
+    """Pushes a committed status change to subscribers of the lead's event stream."""
+    _publish_event(lead_id, "status", {"status": status.value})
+
+def _publish_event(lead_id: int, event: str, data: dict):
+    if lead_events:
+        lead_events.publish(lead_id, event, data)
+
+
+# --- Lead Pipeline Steps (shared by both PIPELINE_MODEs) ---
 
+def _start_run(lead_id: int, url: str, refresh: bool, previous_status: str | None = None) -> dict | None:
+    """
+    Marks the lead CRAWLING and returns the run description the pipeline
+    steps share, or None if the lead no longer exists. The run is plain JSON
+    so it can travel between stage tasks. `previous_status` is the status
+    the lead had before the refresh endpoint set it to PENDING.
+    """
+    with SessionLocal() as db:
+        lead = db.get(Lead, lead_id)
+        if not lead:
+            return None
+        # A failed refresh keeps the previous analysis usable.
+        previous_status = LeadStatus(previous_status) if previous_status else lead.status
+        status_on_failure = previous_status if refresh and lead.analysis_json else LeadStatus.FAILED
+        run = {
+            "run_id": uuid.uuid4().hex,
+            "lead_id": lead_id,
+            "url": url,
+            "refresh": refresh,
+            "company_name": lead.company_name,
+            "status_on_failure": status_on_failure.value,
+        }
         lead.status = LeadStatus.CRAWLING
         db.commit()
+    if lead_events:
+        lead_events.start_run(lead_id)
+    _publish_status(lead_id, LeadStatus.CRAWLING)
+    return run
+
+def _previous_results(run: dict) -> tuple[dict, dict]:
+    """The stored analysis and fingerprints a refresh builds on; empty for a first run."""
+    if not run["refresh"]:
+        return {}, {}
+    with SessionLocal() as db:
+        lead = db.get(Lead, run["lead_id"])
+        if not lead:
+            return {}, {}
+        return dict(lead.analysis_json or {}), dict(lead.fingerprints_json or {})
+
+async def _timed_stage(stage: str, coro):
+    with metrics.span("pipeline_stage", stage=stage):
+        return await coro
+
+def _plan_sections(run: dict, input_name: str, input_text: str, known_sections: dict) -> list[tuple[str, str, str]]:
+    """
+    Packs the input of each section that reads `input_name`, keeping the
+    sentences most relevant to that section within AI_CONTEXT_TOKEN_BUDGET,
+    and fingerprints it. Returns (section name, packed text, fingerprint) for
+    the sections that need an AI call: all of them, or on a refresh only
+    those whose input changed.
+    """
+    planned = []
+    section_names = _sections_for_input(input_name)
+    with metrics.span("pipeline_stage", stage="pack_context"):
+        for section_name in section_names:
+            packed_text = pack_context(input_text, section_name)
+            fingerprint = _section_fingerprint(section_name, packed_text)
+            if known_sections.get(section_name) != fingerprint:
+                planned.append((section_name, packed_text, fingerprint))
+    if run["refresh"]:
+        logger.info(f"Refresh of lead {run['lead_id']}: re-running {len(planned)} of {len(section_names)} sections reading the {input_name} input.")
+    return planned
+
+def _log_changed_pages(run: dict, previous_fingerprints: dict, page_fingerprints: dict):
+    if not run["refresh"]:
+        return
+    known_pages = previous_fingerprints.get("pages", {})
+    changed_pages = sum(1 for page_url, fingerprint in page_fingerprints.items() if known_pages.get(page_url) != fingerprint)
+    logger.info(f"Refresh of lead {run['lead_id']}: {changed_pages} of {len(page_fingerprints)} crawled pages are new or changed.")
+
+async def _collect_sources(run: dict, events: PipelineEvents, on_input: Callable[[str, str], None]) -> dict | None:
+    """
+    Crawls the website, streaming each page into the text collector, while
+    the growth data is fetched. Each analysis input is passed to
+    `on_input(input_name, text)` as soon as it is ready, so its sections can
+    be analysed while the crawl goes on: "general" after the homepage,
+    "growth" once it is fetched and the site has answered, "team" once the
+    team bucket is satisfied and "comprehensive" when the crawl ends.
+    Returns the page fingerprints, or None when the crawl found no pages
+    (no input is passed on then).
+    """
+    lead_id, url = run["lead_id"], run["url"]
+    text_collector = _new_text_collector()
+    page_fingerprints = {}
+    growth_data_text = None
+    released = set()
+
+    def _release(input_name: str, text: str):
+        on_input(input_name, text)
+        released.add(input_name)
+
+    def _release_ready_inputs():
+        # Nothing is analysed before the site has answered, so an unreachable site costs no AI calls.
+        if not text_collector.general_ready():
+            return
+        if "general" not in released:
+            _release("general", text_collector.texts()[0])
+        if "growth" not in released and growth_data_text is not None:
+            _release("growth", growth_data_text)
+        # Team pages found later still feed the comprehensive text.
+        if "team" not in released and text_collector.team_satisfied():
+            _release("team", text_collector.texts()[1])
+
+    def _on_page(page: dict) -> bool:
+        page_fingerprints[page["url"]] = page["fingerprint"]
+        events.emit("crawl_progress", {"pages": len(page_fingerprints), "url": page["url"]})
+        satisfied = text_collector.add_page(page)
+        _release_ready_inputs()
+        return satisfied
+
+    async def _fetch_growth():
+        nonlocal growth_data_text
+        growth_data_text = await _timed_stage("growth_fetch", fetch_growth_data(run["company_name"]))
+        _release_ready_inputs()
+
+    (crawled_pages, crawled_urls), _ = await asyncio.gather(
+        _timed_stage("crawl", crawl_website(url, on_page=_on_page)),
+        _fetch_growth(),
+    )
+    if not crawled_pages:
+        logger.warning(f"Crawling returned no pages for lead {lead_id} ({url}). The site may be blocking crawlers or is a JS-heavy SPA.")
+        return None
+
+    log_message = f"\n{'='*50}\nCRAWL SUMMARY FOR LEAD ID: {lead_id}\nCrawled {len(crawled_urls)} pages.\n{'='*50}\n"
+    logger.info(log_message)
+    events.emit("crawl_done", {"pages": len(crawled_urls)})
+    general_text, team_text, blog_news_text = text_collector.texts()
+    for input_name, text in (("general", general_text), ("growth", growth_data_text), ("team", team_text)):
+        if input_name not in released:
+            _release(input_name, text)
+    _release("comprehensive", f"{general_text}\n{team_text}\n{blog_news_text}")
+    return page_fingerprints
+
+async def _analyse_section(section_name: str, input_text: str) -> dict:
+    with metrics.span("ai_section", section=section_name):
+        return await SECTION_ANALYSES[section_name](input_text)
+
+def _persist_section(run: dict, section_name: str, result: dict, fingerprint: str):
+    """Saves one finished section right away, so it is visible before the rest of the lead."""
+    with metrics.span("pipeline_stage", stage="db_write"):
+        _save_section(run["lead_id"], section_name, result, fingerprint)
+    metrics.count("ai_sections_run")
+
+class MissingSectionsError(RuntimeError):
+    """A run reached its end without every planned section saved; the lead is not marked COMPLETED."""
+
+def _complete_run(run: dict, page_fingerprints: dict):
+    """Marks the lead COMPLETED once all its sections are saved; raises MissingSectionsError otherwise."""
+    with metrics.span("pipeline_stage", stage="db_write"):
+        _save_completion(run["lead_id"], page_fingerprints)
+    metrics.count("leads_processed", outcome="completed")
+    _publish_status(run["lead_id"], LeadStatus.COMPLETED)
+
+def _fail_run(run: dict, outcome: str):
+    metrics.count("leads_processed", outcome=outcome)
+    _set_lead_status(run["lead_id"], LeadStatus(run["status_on_failure"]))
+
+@celery.task(name=PROCESS_LEAD_TASK)
+def process_lead_website(lead_id: int, url: str, refresh: bool = False, previous_status: str | None = None):
+    """
+    Main Celery task to orchestrate the entire lead analysis pipeline.
+    Each analysis section starts as soon as its input has been collected,
+    while the crawl continues for the others, and is saved as soon as it
+    finishes; the lead is COMPLETED once every section is saved.
+    With `refresh=True` the lead is re-crawled, but only the analysis sections
+    whose input fingerprints changed since the last run are sent to the AI;
+    their results are merged into the stored analysis.
+    With PIPELINE_MODE="staged" this task only starts the stage tasks (see
+    "Staged Lead Pipeline" below); with "single_task" it runs every step.
+    """
+    run = _start_run(lead_id, url, refresh, previous_status)
+    if run is None:
+        return
+    if settings.PIPELINE_MODE == "staged":
+        try:
+            crawl_lead_stage.delay(run)
+        except Exception as e:
+            logger.error(f"Could not start the pipeline stages for lead {lead_id}: {e}", exc_info=True)
+            _fail_run(run, "failed")
+        return
+    _process_lead_in_task(run)
+
+def _process_lead_in_task(run: dict):
+    """Runs the whole pipeline in the current task (PIPELINE_MODE="single_task")."""
+    lead_id = run["lead_id"]
+    # Sessions are opened only around the reads and writes, so no database
+    # connection is held while the site is crawled and the AI is called.
+    _, previous_fingerprints = _previous_results(run)
+    known_sections = previous_fingerprints.get("sections", {})
+    try:
+        async def _process_lead_async():
+            events = PipelineEvents(lead_events, lead_id)
+            try:
+                return await _run_pipeline(events)
+            finally:
+                await events.aclose()
+
+        async def _run_pipeline(events: PipelineEvents):
+            input_tasks = []
+            # Sections finish in any order; their writes to the lead are serialised.
+            save_lock = asyncio.Lock()
+
+            async def _run_section(section_name: str, input_text: str, fingerprint: str):
+                try:
+                    result = await _analyse_section(section_name, input_text)
+                except AIUnavailableError as e:
+                    logger.error(f"AI section '{section_name}' of lead {lead_id} is unavailable: {e}")
+                    result = _section_default(section_name)
+                async with save_lock:
+                    await asyncio.to_thread(_persist_section, run, section_name, result, fingerprint)
+                events.emit("section_done", {"section": section_name})
+
+            async def _start_input(input_name: str, text: str):
+                # Packing is CPU work; the loop keeps crawling meanwhile.
+                sections = await asyncio.to_thread(_plan_sections, run, input_name, text, known_sections)
+                if sections:
+                    events.emit("analysis_started", {"input": input_name, "sections": [section[0] for section in sections]})
+                await asyncio.gather(*(_run_section(*section) for section in sections))
+
+            def _on_input(input_name: str, text: str):
+                input_tasks.append(asyncio.ensure_future(_start_input(input_name, text)))
+
+            try:
+                page_fingerprints = await _collect_sources(run, events, _on_input)
+                if page_fingerprints is None:
+                    return None
+                _log_changed_pages(run, previous_fingerprints, page_fingerprints)
+                if not all(task.done() for task in input_tasks):
+                    await asyncio.to_thread(_set_lead_status, lead_id, LeadStatus.ANALYZING)
+                await _timed_stage("analysis", asyncio.gather(*input_tasks))
+                return page_fingerprints
+            finally:
+                for task in input_tasks:
+                    task.cancel()
+
+        with metrics.span("lead_pipeline"):
+            page_fingerprints = run_async_in_worker(_process_lead_async())
         
-        analysis_data = run_async_in_worker(_process_lead_async())
-        
-        if analysis_data is None:
-            lead.status = LeadStatus.FAILED
-            db.commit()
+        if page_fingerprints is None:
+            _fail_run(run, "no_pages")
             return
 
-        lead.status = LeadStatus.COMPLETED
-        lead.analysis_json = json.dumps(analysis_data)
-        lead.summary = analysis_data.get("summary")
-        lead.bullet_points = json.dumps(analysis_data.get("bullet_points", []))
-        initial_pitch_content = analysis_data.get("simple_pitch")
-        if initial_pitch_content:
-            db.add(Pitch(lead_id=lead.id, content=initial_pitch_content))
-        db.commit()
+        _complete_run(run, page_fingerprints)
 
     except Exception as e:
         logger.error(f"Error in main task for lead {lead_id}: {e}", exc_info=True)
-        lead.status = LeadStatus.FAILED
-        db.commit()
-    finally:
-        db.close()
+        _fail_run(run, "failed")
+
+
+# --- Staged Lead Pipeline ---
+# With PIPELINE_MODE="staged" each lead runs as a dataflow of stage tasks:
+#   crawl (lead_crawl) -> one extract per analysis input (lead_extract)
+#       -> per section: analyse (lead_analysis) -> persist the section (lead_persist)
+#   -> persist the lead (lead_persist) once every section is saved
+# The crawl hands each input on as soon as it is ready, so AI calls overlap
+# the rest of the crawl, and crawl-bound and AI-bound capacity are sized by
+# separate worker pools. Stages pass the small run dict plus artifact keys;
+# the texts themselves go through the compressed artifact store, not the
+# broker, which also tracks the run's outstanding pieces. A failed stage
+# retries on its own without re-running the stages before it.
+
+class LeadStageTask(celery.Task):
+    """Base class of the stage tasks: a stage that fails for good fails the lead."""
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        run = kwargs.get("run") or next((arg for arg in args if isinstance(arg, dict) and "run_id" in arg), None)
+        if run:
+            logger.error(f"Pipeline stage {self.name} failed for lead {run['lead_id']}: {exc}")
+            _fail_run(run, "failed")
+
+def _retry_stage(task: LeadStageTask, error: Exception):
+    """Schedules a retry with exponential backoff; re-raises `error` once retries are used up."""
+    countdown = settings.PIPELINE_RETRY_BACKOFF_SECONDS * 2 ** task.request.retries
+    raise task.retry(exc=error, countdown=countdown, max_retries=settings.PIPELINE_STAGE_MAX_RETRIES)
+
+def _dispatch_piece(run: dict, piece: str, dispatch: Callable[[], None]) -> bool:
+    """
+    Marks one piece of a run pending and hands it on with `dispatch()`,
+    unless an earlier attempt of the same stage already did: a retried stage
+    must not start an extract or an AI call twice. Returns whether it was
+    dispatched now.
+    """
+    claim_name = f"dispatch:{piece}"
+    if not pipeline_artifacts.claim(run["run_id"], claim_name):
+        return False
+    try:
+        pipeline_artifacts.track(run["run_id"], piece, "pending")
+        dispatch()
+    except Exception:
+        # Lets the retry dispatch it.
+        pipeline_artifacts.release(run["run_id"], claim_name)
+        raise
+    return True
+
+def _finish_piece(run: dict, piece: str):
+    """
+    Marks one piece of a run (the crawl, an input or a section) done. Pieces
+    are marked pending before they are handed on, so the stage that finds
+    every piece done is the last one and starts the final persist stage.
+    """
+    states = pipeline_artifacts.track(run["run_id"], piece, "done")
+    if all(state == "done" for state in states.values()) and pipeline_artifacts.claim(run["run_id"], "persist"):
+        persist_lead_stage.delay(run)
 
-def _select_and_prioritize_text(crawled_pages: list[dict]) -> tuple[str, str, str]:
+@celery.task(bind=True, base=LeadStageTask, queue=CRAWL_QUEUE)
+def crawl_lead_stage(self, run: dict):
     """
-    Consolidates text with prioritization and smarter, less greedy extraction.
+    Crawls the site and fetches growth data. Each analysis input becomes an
+    artifact and goes to an extract task as soon as it is ready.
     """
-    general_text = ""
-    high_priority_text = ""
-    general_about_text = ""
-    blog_news_text = ""
+    run_id = run["run_id"]
 
-    def get_clean_text(soup_area):
-        tags = soup_area.find_all(["p", "h1", "h2", "h3", "h4", "li", "span", "td"])
-        return " ".join(tag.get_text(strip=True) for tag in tags)
+    def _dispatch_input(input_name: str, text: str):
+        piece = f"input:{input_name}"
+        _dispatch_piece(run, piece, lambda: extract_lead_stage.delay(run, input_name, pipeline_artifacts.put(run_id, piece, text)))
 
-    homepage_html = crawled_pages[0]['html']
-    soup = BeautifulSoup(homepage_html, "html.parser")
-    general_text = " ".join(p.get_text(strip=True) for p in soup.find_all("p", limit=30))
+    async def _crawl():
+        events = PipelineEvents(lead_events, run["lead_id"])
+        dispatches = []
 
-    for page in crawled_pages:
-        page_soup = BeautifulSoup(page['html'], "html.parser")
-        content_area = page_soup.find("main") or page_soup.find("article") or page_soup.body
-        page_text = get_clean_text(content_area) + " "
-        
-        if any(keyword in page['url'] for keyword in HIGH_PRIORITY_KEYWORDS):
-            high_priority_text += page_text
-        elif any(keyword in page['url'] for keyword in GENERAL_ABOUT_KEYWORDS):
-            general_about_text += page_text
-        
-        if any(keyword in page['url'] for keyword in BLOG_NEWS_KEYWORDS):
-            blog_news_text += page_text
+        def _on_input(input_name: str, text: str):
+            # Storing and enqueueing block, so they run off the event loop.
+            dispatches.append(asyncio.ensure_future(asyncio.to_thread(_dispatch_input, input_name, text)))
 
-    team_text = high_priority_text + general_about_text
-    if not team_text: team_text = general_text
-    if not blog_news_text: blog_news_text = general_text
-    
-    return general_text, team_text, blog_news_text
+        try:
+            page_fingerprints = await _collect_sources(run, events, _on_input)
+            await asyncio.gather(*dispatches)
+            return page_fingerprints
+        finally:
+            # Also after a failure, so the retry cannot start while an input is still being handed on.
+            await asyncio.gather(*dispatches, return_exceptions=True)
+            await events.aclose()
 
-@celery.task
-def generate_pitch_task(lead_id: int, user_product: str) -> str:
+    try:
+        pipeline_artifacts.track(run_id, "crawl", "pending")
+        page_fingerprints = run_async_in_worker(_crawl())
+        if page_fingerprints is None:
+            _fail_run(run, "no_pages")
+            pipeline_artifacts.delete_run(run_id)
+            return
+        _, previous_fingerprints = _previous_results(run)
+        _log_changed_pages(run, previous_fingerprints, page_fingerprints)
+        pipeline_artifacts.put(run_id, "pages", page_fingerprints)
+        _set_lead_status(run["lead_id"], LeadStatus.ANALYZING)
+        _finish_piece(run, "crawl")
+    except Exception as e:
+        _retry_stage(self, e)
+
+@celery.task(bind=True, base=LeadStageTask, queue=EXTRACT_QUEUE)
+def extract_lead_stage(self, run: dict, input_name: str, input_key: str):
+    """Packs the sections that read one input, skips unchanged ones on a refresh, and fans out their AI calls."""
+    try:
+        _, previous_fingerprints = _previous_results(run)
+        sections = _plan_sections(run, input_name, pipeline_artifacts.get(input_key), previous_fingerprints.get("sections", {}))
+        started = []
+        for section_name, input_text, fingerprint in sections:
+            def _dispatch_section(section_name=section_name, input_text=input_text, fingerprint=fingerprint):
+                section_key = pipeline_artifacts.put(run["run_id"], f"section:{section_name}", input_text)
+                chain(
+                    analyse_section_stage.s(run, section_name, section_key),
+                    persist_section_stage.s(run, section_name, fingerprint),
+                ).apply_async()
+            # Sections dispatched by an earlier attempt of this stage are skipped.
+            if _dispatch_piece(run, f"section:{section_name}", _dispatch_section):
+                started.append(section_name)
+        if started:
+            _publish_event(run["lead_id"], "analysis_started", {"input": input_name, "sections": started})
+        _finish_piece(run, f"input:{input_name}")
+    except Exception as e:
+        _retry_stage(self, e)
+
+@celery.task(bind=True, base=LeadStageTask, queue=ANALYSIS_QUEUE)
+def analyse_section_stage(self, run: dict, section_name: str, input_key: str) -> dict:
     """
-    A task to generate a custom pitch on-demand.
+    Runs one analysis section. While the AI service is unavailable the
+    section retries on its own; after the last retry it gets its default
+    value, so one section cannot fail the whole lead.
     """
-    db: Session = SessionLocal()
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
-    if not lead or not lead.summary:
-        db.close()
-        return "Error: Lead or its analysis not found."
+    input_text = pipeline_artifacts.get(input_key)
+    try:
+        return run_async_in_worker(_analyse_section(section_name, input_text))
+    except AIUnavailableError as e:
+        if self.request.retries < settings.PIPELINE_STAGE_MAX_RETRIES:
+            _retry_stage(self, e)
+        logger.error(f"AI section '{section_name}' of lead {run['lead_id']} is unavailable after retries: {e}")
+        return _section_default(section_name)
+
+@celery.task(bind=True, base=LeadStageTask, queue=PERSIST_QUEUE)
+def persist_section_stage(self, result: dict, run: dict, section_name: str, fingerprint: str):
+    """Saves one finished section into the stored analysis as soon as it is ready."""
+    try:
+        _persist_section(run, section_name, result, fingerprint)
+        _publish_event(run["lead_id"], "section_done", {"section": section_name})
+        _finish_piece(run, f"section:{section_name}")
+    except Exception as e:
+        _retry_stage(self, e)
 
-    async def _generate_pitch_async():
-        prompt = f"""
-        You are a professional B2B sales expert. Write a short, personalized, and compelling sales pitch.
+@celery.task(bind=True, base=LeadStageTask, queue=PERSIST_QUEUE)
+def persist_lead_stage(self, run: dict):
+    """Completes the lead once every section is saved."""
+    try:
+        _complete_run(run, pipeline_artifacts.get(pipeline_artifacts.key(run["run_id"], "pages")))
+    except MissingSectionsError as e:
+        # Retrying cannot bring a section back.
+        logger.error(f"Lead {run['lead_id']} cannot be completed: {e}")
+        _fail_run(run, "missing_sections")
+    except Exception as e:
+        _retry_stage(self, e)
+    try:
+        pipeline_artifacts.delete_run(run["run_id"])
+    except Exception as e:
+        logger.warning(f"Could not delete the pipeline artifacts of lead {run['lead_id']}; they will expire: {e}")
 
-        MY PRODUCT/SERVICE: "{user_product}"
+def _set_lead_status(lead_id: int, status: LeadStatus):
+    with SessionLocal() as db:
+        db.query(Lead).filter(Lead.id == lead_id).update({Lead.status: status})
+        db.commit()
+    _publish_status(lead_id, status)
+
+def _lock_lead(db, lead_id: int) -> Lead | None:
+    """
+    Loads a lead for a read-modify-write, locked until the transaction ends,
+    so writers that finish at the same time (e.g. the sections of a staged
+    run, on different workers) cannot overwrite each other's changes.
+    SQLite ignores FOR UPDATE, so the row is written first: that takes
+    SQLite's write lock, and other writers wait for this transaction.
+    """
+    db.execute(update(Lead).where(Lead.id == lead_id).values(status=Lead.status))
+    return db.query(Lead).filter(Lead.id == lead_id).with_for_update().first()
+
+def _save_section(lead_id: int, section_name: str, result: dict, fingerprint: str):
+    """Merges one section's result and fingerprint into the lead, in one short transaction."""
+    with SessionLocal() as db:
+        lead = _lock_lead(db, lead_id)
+        if not lead:
+            return
+        analysis_data = dict(lead.analysis_json or {})
+        previous_pitch = analysis_data.get("simple_pitch")
+        analysis_data.update(result)
+        lead.analysis_json = analysis_data
+        fingerprints = dict(lead.fingerprints_json or {})
+        fingerprints["sections"] = {**fingerprints.get("sections", {}), section_name: fingerprint}
+        lead.fingerprints_json = fingerprints
+        if "summary" in result:
+            lead.summary = result.get("summary")
+            lead.bullet_points = result.get("bullet_points", [])
+        if "growth_analysis" in result:
+            lead.stability_rating = (result.get("growth_analysis") or {}).get("stability_rating")
+        initial_pitch_content = result.get("simple_pitch")
+        if initial_pitch_content and initial_pitch_content != previous_pitch:
+            db.add(Pitch(lead_id=lead.id, content=initial_pitch_content))
+        db.commit()
+
+def _save_completion(lead_id: int, page_fingerprints: dict):
+    """
+    Stores the run's page fingerprints and marks the lead COMPLETED, in one
+    short transaction. Every section of the plan must have been saved by
+    this run or, on a refresh, an earlier one; otherwise the lead is left
+    as it is and MissingSectionsError is raised.
+    """
+    planned_sections = {section_name for input_name in ANALYSIS_INPUTS for section_name in _sections_for_input(input_name)}
+    with SessionLocal() as db:
+        lead = _lock_lead(db, lead_id)
+        if not lead:
+            return
+        known_sections = (lead.fingerprints_json or {}).get("sections", {})
+        missing_sections = planned_sections - known_sections.keys()
+        if missing_sections:
+            raise MissingSectionsError(f"Sections {sorted(missing_sections)} of lead {lead_id} were not saved.")
+        lead.status = LeadStatus.COMPLETED
+        # Fingerprints of sections the current AI_ANALYSIS_PLAN no longer runs are dropped.
+        lead.fingerprints_json = {
+            "pages": page_fingerprints,
+            "sections": {name: fingerprint for name, fingerprint in known_sections.items() if name in planned_sections},
+        }
+        db.commit()
 
-        TARGET COMPANY NAME: {lead.company_name}
-        TARGET COMPANY'S BUSINESS (based on their website): {lead.summary}
-        TARGET COMPANY'S KEY OFFERINGS: {lead.bullet_points}
+def _new_text_collector() -> AnalysisTextCollector:
+    """
+    Builds the per-lead text collector. Each bucket is capped at the AI context
+    budget, and the crawl stops early once every bucket is full or has
+    CRAWLER_BUCKET_TARGET_PAGES pages.
+    """
+    return AnalysisTextCollector(
+        budget=settings.AI_CONTEXT_BUDGET,
+        target_pages=settings.CRAWLER_BUCKET_TARGET_PAGES,
+    )
 
-        Draft a concise and impactful pitch that connects my product to their specific business needs. Start with a strong opening that shows you've done your research.
-        """
-        return await ai_service.generate_text(prompt)
+def _select_and_prioritize_text(crawled_pages: list[dict]) -> tuple[str, str, str]:
+    """
+    Consolidates text with prioritization and smarter, less greedy extraction.
+    Kept for callers that hold a full list of crawled pages; the lead pipeline
+    streams pages into the collector while it crawls instead.
+    """
+    text_collector = _new_text_collector()
+    for page in crawled_pages:
+        text_collector.add_page(page)
+    return text_collector.texts()
 
+@celery.task(name=GENERATE_PITCH_TASK)
+def generate_pitch_task(lead_id: int, user_product: str) -> dict:
+    """
+    A background job to generate a custom pitch on-demand and save it.
+    Returns {"pitch_id": ...}; failures are raised so the job is marked FAILED.
+    """
     try:
-        return run_async_in_worker(_generate_pitch_async())
+        with SessionLocal() as db:
+            lead = db.get(Lead, lead_id)
+            if not lead or not lead.summary:
+                raise ValueError("Lead or its analysis not found.")
+            prompt = build_pitch_prompt(lead.company_name, lead.summary, lead.bullet_points, user_product)
+
+        pitch_content = run_async_in_worker(ai_service.generate_text(prompt, priority=Priority.INTERACTIVE))
+        if not pitch_content or pitch_content.startswith("Error:"):
+            raise RuntimeError(pitch_content or "The AI service returned an empty pitch.")
+
+        with SessionLocal() as db:
+            new_pitch = Pitch(lead_id=lead_id, content=pitch_content)
+            db.add(new_pitch)
+            db.commit()
+            return {"pitch_id": new_pitch.id}
     except Exception as e:
         logger.error(f"Error generating pitch for lead {lead_id}: {e}", exc_info=True)
-        return "Failed to generate pitch due to an internal error."
-    finally:
-        db.close()
\ No newline at end of file
+        raise
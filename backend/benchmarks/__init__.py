@@ -0,0 +1,6 @@
+"""
+Offline benchmarks for the lead pipeline.
+
+Run from the backend directory with `python -m benchmarks.run`; see
+benchmarks/run.py for the options.
+"""
@@ -0,0 +1,173 @@
+"""
+Synthetic company websites served from a local HTTP server.
+
+Each site is generated deterministically from its profile, index and the
+seed, so the same benchmark configuration crawls byte-identical pages on
+every commit. Sites live under `/sites/<slug>/` and link only to their own
+pages; the growth-data page of a company is served at `/growth/<slug>`.
+Every page carries the same navigation and footer, so boilerplate
+deduplication is exercised like on a real site.
+
+This module must not import the app: the server runs in its own process so
+its CPU time and memory don't count against the pipeline being measured.
+"""
+import multiprocessing
+import random
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Pages per section and paragraphs per page for each site size.
+SITE_PROFILES = {
+    "small": {"products": 2, "blog_posts": 2, "news_posts": 1, "team_members": 3, "paragraphs": 3},
+    "medium": {"products": 5, "blog_posts": 8, "news_posts": 4, "team_members": 8, "paragraphs": 6},
+    "large": {"products": 12, "blog_posts": 25, "news_posts": 12, "team_members": 20, "paragraphs": 12},
+}
+
+FIRST_NAMES = ["Ada", "Grace", "Alan", "Linus", "Barbara", "Ken", "Margaret", "Dennis", "Frances", "John", "Radia", "Guido"]
+LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Torvalds", "Liskov", "Thompson", "Hamilton", "Ritchie", "Allen", "Backus", "Perlman", "Rossum"]
+TITLES = [
+    "Chief Executive Officer", "Chief Technology Officer", "Chief Financial Officer", "Co-Founder",
+    "VP of Engineering", "Head of Sales", "Director of Marketing", "Head of Product", "Board Member",
+]
+SUBJECTS = ["Our platform", "The company", "Our team", "Customers", "The product", "Our cloud service", "Enterprise clients", "Partners"]
+VERBS = ["helps", "enables", "automates", "simplifies", "accelerates", "secures", "connects", "analyses"]
+OBJECTS = [
+    "data pipelines for retail brands", "machine learning workflows", "global payment operations",
+    "supply chain planning", "customer support at scale", "security monitoring for hospitals",
+    "revenue forecasting", "digital onboarding for banks", "compliance reporting",
+]
+DETAILS = [
+    "with measurable results within weeks", "across more than forty countries", "without changing existing tools",
+    "using a privacy-first architecture", "backed by a dedicated success team", "with transparent usage-based pricing",
+    "through deep integrations with popular CRMs", "while reducing infrastructure costs",
+]
+
+
+def company_slug(profile: str, index: int) -> str:
+    return f"fixture-{profile}-{index}"
+
+
+def company_name(profile: str, index: int) -> str:
+    """Name whose growth-data slug (see third_party_data) equals company_slug()."""
+    return f"Fixture {profile.title()} {index}"
+
+
+def _sentences(rng: random.Random, count: int) -> str:
+    return " ".join(
+        f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(DETAILS)}."
+        for _ in range(count)
+    )
+
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    return "".join(f"<p>{_sentences(rng, rng.randint(4, 7))}</p>" for _ in range(count))
+
+
+def _page(slug: str, title: str, body: str) -> bytes:
+    base = f"/sites/{slug}"
+    nav = "".join(
+        f'<a href="{base}{path}">{label}</a>'
+        for path, label in [("/", "Home"), ("/about", "About us"), ("/team", "Our team"), ("/products/1", "Products"),
+                            ("/blog", "Blog"), ("/news", "News"), ("/privacy", "Privacy"), ("/login", "Sign in")]
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>{title}</title>"
+        f"<style>body{{font-family:sans-serif}}</style><script>window.analytics=[];</script></head>"
+        f"<body><header><nav>{nav}</nav></header><main><h1>{title}</h1>{body}</main>"
+        f"<footer><p>We use cookies to improve your experience. Copyright {slug}. All rights reserved.</p></footer>"
+        f"</body></html>"
+    ).encode("utf-8")
+
+
+@lru_cache(maxsize=4096)
+def render(path: str, seed: int) -> bytes | None:
+    """Returns the HTML for a fixture path, or None for a 404."""
+    parts = [part for part in path.split("?")[0].split("/") if part]
+    if len(parts) == 2 and parts[0] == "growth":
+        rng = random.Random(f"{seed}:{path}")
+        text = (
+            f"<p>{parts[1]} raised ${rng.randint(5, 200)} million in a Series {rng.choice('ABCD')} round. "
+            f"The company has about {rng.randint(20, 2000)} employees and estimated annual revenue of "
+            f"${rng.randint(2, 500)} million. Headcount grew {rng.randint(5, 80)}% last year.</p>"
+        )
+        return _page(parts[1], f"{parts[1]} funding", text)
+    if len(parts) < 2 or parts[0] != "sites":
+        return None
+    slug, page = parts[1], parts[2:]
+    try:
+        _, profile_name, _ = slug.split("-")
+        profile = SITE_PROFILES[profile_name]
+    except (KeyError, ValueError):
+        return None
+    base = f"/sites/{slug}"
+    rng = random.Random(f"{seed}:{path}")
+    paragraphs = profile["paragraphs"]
+
+    if not page:
+        links = "".join(f'<a href="{base}/products/{i}">Product {i}</a>' for i in range(1, profile["products"] + 1))
+        return _page(slug, "Home", _paragraphs(rng, paragraphs) + f"<section>{links}</section>")
+    if page == ["about"]:
+        return _page(slug, "About us", _paragraphs(rng, paragraphs) + f'<a href="{base}/team">Meet the leadership team</a>')
+    if page == ["team"]:
+        people = "".join(
+            f"<div><h3>{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}</h3><p>{TITLES[i % len(TITLES)]}</p></div>"
+            for i in range(profile["team_members"])
+        )
+        return _page(slug, "Leadership team", people + _paragraphs(rng, 1))
+    if page in (["blog"], ["news"]):
+        count = profile["blog_posts"] if page == ["blog"] else profile["news_posts"]
+        links = "".join(f'<a href="{base}/{page[0]}/{i}">Article {i}</a>' for i in range(1, count + 1))
+        return _page(slug, page[0].title(), links)
+    if len(page) == 2 and page[1].isdigit():
+        limits = {"products": profile["products"], "blog": profile["blog_posts"], "news": profile["news_posts"]}
+        if page[0] in limits and 1 <= int(page[1]) <= limits[page[0]]:
+            related = f'<a href="{base}/{page[0]}/{int(page[1]) % limits[page[0]] + 1}">Next</a>'
+            return _page(slug, f"{page[0].title()} {page[1]}", _paragraphs(rng, paragraphs) + related)
+    if page in (["privacy"], ["login"]):
+        return _page(slug, page[0].title(), _paragraphs(rng, 2))
+    return None
+
+
+def _serve(ready, latency: float, seed: int) -> None:
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            body = render(self.path, seed)
+            self.send_response(200 if body is not None else 404)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.daemon_threads = True
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+class FixtureServer:
+    """Runs the fixture site server in a child process for the duration of a `with` block."""
+    def __init__(self, latency: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.seed = seed
+        self.base_url = ""
+        self._process = None
+
+    def __enter__(self) -> "FixtureServer":
+        ready = multiprocessing.Queue()
+        self._process = multiprocessing.Process(target=_serve, args=(ready, self.latency, self.seed), daemon=True)
+        self._process.start()
+        self.base_url = f"http://127.0.0.1:{ready.get(timeout=10)}"
+        return self
+
+    def __exit__(self, *exc_info):
+        self._process.terminate()
+        self._process.join()
+
+    def site_url(self, profile: str, index: int) -> str:
+        return f"{self.base_url}/sites/{company_slug(profile, index)}/"
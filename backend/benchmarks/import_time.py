@@ -0,0 +1,99 @@
+"""
+Import-time budget for the API and worker entry points.
+
+    cd backend
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --api-budget 2.5 --worker-budget 2.0
+
+Each entry point is imported `--repeat` times in a fresh interpreter with
+`python -X importtime`, and its fastest import is compared with its budget.
+Some modules must not be loaded by an import at all, because they are only
+needed later: the worker tasks for the API, which dispatches them by name,
+and for both entry points the Gemini SDK and the HTML parsers, which are
+loaded on first use. Importing must not touch the database either:
+DATABASE_URL points into a directory that does not exist, so an
+import-time connection fails the check. The exit status is 1 if any
+entry point is over budget or loads a deferred module.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+# Modules loaded on first use; no entry point may import them.
+DEFERRED_MODULES = ["google.genai", "bs4", "lxml", "selectolax"]
+# (entry point, modules it must not import besides DEFERRED_MODULES)
+ENTRY_POINTS = {
+    "api": ("app.main", ["app.workers.tasks"]),
+    "worker": ("app.workers.tasks", []),
+}
+
+
+def _environment(scratch_dir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{scratch_dir}/missing/import-check.db",
+        "ASYNC_DATABASE_URL": "",
+    })
+    env.setdefault("REDIS_URL", "redis://localhost:6379/0")
+    env.setdefault("SECRET_KEY", "import-check")
+    env.setdefault("GOOGLE_API_KEY", "import-check")
+    return env
+
+
+def measure_import(module: str, env: dict) -> tuple[float, set[str]]:
+    """Imports `module` in a fresh interpreter; returns its cumulative import seconds and every module loaded."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    seconds, loaded = None, set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        loaded.add(name)
+        if name == module:
+            seconds = int(cumulative) / 1_000_000
+    if seconds is None:
+        raise RuntimeError(f"No import time reported for {module}.")
+    return seconds, loaded
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--api-budget", type=float, default=2.0, help="Seconds allowed to import app.main")
+    parser.add_argument("--worker-budget", type=float, default=1.5, help="Seconds allowed to import app.workers.tasks")
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per entry point; the fastest counts")
+    args = parser.parse_args(argv)
+    budgets = {"api": args.api_budget, "worker": args.worker_budget}
+
+    problems = []
+    with tempfile.TemporaryDirectory(prefix="import-check-") as scratch_dir:
+        env = _environment(scratch_dir)
+        for entry_point, (module, forbidden) in ENTRY_POINTS.items():
+            try:
+                runs = [measure_import(module, env) for _ in range(args.repeat)]
+            except RuntimeError as e:
+                problems.append(str(e))
+                continue
+            seconds = min(run_seconds for run_seconds, _ in runs)
+            loaded = runs[0][1]
+            print(f"{entry_point:<8}{module:<22}{seconds * 1000:9.1f} ms   budget {budgets[entry_point] * 1000:.0f} ms")
+            if seconds > budgets[entry_point]:
+                problems.append(f"{module} took {seconds:.2f}s to import (budget {budgets[entry_point]:.2f}s)")
+            for name in DEFERRED_MODULES + forbidden:
+                if name in loaded:
+                    problems.append(f"{module} imports {name}, which should only be loaded on first use")
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
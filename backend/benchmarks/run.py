@@ -0,0 +1,340 @@
+"""
+Offline throughput and latency benchmark for the lead pipeline.
+
+    cd backend
+    python -m benchmarks.run --leads 24 --concurrency 4 --output bench.json
+    python -m benchmarks.run --leads 24 --concurrency 4 --baseline bench.json
+
+Synthetic company sites (benchmarks/fixture_site.py) are crawled from a
+local server and Gemini is replaced by a stub with configurable latency
+(benchmarks/stub_ai.py), so runs need no network, API key, Redis or
+PostgreSQL. Three things are measured:
+
+- text selection: `_select_and_prioritize_text` over each site profile's
+  crawled pages, repeated `--repeat` times;
+- the pipeline: `process_lead_website` for `--leads` leads spread over the
+  site profiles, `--concurrency` at a time, against a throwaway SQLite
+  database, reporting leads/minute and p50/p95 of every instrumented stage;
+- resources: peak RSS of this process, its CPU time, and the CPU time
+  spent parsing HTML (including in the parser pool).
+
+Results are written as JSON together with the git commit and the settings
+that shape the run. With `--baseline`, timings and throughput are compared
+against an earlier result and the exit status is 1 if any regressed by
+more than `--threshold`, so the benchmark can gate a deploy.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fixture_site import SITE_PROFILES, FixtureServer, company_name
+
+RESULTS_VERSION = 1
+# Settings recorded with the results; runs are only comparable when they match.
+RECORDED_SETTINGS = [
+    "CRAWLER_MAX_PAGES", "CRAWLER_MAX_DEPTH", "CRAWLER_CONCURRENCY", "CRAWLER_PER_HOST_CONCURRENCY",
+    "CRAWLER_PER_HOST_DELAY", "CRAWLER_STRATEGY", "CRAWLER_BUCKET_TARGET_PAGES", "HTML_PARSER_BACKEND",
+    "HTML_PARSER_POOL_SIZE", "HTML_PARSER_POOL_KIND", "WORKER_EXECUTION_MODE", "AI_CONTEXT_BUDGET",
+    "AI_CONTEXT_TOKEN_BUDGET", "AI_ANALYSIS_PLAN",
+]
+# Lower is better for these; "leads_per_minute" is the only higher-is-better figure.
+COMPARED_RESOURCES = ["parse_cpu_ms_per_page", "peak_rss_mb"]
+# Timing differences below this many seconds are noise, whatever their percentage.
+MIN_TIMING_DELTA = 0.002
+
+
+def _configure_environment(database_path: str) -> None:
+    """
+    Points the app at throwaway local state before it is imported. Settings
+    the benchmark depends on are forced; tuning knobs only get defaults, so
+    CRAWLER_*/HTML_PARSER_*/AI_* from the environment can be benchmarked.
+    """
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{database_path}",
+        "ASYNC_DATABASE_URL": "",
+        "LEAD_EVENTS_ENABLED": "false",
+        "HTTP_CACHE_ENABLED": "false",
+        "AI_CACHE_BACKEND": "none",
+        "GROWTH_CACHE_BACKEND": "none",
+        # The stages of "staged" mode need a broker; the benchmark runs the pipeline in-process.
+        "PIPELINE_MODE": "single_task",
+        "AI_RATE_LIMIT_BACKEND": "memory",
+        # Replaced by the recording exporter below; "log" just makes `metrics` a real Metrics object.
+        "METRICS_EXPORTER": "log",
+    })
+    os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+    # The fixture server is local; politeness delays would only measure sleeps.
+    os.environ.setdefault("CRAWLER_PER_HOST_DELAY", "0")
+
+
+class RecordingExporter:
+    """Keeps every measurement in memory for the report."""
+    def __init__(self):
+        self.observations = defaultdict(list)
+        self.counters = defaultdict(float)
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> str:
+        if not labels:
+            return name
+        return f"{name}{{{','.join(f'{key}={value}' for key, value in sorted(labels.items()))}}}"
+
+    def increment(self, name: str, value: float, labels: dict):
+        self.counters[self._key(name, labels)] += value
+
+    def observe(self, name: str, value: float, labels: dict):
+        self.observations[self._key(name, labels)].append(value)
+
+    def trace(self, name: str, labels: dict):
+        return contextlib.nullcontext()
+
+    def reset(self):
+        self.observations.clear()
+        self.counters.clear()
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 6),
+        "p95": round(percentile(values, 95), 6),
+        "max": round(max(values), 6),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _lead_plan(profiles: list[str], leads: int) -> list[tuple[str, int]]:
+    """Spreads the leads round-robin over the profiles, one distinct site per lead."""
+    return [(profiles[i % len(profiles)], i // len(profiles)) for i in range(leads)]
+
+
+def benchmark_text_selection(server: FixtureServer, profiles: list[str], repeat: int) -> dict:
+    from app.services.crawler import crawl_website
+    from app.workers.tasks import _select_and_prioritize_text
+
+    results = {}
+    for profile in profiles:
+        pages, _ = asyncio.run(crawl_website(server.site_url(profile, 0)))
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            _select_and_prioritize_text(pages)
+            timings.append(time.perf_counter() - started)
+        results[profile] = {"pages": len(pages), **summarize(timings)}
+    return results
+
+
+def benchmark_pipeline(server: FixtureServer, profiles: list[str], leads: int, concurrency: int) -> dict:
+    from app.db.base import Base, SessionLocal, engine
+    from app.db.models import Lead, LeadStatus
+    from app.workers.tasks import process_lead_website
+
+    Base.metadata.create_all(bind=engine)
+    lead_urls = {}
+    with SessionLocal() as db:
+        for profile, index in _lead_plan(profiles, leads):
+            url = server.site_url(profile, index)
+            lead = Lead(company_name=company_name(profile, index), website_url=url)
+            db.add(lead)
+            db.flush()
+            lead_urls[lead.id] = url
+        db.commit()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # Each thread runs the task body like a Celery thread-pool worker would.
+        list(pool.map(lambda item: process_lead_website.run(*item), lead_urls.items()))
+    wall_seconds = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        completed = db.query(Lead).filter(Lead.id.in_(lead_urls), Lead.status == LeadStatus.COMPLETED).count()
+    return {
+        "leads": leads,
+        "completed": completed,
+        "wall_seconds": round(wall_seconds, 3),
+        "leads_per_minute": round(leads / wall_seconds * 60, 2),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns a line for every figure that regressed by more than `threshold` (a fraction)."""
+    regressions = []
+
+    def _check(label: str, current: float, previous: float, higher_is_better: bool = False, floor: float = 0.0):
+        if not previous or abs(current - previous) < floor:
+            return
+        change = (current - previous) / previous
+        if (-change if higher_is_better else change) > threshold:
+            regressions.append(f"{label}: {previous:g} -> {current:g} ({change:+.1%})")
+
+    _check("leads_per_minute", results["pipeline"]["leads_per_minute"], baseline["pipeline"]["leads_per_minute"], True)
+    for section in ("stages", "text_selection"):
+        for key, current in results[section].items():
+            previous = baseline.get(section, {}).get(key)
+            label = key if section == "stages" else f"text_selection {key}"
+            if previous:
+                for stat in ("p50", "p95"):
+                    _check(f"{label} {stat}", current[stat], previous[stat], floor=MIN_TIMING_DELTA)
+    for key in COMPARED_RESOURCES:
+        _check(key, results["resources"][key], baseline["resources"].get(key))
+    return regressions
+
+
+def _print_report(results: dict) -> None:
+    pipeline = results["pipeline"]
+    print(f"\nPipeline: {pipeline['completed']}/{pipeline['leads']} leads completed in {pipeline['wall_seconds']}s "
+          f"-> {pipeline['leads_per_minute']} leads/min")
+    print(f"\n{'stage':<58}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}")
+    for key, stats in results["stages"].items():
+        print(f"{key:<58}{stats['count']:>7}{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}")
+    print("\nText selection:")
+    for profile, stats in results["text_selection"].items():
+        print(f"  {profile:<8} {stats['pages']:>3} pages  p50 {stats['p50'] * 1000:.2f} ms  p95 {stats['p95'] * 1000:.2f} ms")
+    resources = results["resources"]
+    print(f"\nPeak RSS {resources['peak_rss_mb']} MB, CPU {resources['cpu_seconds']}s, "
+          f"HTML parsing {resources['parse_cpu_seconds']}s ({resources['parse_cpu_ms_per_page']} ms/page)")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--leads", type=int, default=12, help="Leads to run through the pipeline")
+    parser.add_argument("--concurrency", type=int, default=4, help="Pipelines run at once (worker threads)")
+    parser.add_argument("--profiles", default=",".join(SITE_PROFILES), help="Comma-separated site sizes")
+    parser.add_argument("--ai-latency", type=float, default=1.0, help="Mean seconds per stubbed Gemini call")
+    parser.add_argument("--ai-jitter", type=float, default=0.2, help="Relative spread of the AI latency")
+    parser.add_argument("--site-latency", type=float, default=0.02, help="Seconds the fixture server waits per request")
+    parser.add_argument("--repeat", type=int, default=50, help="Repetitions of the text selection benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a results file from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed regression, as a fraction")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    args = parser.parse_args(argv)
+    profiles = [profile.strip() for profile in args.profiles.split(",") if profile.strip()]
+    unknown = set(profiles) - set(SITE_PROFILES)
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as workdir, FixtureServer(args.site_latency, args.seed) as server:
+        _configure_environment(os.path.join(workdir, "benchmark.db"))
+        from app.core.config import settings
+        from app.services.html_processing import resolve_parser_backend
+        from app.services.metrics import metrics
+        from app.services.rate_limiter import build_rate_limiter
+        from app.workers import tasks
+        from benchmarks.stub_ai import StubGeminiClient, StubGenerativeAIService
+
+        recorder = RecordingExporter()
+        metrics.exporter = recorder
+        tasks.ai_service = StubGenerativeAIService(
+            StubGeminiClient(args.ai_latency, args.ai_jitter, args.seed), rate_limiter=build_rate_limiter()
+        )
+        # Growth data comes from the fixture server instead of the public sites.
+        from app.services import third_party_data
+        third_party_data.GROWTH_DATA_SOURCES = {"fixture": f"{server.base_url}/growth/{{company_name}}"}
+        # As a started worker does, so the lazily loaded SDK and parser aren't timed as part of a lead.
+        tasks.preload_dependencies()
+
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            text_selection = benchmark_text_selection(server, profiles, args.repeat)
+            recorder.reset()
+            cpu_before = _cpu_seconds()
+            pipeline = benchmark_pipeline(server, profiles, args.leads, args.concurrency)
+            cpu_seconds = _cpu_seconds() - cpu_before
+
+        parse_cpu = recorder.observations.get("html_parse_cpu_seconds", [])
+        results = {
+            "version": RESULTS_VERSION,
+            "environment": {
+                "git_commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "parser_backend": resolve_parser_backend(),
+            },
+            "config": {
+                "leads": args.leads,
+                "concurrency": args.concurrency,
+                "profiles": profiles,
+                "ai_latency": args.ai_latency,
+                "ai_jitter": args.ai_jitter,
+                "site_latency": args.site_latency,
+                "seed": args.seed,
+                "settings": {name: getattr(settings, name) for name in RECORDED_SETTINGS},
+            },
+            "pipeline": pipeline,
+            "stages": {
+                key: summarize(values)
+                for key, values in sorted(recorder.observations.items()) if key.split("{")[0].endswith("_seconds")
+            },
+            "text_selection": text_selection,
+            "counters": dict(sorted(recorder.counters.items())),
+            "resources": {
+                "peak_rss_mb": _peak_rss_mb(),
+                "cpu_seconds": round(cpu_seconds, 3),
+                "parse_cpu_seconds": round(sum(parse_cpu), 4),
+                "parse_cpu_ms_per_page": round(sum(parse_cpu) / len(parse_cpu) * 1000, 3) if parse_cpu else 0.0,
+            },
+        }
+
+    _print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != results["config"]:
+            print("\nWarning: the baseline was run with a different configuration; timings may not be comparable.")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions against {args.baseline} (commit {baseline['environment'].get('git_commit')}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+A latency-configurable stand-in for the Gemini client.
+
+`StubGenerativeAIService` is the real GenerativeAIService (rate limiter,
+retries, metrics) talking to `StubGeminiClient` instead of the API, so the
+benchmark measures everything up to the network call. Responses are
+schema-valid JSON built from the requested response schema, or a short
+pitch for plain-text prompts.
+"""
+import asyncio
+import json
+import random
+import typing
+from types import SimpleNamespace
+from pydantic import BaseModel
+from app.services.generative_ai import GenerativeAIService
+from app.services.rate_limiter import AIRateLimiter
+
+
+def stub_payload(model: type[BaseModel]) -> dict:
+    """A minimal instance of `model`: nested models use their defaults, lists are empty."""
+    payload = {}
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            payload[name] = annotation().model_dump()
+        elif typing.get_origin(annotation) is list:
+            payload[name] = ["Stub item one.", "Stub item two."] if name == "bullet_points" else []
+        else:
+            payload[name] = f"Stub {name.replace('_', ' ')}."
+    return payload
+
+
+class _StubModels:
+    def __init__(self, latency: float, jitter: float, seed: int):
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    async def generate_content(self, model: str, contents: str, config=None):
+        self.calls += 1
+        delay = self.latency * (1 + self._random.uniform(-self.jitter, self.jitter))
+        await asyncio.sleep(max(0.0, delay))
+        schema = getattr(config, "response_schema", None)
+        if schema is not None:
+            return SimpleNamespace(text=json.dumps(stub_payload(schema)))
+        return SimpleNamespace(text="Stub pitch: a short, personalised opening line for the lead.")
+
+
+class StubGeminiClient:
+    """Mimics `genai.Client` far enough for GenerativeAIService.generate_text."""
+    def __init__(self, latency: float = 1.0, jitter: float = 0.2, seed: int = 0):
+        self.aio = SimpleNamespace(models=_StubModels(latency, jitter, seed))
+
+    @property
+    def calls(self) -> int:
+        return self.aio.models.calls
+
+
+class StubGenerativeAIService(GenerativeAIService):
+    def __init__(self, client: StubGeminiClient, rate_limiter: AIRateLimiter | None = None):
+        super().__init__(model_name="benchmark-stub", cache=None, rate_limiter=rate_limiter)
+        self.client = client
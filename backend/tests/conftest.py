@@ -0,0 +1,52 @@
+# From: backend/tests/conftest.py
+# ----------------------------------------
+"""
+Shared fixtures. The app reads its settings at import, so the environment
+is pointed at a throwaway SQLite database, with Redis-backed features
+disabled, before any app module is imported. Tests that need Redis get a
+fakeredis client.
+"""
+import os
+import tempfile
+
+_TEST_DIR = tempfile.mkdtemp(prefix="pitchperfect-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_TEST_DIR}/test.db",
+    "ASYNC_DATABASE_URL": "",
+    "REDIS_URL": "redis://localhost:6379/15",
+    "SECRET_KEY": "test",
+    "GOOGLE_API_KEY": "test",
+    "LEAD_EVENTS_ENABLED": "false",
+    "HTTP_CACHE_ENABLED": "false",
+    "AI_CACHE_BACKEND": "none",
+    "GROWTH_CACHE_BACKEND": "none",
+    "AI_RATE_LIMIT_BACKEND": "memory",
+    "METRICS_EXPORTER": "none",
+})
+
+import fakeredis
+import pytest
+import app.db.models  # noqa: F401  (registers the tables)
+from app.db.base import Base, SessionLocal, engine
+
+
+@pytest.fixture
+def db():
+    """A session on freshly created tables."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def api_client(db):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis()
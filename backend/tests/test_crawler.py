@@ -0,0 +1,36 @@
+# From: backend/tests/test_crawler.py
+# ----------------------------------------
+import asyncio
+
+import pytest
+
+from app.services.crawler import crawl_website
+from benchmarks.fixture_site import FixtureServer
+
+
+@pytest.fixture(scope="module")
+def fixture_site():
+    with FixtureServer() as server:
+        yield server
+
+
+def test_streams_every_crawled_page(fixture_site):
+    streamed = []
+
+    pages, urls = asyncio.run(crawl_website(fixture_site.site_url("medium", 0), on_page=lambda page: streamed.append(page["url"])))
+
+    assert streamed and sorted(streamed) == sorted(urls) == sorted(page["url"] for page in pages)
+
+
+def test_on_page_errors_stop_the_crawl_and_are_raised(fixture_site):
+    calls = []
+
+    def _on_page(page: dict) -> bool:
+        calls.append(page["url"])
+        raise KeyError("collector bug")
+
+    url = fixture_site.site_url("medium", 0)
+    with pytest.raises(KeyError, match="collector bug"):
+        asyncio.run(crawl_website(url, on_page=_on_page))
+    # The homepage is the only page in flight when it fails, so nothing else is fetched.
+    assert calls == [url]
@@ -0,0 +1,25 @@
+# From: backend/tests/test_db.py
+# ----------------------------------------
+import pytest
+
+from app.db import base
+
+
+@pytest.mark.parametrize(("database_url", "async_url"), [
+    ("postgresql://user:secret@db/pitch", "postgresql+asyncpg://user:secret@db/pitch"),
+    ("postgresql+psycopg2://user:secret@db/pitch", "postgresql+asyncpg://user:secret@db/pitch"),
+    ("sqlite:///./leads.db", "sqlite+aiosqlite:///./leads.db"),
+])
+def test_async_url_is_derived_from_the_database_url(monkeypatch, database_url, async_url):
+    monkeypatch.setattr(base.settings, "DATABASE_URL", database_url)
+    monkeypatch.setattr(base.settings, "ASYNC_DATABASE_URL", "")
+
+    assert base._async_database_url() == async_url
+
+
+def test_unsupported_database_names_the_supported_ones(monkeypatch):
+    monkeypatch.setattr(base.settings, "DATABASE_URL", "mysql://user:secret@db/pitch")
+    monkeypatch.setattr(base.settings, "ASYNC_DATABASE_URL", "")
+
+    with pytest.raises(ValueError, match="postgresql, sqlite.*ASYNC_DATABASE_URL"):
+        base._async_database_url()
@@ -0,0 +1,18 @@
+# From: backend/tests/test_generative_ai.py
+# ----------------------------------------
+from pydantic import BaseModel
+
+from app.services.generative_ai import GenerativeAIService
+
+
+def _section_model(**fields) -> type[BaseModel]:
+    return type("OverviewSection", (BaseModel,), {"__annotations__": fields})
+
+
+def test_cache_key_changes_with_the_schema_fields_not_just_its_name():
+    before = GenerativeAIService._cache_input("prompt", _section_model(summary=str))
+    same = GenerativeAIService._cache_input("prompt", _section_model(summary=str))
+    after = GenerativeAIService._cache_input("prompt", _section_model(summary=str, simple_pitch=str))
+
+    assert before == same
+    assert before != after
@@ -0,0 +1,34 @@
+# From: backend/tests/test_growth_data.py
+# ----------------------------------------
+import asyncio
+
+import httpx
+
+from app.services import third_party_data
+from app.services.growth_cache import BLOCKED, FAILED, NOT_FOUND, GrowthDataCache
+from app.services.llm_cache import MemoryCacheBackend
+
+SOURCE_STATUS = {"down": 503, "missing": 404, "blocking": 403}
+
+
+def test_sources_without_text_are_skipped_by_the_next_fetch(monkeypatch):
+    """The next fetch is what a worker that waited on the lock runs when the holder found nothing."""
+    cache = GrowthDataCache(MemoryCacheBackend(100), ttl=60, not_found_ttl=60, blocked_ttl=60, failed_ttl=60)
+    requests = []
+
+    def _respond(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.host)
+        return httpx.Response(SOURCE_STATUS[request.url.host], request=request)
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(third_party_data, "growth_cache", cache)
+    monkeypatch.setattr(third_party_data, "GROWTH_DATA_SOURCES", {name: f"https://{name}/{{company_name}}" for name in SOURCE_STATUS})
+    monkeypatch.setattr(httpx, "AsyncClient", lambda **options: real_client(transport=httpx.MockTransport(_respond), **options))
+
+    first = asyncio.run(third_party_data.fetch_growth_data("Acme"))
+    second = asyncio.run(third_party_data.fetch_growth_data("Acme"))
+
+    assert first == second and first.startswith("Could not retrieve")
+    assert sorted(requests) == sorted(SOURCE_STATUS)
+    statuses = {name: asyncio.run(cache.source_status(name, "acme")) for name in SOURCE_STATUS}
+    assert statuses == {"down": FAILED, "missing": NOT_FOUND, "blocking": BLOCKED}
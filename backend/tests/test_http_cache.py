@@ -0,0 +1,45 @@
+# From: backend/tests/test_http_cache.py
+# ----------------------------------------
+import os
+import sqlite3
+
+import httpx
+
+from app.services.http_cache import HTTPCache
+
+
+def _sizes(cache: HTTPCache) -> tuple[int, int]:
+    """(running total, actual sum of the stored sizes)."""
+    conn = cache._connection()
+    return cache._total_size(conn), conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+
+def test_running_total_follows_inserts_replacements_and_evictions(tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache.sqlite3"), max_bytes=3100, default_ttl=60)
+    headers = httpx.Headers({"content-type": "text/html"})
+
+    for i in range(5):
+        cache._store(f"https://acme.example/{i}", headers, os.urandom(1000), fresh_until=0)
+        total, actual = _sizes(cache)
+        assert total == actual <= 3100
+    cache._store("https://acme.example/4", headers, b"small", fresh_until=0)
+    total, actual = _sizes(cache)
+    assert total == actual
+
+    urls = [row[0] for row in cache._connection().execute("SELECT url FROM responses ORDER BY url")]
+    # Three compressed bodies fit; the least recently used ones went first.
+    assert urls == ["https://acme.example/2", "https://acme.example/3", "https://acme.example/4"]
+
+
+def test_running_total_counts_a_cache_file_written_before_it(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE responses (url TEXT PRIMARY KEY, headers TEXT NOT NULL, body BLOB NOT NULL, "
+            "size INTEGER NOT NULL, fresh_until REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("INSERT INTO responses VALUES ('https://acme.example/', '', x'00', 1234, 0, 0)")
+
+    cache = HTTPCache(str(path), max_bytes=10_000, default_ttl=60)
+
+    assert _sizes(cache) == (1234, 1234)
@@ -0,0 +1,147 @@
+# From: backend/tests/test_lead_pipeline.py
+# ----------------------------------------
+import threading
+
+import pytest
+
+from app.db.models import Lead, LeadStatus
+from app.workers import tasks
+
+
+@pytest.fixture
+def lead(db):
+    lead = Lead(company_name="Acme", website_url="https://acme.example/", status=LeadStatus.ANALYZING)
+    db.add(lead)
+    db.commit()
+    return lead
+
+
+@pytest.fixture
+def artifacts(monkeypatch, redis_client):
+    monkeypatch.setattr(tasks.pipeline_artifacts, "_client", redis_client)
+    return tasks.pipeline_artifacts
+
+
+def _run(lead_id: int) -> dict:
+    return {
+        "run_id": "run-1", "lead_id": lead_id, "url": "https://acme.example/", "refresh": False,
+        "company_name": "Acme", "status_on_failure": LeadStatus.FAILED.value,
+    }
+
+
+def _all_sections() -> list[str]:
+    return [name for input_name in tasks.ANALYSIS_INPUTS for name in tasks._sections_for_input(input_name)]
+
+
+def test_concurrent_section_saves_keep_every_section(db, lead):
+    sections = {f"section_{i}": {f"field_{i}": i} for i in range(8)}
+    barrier = threading.Barrier(len(sections))
+    errors = []
+    lead_id = lead.id  # read here: the fixture's session must not be used from the threads
+
+    def _save(section_name: str, result: dict):
+        barrier.wait()
+        try:
+            tasks._save_section(lead_id, section_name, result, f"fingerprint-{section_name}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_save, args=item) for item in sections.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    db.refresh(lead)
+    assert lead.analysis_json == {key: value for result in sections.values() for key, value in result.items()}
+    assert lead.fingerprints_json["sections"] == {name: f"fingerprint-{name}" for name in sections}
+
+
+def test_completion_requires_every_planned_section(db, lead):
+    section_names = _all_sections()
+    for section_name in section_names[:-1]:
+        tasks._save_section(lead.id, section_name, tasks._section_default(section_name), "fingerprint")
+
+    with pytest.raises(tasks.MissingSectionsError):
+        tasks._save_completion(lead.id, {"https://acme.example/": "page"})
+    db.refresh(lead)
+    assert lead.status == LeadStatus.ANALYZING
+
+    tasks._save_section(lead.id, section_names[-1], tasks._section_default(section_names[-1]), "fingerprint")
+    tasks._save_completion(lead.id, {"https://acme.example/": "page"})
+    db.refresh(lead)
+    assert lead.status == LeadStatus.COMPLETED
+
+
+def test_tracking_a_finished_piece_again_keeps_it_done(artifacts):
+    artifacts.track("run-1", "input:general", "pending")
+    artifacts.track("run-1", "input:general", "done")
+
+    assert artifacts.track("run-1", "input:general", "pending") == {"input:general": "done"}
+
+
+def test_retried_crawl_hands_on_each_input_once(monkeypatch, artifacts, lead):
+    run = _run(lead.id)
+    attempts = []
+
+    async def _collect_sources(run, events, on_input):
+        attempts.append(run)
+        on_input("general", "general text")
+        on_input("growth", "growth text")
+        if len(attempts) == 1:
+            raise ConnectionError("crawl interrupted")
+        on_input("team", "team text")
+        on_input("comprehensive", "comprehensive text")
+        return {"https://acme.example/": "page"}
+
+    extracts = []
+    monkeypatch.setattr(tasks, "_collect_sources", _collect_sources)
+    monkeypatch.setattr(tasks.extract_lead_stage, "delay", lambda run, input_name, input_key: extracts.append(input_name))
+
+    with pytest.raises(ConnectionError):
+        tasks.crawl_lead_stage(run)
+    # The extract of the first input finishes before the crawl is retried.
+    tasks._finish_piece(run, "input:general")
+    tasks.crawl_lead_stage(run)
+
+    assert sorted(extracts) == sorted(tasks.ANALYSIS_INPUTS)
+    states = artifacts.track(run["run_id"], "crawl", "done")
+    assert states["input:general"] == "done"
+    assert all(states[f"input:{name}"] == "pending" for name in ("growth", "team", "comprehensive"))
+
+
+def test_retried_extract_starts_each_section_once(monkeypatch, artifacts, lead):
+    monkeypatch.setattr(tasks.settings, "AI_ANALYSIS_PLAN", "per_section")
+    run = _run(lead.id)
+    input_key = artifacts.put(run["run_id"], "input:comprehensive", "Acme builds rockets. " * 20)
+    started, failures = [], ["tech_trends"]
+
+    class _Chain:
+        def __init__(self, analyse, persist):
+            self.section_name = analyse.args[1]
+
+        def apply_async(self):
+            if self.section_name in failures:
+                failures.remove(self.section_name)
+                raise ConnectionError("broker unavailable")
+            started.append(self.section_name)
+
+    monkeypatch.setattr(tasks, "chain", _Chain)
+
+    with pytest.raises(ConnectionError):
+        tasks.extract_lead_stage(run, "comprehensive", input_key)
+    tasks.extract_lead_stage(run, "comprehensive", input_key)
+
+    assert started == ["detailed_swot", "tech_trends"]
+
+
+def test_failed_refresh_restores_the_status_from_before_the_refresh(db, lead):
+    lead.status, lead.analysis_json = LeadStatus.PENDING, {"summary": "Acme builds rockets."}
+    db.commit()
+
+    run = tasks._start_run(lead.id, lead.website_url, refresh=True, previous_status="COMPLETED")
+    tasks._fail_run(run, "failed")
+
+    db.refresh(lead)
+    assert lead.status == LeadStatus.COMPLETED
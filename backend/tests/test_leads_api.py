@@ -0,0 +1,131 @@
+# From: backend/tests/test_leads_api.py
+# ----------------------------------------
+import threading
+
+import fakeredis
+
+from app.db.models import Lead, LeadStatus, Pitch
+from app.services.lead_events import LeadEventBus
+
+
+def _add_leads(db, count: int, status: LeadStatus = LeadStatus.COMPLETED) -> list[int]:
+    # Added in one transaction, so all leads share the same created_at second.
+    start = db.query(Lead).count()
+    leads = [
+        Lead(company_name=f"Company {i}", website_url=f"https://company-{i}.example/", status=status)
+        for i in range(start, start + count)
+    ]
+    db.add_all(leads)
+    db.commit()
+    return [lead.id for lead in leads]
+
+
+def _walk_pages(api_client, **params) -> list[list[int]]:
+    pages, cursor = [], None
+    while True:
+        response = api_client.get("/api/v1/leads/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append([lead["id"] for lead in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+        assert len(pages) <= 20, "paging did not end"
+
+
+def test_keyset_paging_walks_every_lead_once(api_client, db):
+    lead_ids = _add_leads(db, 7)
+
+    pages = _walk_pages(api_client, limit=2)
+
+    assert [lead_id for page in pages for lead_id in page] == sorted(lead_ids, reverse=True)
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+
+
+def test_keyset_paging_with_status_filter(api_client, db):
+    completed = _add_leads(db, 3)
+    _add_leads(db, 2, status=LeadStatus.FAILED)
+
+    pages = _walk_pages(api_client, limit=1, status="COMPLETED")
+
+    assert [lead_id for page in pages for lead_id in page] == sorted(completed, reverse=True)
+
+
+def test_invalid_cursor_is_rejected(api_client, db):
+    response = api_client.get("/api/v1/leads/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+class _SilentEventBus:
+    """A bus whose runs publish nothing more: subscribers only ever get heartbeats."""
+    subscribed = False
+
+    async def subscribe(self, lead_id, after_seq=0, heartbeat=None):
+        self.subscribed = True
+        yield None
+        raise AssertionError("a finished lead's stream was kept open")
+
+
+def test_reconnecting_to_a_finished_lead_gets_its_status_and_the_stream_ends(api_client, db, monkeypatch):
+    from app.api.v1 import leads
+    bus = _SilentEventBus()
+    monkeypatch.setattr(leads, "lead_events", bus)
+    (lead_id,) = _add_leads(db, 1)
+
+    response = api_client.get(f"/api/v1/leads/{lead_id}/events", headers={"Last-Event-ID": "7"})
+
+    assert response.text == 'event: status\ndata: {"status": "COMPLETED"}\n\n'
+    assert not bus.subscribed
+
+
+def test_refresh_is_refused_while_a_run_is_queued_or_in_progress(api_client, db, monkeypatch):
+    from app.api.v1 import leads
+    sent = []
+    monkeypatch.setattr(leads.celery, "send_task", lambda name, kwargs: sent.append(kwargs))
+    (pending_id,) = _add_leads(db, 1, status=LeadStatus.PENDING)
+    (completed_id,) = _add_leads(db, 1)
+
+    assert api_client.post(f"/api/v1/leads/{pending_id}/refresh").status_code == 409
+    first = api_client.post(f"/api/v1/leads/{completed_id}/refresh")
+    second = api_client.post(f"/api/v1/leads/{completed_id}/refresh")
+
+    assert (first.status_code, first.json()["status"]) == (202, "PENDING")
+    assert second.status_code == 409
+    assert [(kwargs["lead_id"], kwargs["previous_status"]) for kwargs in sent] == [(completed_id, "COMPLETED")]
+
+
+def test_events_after_a_refresh_do_not_replay_the_previous_run(api_client, db, monkeypatch):
+    from app.api.v1 import leads
+    server = fakeredis.FakeServer()
+    bus = LeadEventBus("redis://fake", replay_size=50, ttl=60)
+    bus._sync_client = fakeredis.FakeRedis(server=server)
+    monkeypatch.setattr(bus, "_async_redis", lambda: fakeredis.aioredis.FakeRedis(server=server))
+    monkeypatch.setattr(leads, "lead_events", bus)
+    monkeypatch.setattr(leads.celery, "send_task", lambda name, kwargs: None)
+    monkeypatch.setattr(leads.settings, "LEAD_EVENTS_HEARTBEAT_SECONDS", 0.05)
+    (lead_id,) = _add_leads(db, 1)
+    for status in ("CRAWLING", "COMPLETED"):
+        bus.publish(lead_id, "status", {"status": status})
+
+    assert api_client.post(f"/api/v1/leads/{lead_id}/refresh").status_code == 202
+    # The refresh run ends while the client is subscribed, before the worker has cleared anything.
+    threading.Timer(0.3, bus.publish, (lead_id, "status", {"status": "FAILED"})).start()
+    response = api_client.get(f"/api/v1/leads/{lead_id}/events")
+
+    statuses = [line.removeprefix("data: ") for line in response.text.splitlines() if line.startswith("data: ")]
+    assert statuses == ['{"status": "PENDING"}', '{"status": "FAILED"}']
+
+
+def test_streamed_pitch_without_text_is_an_error_and_not_saved(api_client, db, monkeypatch):
+    from app.api.v1 import leads
+
+    async def _no_text(prompt):
+        for text in ():
+            yield text
+
+    monkeypatch.setattr(leads.ai_service, "stream_text", _no_text)
+    (lead_id,) = _add_leads(db, 1)
+
+    response = api_client.post(f"/api/v1/leads/{lead_id}/generate-pitch/stream", json={"user_product_description": "Rocket fuel"})
+
+    assert response.text.startswith("event: error\n")
+    assert db.query(Pitch).count() == 0
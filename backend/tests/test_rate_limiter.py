@@ -0,0 +1,22 @@
+# From: backend/tests/test_rate_limiter.py
+# ----------------------------------------
+import asyncio
+
+from app.services.rate_limiter import Priority, QuotaWindow
+
+
+def test_batch_calls_leave_the_reserve_to_interactive_calls():
+    window = QuotaWindow(requests_per_minute=10, tokens_per_minute=1000, redis_url=None, interactive_reserve=0.2)
+
+    async def _admit(priority: Priority) -> bool:
+        return await window.try_admit(1, priority) == 0
+
+    async def _fill():
+        batch = [await _admit(Priority.BATCH) for _ in range(10)]
+        interactive = [await _admit(Priority.INTERACTIVE) for _ in range(3)]
+        return batch, interactive
+
+    batch, interactive = asyncio.run(_fill())
+
+    assert batch.count(True) == 8
+    assert interactive == [True, True, False]
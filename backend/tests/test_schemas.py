@@ -0,0 +1,29 @@
+# From: backend/tests/test_schemas.py
+# ----------------------------------------
+from datetime import datetime, timezone
+
+from app.schemas.lead import LeadDetail
+
+
+def _lead(analysis_json) -> dict:
+    return {
+        "id": 1, "company_name": "Acme", "website_url": "https://acme.example/", "status": "COMPLETED",
+        "created_at": datetime.now(timezone.utc), "analysis_json": analysis_json,
+    }
+
+
+def test_unreadable_section_does_not_hide_the_others():
+    lead = LeadDetail.model_validate(_lead({
+        "summary": "Acme builds rockets.",
+        "key_persons": [{"name": "Ada", "title": "CEO"}],
+        "swot_analysis": "not an object",
+    }))
+
+    assert lead.analysis.summary == "Acme builds rockets."
+    assert lead.analysis.key_persons[0].name == "Ada"
+    assert lead.analysis.swot_analysis is None
+    assert lead.analysis.unreadable_sections == ["swot_analysis"]
+
+
+def test_unreadable_analysis_is_dropped():
+    assert LeadDetail.model_validate(_lead("not an object")).analysis is None
@@ -0,0 +1,15 @@
+# From: backend/tests/test_text_budget.py
+# ----------------------------------------
+from app.services.text_budget import TextBudget
+
+
+def test_pages_of_only_repeated_segments_are_not_counted():
+    budget = TextBudget(limit=1000)
+
+    budget.add_segments(["Acme builds rockets.", "Menu Contact"])
+    budget.add_segments(["Menu Contact"])
+    budget.add_segments(["", "Acme builds rockets."])
+    budget.add_segments(["Menu Contact", "Our team of engineers."])
+
+    assert budget.pages == 2
+    assert budget.text() == "Acme builds rockets. Menu Contact Our team of engineers."
@@ -3,8 +3,9 @@
 import axios from "axios";
 
 // Ensure this points to your backend. The default is http://127.0.0.1:8000
+export const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://127.0.0.1:8000";
 const api = axios.create({ 
-  baseURL: import.meta.env.VITE_API_BASE_URL || "http://127.0.0.1:8000" 
+  baseURL: API_BASE_URL 
 });
 
 // --- Interfaces for TypeScript ---
@@ -15,8 +16,9 @@ export interface Lead {
   status: 'PENDING' | 'CRAWLING' | 'ANALYZING' | 'COMPLETED' | 'FAILED';
   page_title?: string;
   summary?: string;
-  bullet_points?: string;
-  analysis_json?: string;
+  bullet_points?: string[] | null;
+  stability_rating?: number | null;
+  analysis?: Record<string, unknown> | null; // Only returned by getLeadDetails
   created_at: string;
 }
 
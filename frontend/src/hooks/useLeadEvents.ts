@@ -0,0 +1,25 @@
+// From: frontend/src/hooks/useLeadEvents.ts
+// ----------------------------------------
+import { useEffect, useRef } from 'react';
+import { API_BASE_URL } from '../api';
+
+/**
+ * Subscribes to a lead's Server-Sent Events stream while `leadId` is set and
+ * calls `onStatus` with every pushed status change. EventSource reconnects
+ * on its own and resumes from the last event it received.
+ */
+export function useLeadEvents(leadId: number | null, onStatus: (status: string) => void) {
+  const onStatusRef = useRef(onStatus);
+  onStatusRef.current = onStatus;
+
+  useEffect(() => {
+    if (leadId === null) return;
+    const source = new EventSource(`${API_BASE_URL}/api/v1/leads/${leadId}/events`);
+    source.addEventListener('status', (event) => {
+      const { status } = JSON.parse((event as MessageEvent).data);
+      onStatusRef.current(status);
+      if (status === 'COMPLETED' || status === 'FAILED') source.close();
+    });
+    return () => source.close();
+  }, [leadId]);
+}
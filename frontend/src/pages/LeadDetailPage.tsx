@@ -1,12 +1,13 @@
 // From: frontend/src/pages/LeadDetailPage.tsx
 // ----------------------------------------
-import React, { useState, useMemo } from 'react';
+import React, { useState } from 'react';
 import { useParams } from 'react-router-dom';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { getLeadDetails, generatePitch, Lead } from '../api';
 import PitchEditor from '../components/PitchEditor';
+import { useLeadEvents } from '../hooks/useLeadEvents';
 
-// --- TYPE DEFINITIONS for the data parsed from the analysis_json field ---
+// --- TYPE DEFINITIONS for the lead's analysis field ---
 interface KeyPerson {
   name: string;
   title: string;
@@ -313,11 +314,12 @@ export default function LeadDetailPage() {
     queryKey: ['lead', leadId],
     queryFn: () => getLeadDetails(Number(leadId)),
     enabled: !!leadId,
-    refetchInterval: (query) => {
-      const data = query.state.data;
-      const isProcessing = data?.status === 'PENDING' || data?.status === 'CRAWLING' || data?.status === 'ANALYZING';
-      return isProcessing ? 5000 : false;
-    },
+  });
+
+  // Status changes are pushed by the backend; refetch the lead when one arrives.
+  const isProcessing = lead?.status === 'PENDING' || lead?.status === 'CRAWLING' || lead?.status === 'ANALYZING';
+  useLeadEvents(isProcessing ? Number(leadId) : null, () => {
+    queryClient.invalidateQueries({ queryKey: ['lead', leadId] });
   });
 
   const mutation = useMutation({
@@ -327,13 +329,7 @@ export default function LeadDetailPage() {
     }
   });
 
-  const analysisData: AnalysisData | null = useMemo(() => {
-    try {
-      return lead?.analysis_json ? JSON.parse(lead.analysis_json) : null;
-    } catch {
-      return null;
-    }
-  }, [lead?.analysis_json]);
+  const analysisData = (lead?.analysis ?? null) as AnalysisData | null;
 
   if (isLoading) return <div className="p-8 text-center text-gray-600">Loading lead details...</div>;
   if (error) return <div className="p-8 text-center text-red-600">Error: {error.message}</div>;